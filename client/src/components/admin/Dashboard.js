@@ -15,7 +15,8 @@ import {
   ListItemText,
   ListItemButton,
   Divider,
-  CircularProgress
+  CircularProgress,
+  Alert
 } from '@mui/material';
 import { 
   Event as EventIcon, 
@@ -23,15 +24,30 @@ import {
   Restaurant as OrderIcon,
   Timeline as TimelineIcon,
   Poll as PollIcon,
-  Notifications as NotificationsIcon
+  Notifications as NotificationsIcon,
+  Sync as SyncIcon
 } from '@mui/icons-material';
 import { AuthContext } from '../../contexts/AuthContext';
-import { getEvents } from '../../utils/api';
+import { getEvents, getSyncFreshness } from '../../utils/api';
+
+// Sync lag (seconds) above which the freshness card warns floor staff
+const SYNC_LAG_WARNING_SECONDS = 15 * 60;
+// How often the freshness card refreshes
+const SYNC_FRESHNESS_REFRESH_MS = 60 * 1000;
+
+// 75 -> "1m 15s", 5400 -> "1h 30m"
+const formatLag = (seconds) => {
+  if (seconds === null || seconds === undefined) return '-';
+  if (seconds < 60) return `${seconds}s`;
+  if (seconds < 3600) return `${Math.floor(seconds / 60)}m ${seconds % 60}s`;
+  return `${Math.floor(seconds / 3600)}h ${Math.floor((seconds % 3600) / 60)}m`;
+};
 
 const Dashboard = () => {
   const [events, setEvents] = useState([]);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState(null);
+  const [freshness, setFreshness] = useState(null);
   const { user } = useContext(AuthContext);
   const navigate = useNavigate();
 
@@ -52,6 +68,21 @@ const Dashboard = () => {
     fetchEvents();
   }, []);
 
+  useEffect(() => {
+    // Sync freshness is optional: the dashboard still works if it can't be loaded
+    const fetchFreshness = async () => {
+      try {
+        setFreshness(await getSyncFreshness());
+      } catch (error) {
+        console.error('Error fetching sync freshness:', error);
+      }
+    };
+
+    fetchFreshness();
+    const interval = setInterval(fetchFreshness, SYNC_FRESHNESS_REFRESH_MS);
+    return () => clearInterval(interval);
+  }, []);
+
   // Updated handleFeatureClick function to direct to event selection first
   const handleFeatureClick = (featureType) => {
     navigate(`/admin/select-event/${featureType}`);
@@ -187,6 +218,63 @@ const Dashboard = () => {
           </Paper>
         </Grid>
 
+        {/* Tripleseat Sync Freshness */}
+        {freshness && (
+          <Grid item xs={12}>
+            <Paper elevation={3} sx={{ p: 3 }}>
+              <Box display="flex" alignItems="center" mb={1}>
+                <SyncIcon color="primary" sx={{ mr: 1 }} />
+                <Typography variant="h6">
+                  Tripleseat Sync Freshness
+                </Typography>
+              </Box>
+              <Typography variant="body2" color="textSecondary" paragraph>
+                Time from a booking change in Tripleseat to the update in Host Hub, over the last {freshness.windowHours} hours
+                ({freshness.lag.count} change{freshness.lag.count !== 1 ? 's' : ''}).
+                Last sync write: {freshness.lastWriteAt ? new Date(freshness.lastWriteAt).toLocaleString() : 'never'}.
+              </Typography>
+
+              {freshness.lag.p90 !== null && freshness.lag.p90 > SYNC_LAG_WARNING_SECONDS && (
+                <Alert severity="warning" sx={{ mb: 2 }}>
+                  Syncs are running slow: 1 in 10 changes takes over {formatLag(freshness.lag.p90)} to reach Host Hub.
+                  Check event times against Tripleseat before guests arrive.
+                </Alert>
+              )}
+
+              <Grid container spacing={2}>
+                {[['Median', 'p50'], ['90th percentile', 'p90'], ['99th percentile', 'p99'], ['Slowest', 'max']].map(([label, key]) => (
+                  <Grid item xs={6} sm={3} key={key}>
+                    <Typography variant="body2" color="textSecondary">
+                      {label}
+                    </Typography>
+                    <Typography variant="h5">
+                      {formatLag(freshness.lag[key])}
+                    </Typography>
+                  </Grid>
+                ))}
+              </Grid>
+
+              {freshness.slowest.length > 0 && (
+                <Box mt={2}>
+                  <Typography variant="subtitle2" gutterBottom>
+                    Slowest recent syncs
+                  </Typography>
+                  <List dense>
+                    {freshness.slowest.map(event => (
+                      <ListItemButton key={event.id} component={Link} to={`/admin/events/${event.id}/edit`}>
+                        <ListItemText
+                          primary={event.name}
+                          secondary={`${new Date(event.date).toLocaleDateString()} · Tripleseat #${event.tripleseatEventId} · ${formatLag(event.lagSeconds)} behind`}
+                        />
+                      </ListItemButton>
+                    ))}
+                  </List>
+                </Box>
+              )}
+            </Paper>
+          </Grid>
+        )}
+
         {/* Feature Cards */}
         <Grid item xs={12}>
           <Typography variant="h6" gutterBottom>
@@ -88,6 +88,12 @@ export const deleteEvent = async (eventId) => {
   return res.data;
 };
 
+// Tripleseat sync lag percentiles over the last `hours`
+export const getSyncFreshness = async (hours = 24) => {
+  const res = await api.get('/events/sync/freshness', { params: { hours } });
+  return res.data;
+};
+
 // Menu API calls
 export const getEventMenu = async (eventId) => {
   const res = await api.get(`/menu/event/${eventId}`);
@@ -463,6 +469,7 @@ const apiObject = {
   createEvent,
   updateEvent,
   deleteEvent,
+  getSyncFreshness,
   getEventMenu,
   createMenuItem,
   updateMenuItem,
@@ -146,6 +146,52 @@ async function createDefaultFacilities() {
   }
 }
 
+// Bring event indexes in line with the schema (tripleseatEventId is unique among non-empty IDs)
+const Event = require('./server/models/event.model');
+
+// Clear empty Tripleseat IDs and duplicates left from before the unique index, keeping each ID on
+// its most recently updated event. Returns the number of IDs still duplicated (0 when clean).
+async function cleanupTripleseatIds() {
+  const blank = await Event.updateMany(
+    { $or: [{ tripleseatEventId: { $type: 'null' } }, { tripleseatEventId: /^\s*$/ }] },
+    { $unset: { tripleseatEventId: '' } }
+  );
+  if (blank.modifiedCount) {
+    console.log(`Cleared ${blank.modifiedCount} empty Tripleseat IDs`);
+  }
+
+  const findDuplicates = () => Event.aggregate([
+    { $match: { tripleseatEventId: { $type: 'string', $gt: '' } } },
+    { $sort: { updatedAt: -1 } },
+    { $group: { _id: '$tripleseatEventId', events: { $push: '$_id' }, count: { $sum: 1 } } },
+    { $match: { count: { $gt: 1 } } }
+  ]);
+
+  const duplicates = await findDuplicates();
+  for (const duplicate of duplicates) {
+    const [kept, ...others] = duplicate.events;
+    await Event.updateMany({ _id: { $in: others } }, { $unset: { tripleseatEventId: '' } });
+    console.log(`Tripleseat ID ${duplicate._id} was on ${duplicate.count} events; kept ${kept}, cleared ${others.join(', ')}`);
+  }
+  return duplicates.length ? (await findDuplicates()).length : 0;
+}
+
+async function syncEventIndexes() {
+  try {
+    // syncIndexes drops the old index before building the new one, so only start once the
+    // unique build cannot fail, or the collection would be left with no index at all
+    const remaining = await cleanupTripleseatIds();
+    if (remaining) {
+      console.error(`Not syncing event indexes: ${remaining} Tripleseat IDs are still duplicated`);
+      return;
+    }
+    const dropped = await Event.syncIndexes();
+    console.log('Event indexes synced', dropped.length ? `(dropped: ${dropped.join(', ')})` : '');
+  } catch (error) {
+    console.error('Error syncing event indexes:', error);
+  }
+}
+
 // Connect to MongoDB
 console.log('Attempting to connect to MongoDB...');
 
@@ -216,6 +262,7 @@ mongoose.connect(process.env.MONGODB_URI)
     // Create seed data
     createTestTimelineItems();
     createDefaultFacilities();
+    syncEventIndexes();
   })
   .catch(err => {
     console.error('⛔ MongoDB connection error details:');
@@ -1,6 +1,13 @@
 // server/controllers/event.controller.js
 const Event = require('../models/event.model');
 
+// Forms send '' for "no Tripleseat ID"; store it as absent so it stays out of the unique index
+const normalizeTripleseatId = (value) => {
+  if (value === undefined || value === null) return undefined;
+  const id = String(value).trim();
+  return id || undefined;
+};
+
 // Create a new event
 exports.createEvent = async (req, res) => {
   try {
@@ -21,7 +28,7 @@ exports.createEvent = async (req, res) => {
       accessCode,
       status, // Now can be 'Definite' or 'Closed'
       facility,
-      tripleseatEventId, // Add Tripleseat Event ID
+      tripleseatEventId: normalizeTripleseatId(tripleseatEventId), // Add Tripleseat Event ID
       createdBy: req.userId
     });
     
@@ -110,7 +117,8 @@ exports.updateEvent = async (req, res) => {
     if (spotify) event.spotify = spotify;
     if (status) event.status = status;
     if (facility) event.facility = facility;
-    if (tripleseatEventId) event.tripleseatEventId = tripleseatEventId;
+    // An empty value clears the link to Tripleseat
+    if (tripleseatEventId !== undefined) event.tripleseatEventId = normalizeTripleseatId(tripleseatEventId);
     
     await event.save();
     
@@ -174,4 +182,371 @@ exports.findByTripleseatId = async (req, res) => {
       error: error.message 
     });
   }
+};
+
+// Record the freshness timestamps (epoch ms headers) sent with a sync write, and the lag at that
+// moment, only when they carry a newer Tripleseat change than the one already recorded: a later
+// resync of an unchanged booking must not stretch its lag
+const recordSyncMeta = async (eventId, req) => {
+  const tripleseatUpdatedAt = Number(req.get('X-Tripleseat-Updated-At'));
+  if (!(tripleseatUpdatedAt > 0)) return;
+  const fetched = Number(req.get('X-Sync-Fetched-At'));
+  const fetchedAt = fetched > 0 ? fetched : null;
+  const writtenAt = Date.now();
+  await Event.updateOne(
+    {
+      _id: eventId,
+      $or: [
+        { 'syncMeta.tripleseatUpdatedAt': null },
+        { 'syncMeta.tripleseatUpdatedAt': { $lt: new Date(tripleseatUpdatedAt) } }
+      ]
+    },
+    {
+      $set: {
+        syncMeta: {
+          tripleseatUpdatedAt,
+          fetchedAt,
+          writtenAt,
+          lag: writtenAt - tripleseatUpdatedAt,
+          detectionLag: fetchedAt ? fetchedAt - tripleseatUpdatedAt : null,
+          writeLag: fetchedAt ? writtenAt - fetchedAt : null
+        }
+      }
+    }
+  );
+};
+
+// Create or update an event by Tripleseat ID (idempotent upsert used by the sync service)
+exports.upsertByTripleseatId = async (req, res) => {
+  try {
+    const tripleseatEventId = req.params.tripleseatId;
+    const idempotencyKey = req.get('Idempotency-Key');
+    const { name, description, date, endTime, status, facility } = req.body;
+    
+    // A retried request with the same key has already been applied
+    if (idempotencyKey) {
+      const existing = await Event.findOne({ tripleseatEventId, syncIdempotencyKey: idempotencyKey });
+      if (existing) {
+        return res.status(200).json({
+          message: 'Event already up to date',
+          replayed: true,
+          event: {
+            id: existing._id,
+            name: existing.name,
+            date: existing.date,
+            endTime: existing.endTime,
+            status: existing.status,
+            tripleseatEventId: existing.tripleseatEventId
+          }
+        });
+      }
+    }
+    
+    const fields = { name, description, date, endTime, status, facility };
+    Object.keys(fields).forEach(key => fields[key] === undefined && delete fields[key]);
+    
+    const upsert = () => Event.findOneAndUpdate(
+      { tripleseatEventId },
+      {
+        $set: { ...fields, syncIdempotencyKey: idempotencyKey, updatedAt: Date.now() },
+        $unset: { tripleseatOrphanedAt: '' },
+        $setOnInsert: {
+          accessCode: Math.random().toString(36).substring(2, 8).toUpperCase(),
+          createdBy: req.userId
+        }
+      },
+      { upsert: true, new: true, runValidators: true, setDefaultsOnInsert: true, includeResultMetadata: true }
+    );
+    
+    let result;
+    try {
+      result = await upsert();
+    } catch (error) {
+      // Two concurrent upserts can both try to insert; the loser retries and becomes an update
+      if (error.code !== 11000) throw error;
+      result = await upsert();
+    }
+    
+    const event = result.value;
+    const created = !result.lastErrorObject?.updatedExisting;
+    await recordSyncMeta(event._id, req);
+    
+    res.status(created ? 201 : 200).json({
+      message: created ? 'Event created successfully' : 'Event updated successfully',
+      event: {
+        id: event._id,
+        name: event.name,
+        description: event.description,
+        date: event.date,
+        endTime: event.endTime,
+        status: event.status,
+        tripleseatEventId: event.tripleseatEventId,
+        accessCode: event.accessCode
+      }
+    });
+  } catch (error) {
+    console.error('Upsert by Tripleseat ID error:', error);
+    res.status(500).json({ 
+      message: 'Server error during event upsert',
+      error: error.message 
+    });
+  }
+};
+
+// Apply only the changed synced fields to an event, by Tripleseat ID, in a single $set
+exports.patchByTripleseatId = async (req, res) => {
+  try {
+    const tripleseatEventId = req.params.tripleseatId;
+    const idempotencyKey = req.get('Idempotency-Key');
+    
+    // Only fields the sync owns; anything else admins edited in Host Hub is left alone
+    const fields = {};
+    ['name', 'description', 'date', 'endTime', 'status', 'facility'].forEach(key => {
+      if (req.body[key] !== undefined) fields[key] = req.body[key];
+    });
+    
+    const event = await Event.findOneAndUpdate(
+      { tripleseatEventId },
+      {
+        $set: { ...fields, syncIdempotencyKey: idempotencyKey, updatedAt: Date.now() },
+        $unset: { tripleseatOrphanedAt: '' }
+      },
+      { new: true, runValidators: true, projection: { _id: 1, tripleseatEventId: 1 } }
+    );
+    
+    if (!event) {
+      return res.status(404).json({ message: 'Event not found' });
+    }
+    await recordSyncMeta(event._id, req);
+    
+    res.status(200).json({
+      message: 'Event updated successfully',
+      updatedFields: Object.keys(fields),
+      event: {
+        id: event._id,
+        tripleseatEventId: event.tripleseatEventId
+      }
+    });
+  } catch (error) {
+    console.error('Patch by Tripleseat ID error:', error);
+    res.status(500).json({ 
+      message: 'Server error during event patch',
+      error: error.message 
+    });
+  }
+};
+
+// Maximum Tripleseat IDs accepted by one batch request
+const TRIPLESEAT_BATCH_LIMIT = 500;
+
+// Get the synced fields of many events by Tripleseat ID in one query
+exports.findByTripleseatIds = async (req, res) => {
+  try {
+    const { ids } = req.body;
+    
+    if (!Array.isArray(ids) || ids.length === 0) {
+      return res.status(400).json({ message: 'ids must be a non-empty array' });
+    }
+    if (ids.length > TRIPLESEAT_BATCH_LIMIT) {
+      return res.status(400).json({ message: `At most ${TRIPLESEAT_BATCH_LIMIT} ids per request` });
+    }
+    
+    const events = await Event.find({ tripleseatEventId: { $in: ids.map(String) } })
+      .select('name description date endTime status facility tripleseatEventId updatedAt')
+      .lean();
+    
+    res.status(200).json({ events });
+  } catch (error) {
+    console.error('Find by Tripleseat IDs error:', error);
+    res.status(500).json({ 
+      message: 'Server error while retrieving events',
+      error: error.message 
+    });
+  }
+};
+
+// List Tripleseat IDs of live synced events, sorted, optionally within a date window
+exports.listTripleseatIds = async (req, res) => {
+  try {
+    const { from, to, orphaned } = req.query;
+    
+    const query = { tripleseatEventId: { $exists: true }, status: { $ne: 'Closed' } };
+    // Only events flagged as orphaned (reconciliation restores those that reappeared)
+    if (orphaned === '1') query.tripleseatOrphanedAt = { $exists: true };
+    if (from || to) {
+      query.date = {};
+      if (from) query.date.$gte = new Date(from);
+      if (to) query.date.$lte = new Date(to);
+    }
+    
+    const events = await Event.find(query)
+      .select('tripleseatEventId -_id')
+      .sort({ tripleseatEventId: 1 })
+      .lean();
+    
+    res.status(200).json({ ids: events.map(event => event.tripleseatEventId) });
+  } catch (error) {
+    console.error('List Tripleseat IDs error:', error);
+    res.status(500).json({ 
+      message: 'Server error while listing Tripleseat IDs',
+      error: error.message 
+    });
+  }
+};
+
+// Close or flag events whose Tripleseat booking no longer exists, or clear the flag once it reappears
+exports.markTripleseatOrphans = async (req, res) => {
+  try {
+    const { ids, action } = req.body;
+    
+    if (!Array.isArray(ids) || ids.length === 0 || ids.length > TRIPLESEAT_BATCH_LIMIT) {
+      return res.status(400).json({ message: `ids must be an array of 1 to ${TRIPLESEAT_BATCH_LIMIT} values` });
+    }
+    if (!['close', 'flag', 'restore'].includes(action)) {
+      return res.status(400).json({ message: "action must be 'close', 'flag' or 'restore'" });
+    }
+    
+    const filter = { tripleseatEventId: { $in: ids.map(String) } };
+    let update;
+    if (action === 'restore') {
+      filter.tripleseatOrphanedAt = { $exists: true };
+      update = { $unset: { tripleseatOrphanedAt: '' }, $set: { updatedAt: Date.now() } };
+    } else if (action === 'flag') {
+      // Keep the time the booking was first found missing; re-runs leave flagged events alone
+      filter.tripleseatOrphanedAt = { $exists: false };
+      update = { $set: { tripleseatOrphanedAt: Date.now(), updatedAt: Date.now() } };
+    } else {
+      filter.$or = [{ tripleseatOrphanedAt: { $exists: false } }, { status: { $ne: 'Closed' } }];
+      update = [{
+        $set: {
+          tripleseatOrphanedAt: { $ifNull: ['$tripleseatOrphanedAt', '$$NOW'] },
+          status: 'Closed',
+          updatedAt: '$$NOW'
+        }
+      }];
+    }
+    
+    const result = await Event.updateMany(filter, update);
+    
+    res.status(200).json({ message: 'Orphaned events updated', modified: result.modifiedCount });
+  } catch (error) {
+    console.error('Mark Tripleseat orphans error:', error);
+    res.status(500).json({ 
+      message: 'Server error while updating orphaned events',
+      error: error.message 
+    });
+  }
+};
+
+// Resolve many Tripleseat IDs to { tripleseatEventId: { _id, updatedAt, syncKey } } in one indexed query
+exports.resolveTripleseatIds = async (req, res) => {
+  try {
+    const { ids } = req.body;
+    
+    if (!Array.isArray(ids) || ids.length === 0 || ids.length > TRIPLESEAT_BATCH_LIMIT) {
+      return res.status(400).json({ message: `ids must be an array of 1 to ${TRIPLESEAT_BATCH_LIMIT} values` });
+    }
+    
+    const events = await Event.find({ tripleseatEventId: { $in: ids.map(String) } })
+      .select('tripleseatEventId updatedAt syncIdempotencyKey')
+      .lean();
+    
+    const resolved = {};
+    events.forEach(event => {
+      resolved[event.tripleseatEventId] = {
+        _id: event._id,
+        updatedAt: event.updatedAt,
+        syncKey: event.syncIdempotencyKey
+      };
+    });
+    
+    res.status(200).json({ events: resolved });
+  } catch (error) {
+    console.error('Resolve Tripleseat IDs error:', error);
+    res.status(500).json({ 
+      message: 'Server error while resolving Tripleseat IDs',
+      error: error.message 
+    });
+  }
+};
+
+// Most recent sync writes sampled for freshness percentiles
+const FRESHNESS_SAMPLE_LIMIT = 5000;
+
+// Nearest-rank percentile of an ascending array of milliseconds, in seconds
+const percentileSeconds = (sorted, fraction) => {
+  if (sorted.length === 0) return null;
+  return Math.round(sorted[Math.min(sorted.length - 1, Math.floor(sorted.length * fraction))] / 1000);
+};
+
+const summarizeLags = (lags) => {
+  const sorted = [...lags].sort((a, b) => a - b);
+  return {
+    count: sorted.length,
+    p50: percentileSeconds(sorted, 0.5),
+    p90: percentileSeconds(sorted, 0.9),
+    p99: percentileSeconds(sorted, 0.99),
+    max: percentileSeconds(sorted, 1)
+  };
+};
+
+// Sync lag percentiles over the last `hours` of Tripleseat changes (admin dashboard)
+exports.getSyncFreshness = async (req, res) => {
+  try {
+    const hours = Math.min(Number(req.query.hours) || 24, 24 * 30);
+    const since = new Date(Date.now() - hours * 3600 * 1000);
+    
+    // Only changes made in the window: first syncs of old bookings (backfills) aren't lag
+    const events = await Event.find({
+      'syncMeta.writtenAt': { $gte: since },
+      'syncMeta.tripleseatUpdatedAt': { $gte: since }
+    })
+      .select('name date tripleseatEventId syncMeta')
+      .sort({ 'syncMeta.writtenAt': -1 })
+      .limit(FRESHNESS_SAMPLE_LIMIT)
+      .lean();
+    
+    const total = [];
+    const detection = [];
+    const write = [];
+    events.forEach(event => {
+      // Lags were stored when each change was first written; older records only have timestamps
+      const { tripleseatUpdatedAt, fetchedAt, writtenAt, lag, detectionLag, writeLag } = event.syncMeta;
+      event.lag = lag ?? writtenAt - tripleseatUpdatedAt;
+      total.push(event.lag);
+      if (fetchedAt) {
+        detection.push(detectionLag ?? fetchedAt - tripleseatUpdatedAt);
+        write.push(writeLag ?? writtenAt - fetchedAt);
+      }
+    });
+    
+    const lastWrite = await Event.findOne({ 'syncMeta.writtenAt': { $exists: true } })
+      .select('syncMeta.writtenAt')
+      .sort({ 'syncMeta.writtenAt': -1 })
+      .lean();
+    
+    const slowest = [...events].sort((a, b) => b.lag - a.lag).slice(0, 5).map(event => ({
+      id: event._id,
+      name: event.name,
+      date: event.date,
+      tripleseatEventId: event.tripleseatEventId,
+      lagSeconds: Math.round(event.lag / 1000)
+    }));
+    
+    res.status(200).json({
+      windowHours: hours,
+      lastWriteAt: lastWrite ? lastWrite.syncMeta.writtenAt : null,
+      // Tripleseat change -> Host Hub write; split into change -> fetch and fetch -> write
+      lag: summarizeLags(total),
+      detectionLag: summarizeLags(detection),
+      writeLag: summarizeLags(write),
+      slowest
+    });
+  } catch (error) {
+    console.error('Get sync freshness error:', error);
+    res.status(500).json({ 
+      message: 'Server error while computing sync freshness',
+      error: error.message 
+    });
+  }
 };
\ No newline at end of file
@@ -1,11 +1,52 @@
 // server/middlewares/auth.middleware.js
 const jwt = require('jsonwebtoken');
+const crypto = require('crypto');
 const User = require('../models/user.model');
 const Event = require('../models/event.model');
 
-// Verify JWT token
+// Digest of the sync service's API key (HOST_HUB_SERVICE_KEY), computed once at startup
+const serviceKeyDigest = process.env.HOST_HUB_SERVICE_KEY
+  ? crypto.createHash('sha256').update(process.env.HOST_HUB_SERVICE_KEY).digest()
+  : null;
+
+// Routes the service key may call: only the Tripleseat sync routes under /api/events, never
+// the general event routes (a leaked key must not be able to edit or delete any event)
+const SERVICE_KEY_BASE = '/api/events';
+const SERVICE_KEY_PREFIX = '/tripleseat/';
+
+// User recorded as creator of events written with the service key (first admin unless configured)
+let serviceUserId = process.env.HOST_HUB_SERVICE_USER_ID || null;
+
+// Check a service key in constant time; comparing digests keeps lengths equal
+const isValidServiceKey = (key) => {
+  const digest = crypto.createHash('sha256').update(key).digest();
+  return crypto.timingSafeEqual(digest, serviceKeyDigest);
+};
+
+// Verify JWT token (or the sync service's API key)
 exports.authenticateToken = async (req, res, next) => {
   try {
+    // Machine credential for the sync service: no login, no bcrypt, no JWT per job
+    const serviceKey = req.headers['x-service-key'];
+    if (serviceKey) {
+      if (!serviceKeyDigest || !isValidServiceKey(serviceKey)) {
+        return res.status(401).json({ message: 'Invalid service key' });
+      }
+      if (req.baseUrl !== SERVICE_KEY_BASE || !req.path.startsWith(SERVICE_KEY_PREFIX)) {
+        return res.status(403).json({ message: 'Service key not allowed for this route' });
+      }
+      if (!serviceUserId) {
+        const admin = await User.findOne({ role: 'admin' }).select('_id');
+        if (!admin) {
+          return res.status(500).json({ message: 'No admin user to attribute service writes to' });
+        }
+        serviceUserId = admin._id.toString();
+      }
+      req.userId = serviceUserId;
+      req.userRole = 'service';
+      return next();
+    }
+
     // Get token from header
     const token = req.headers.authorization?.split(' ')[1];
 
@@ -48,6 +89,15 @@ exports.isAdmin = (req, res, next) => {
   next();
 };
 
+// Check if user is admin or the sync service (Tripleseat sync routes only)
+exports.isAdminOrService = (req, res, next) => {
+  // The service key is already limited to the sync routes by authenticateToken
+  if (req.userRole !== 'admin' && req.userRole !== 'service') {
+    return res.status(403).json({ message: 'Admin access required' });
+  }
+  next();
+};
+
 // Check if user can access an event (admin or participant)
 exports.eventParticipantCheck = async (req, res, next) => {
   try {
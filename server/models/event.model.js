@@ -26,7 +26,29 @@ const eventSchema = new mongoose.Schema({
   // Add Tripleseat Event ID field
   tripleseatEventId: {
     type: String,
-    index: true // Add index for faster lookups
+    trim: true
+  },
+  // Idempotency key of the last sync write, used to recognise retried requests
+  syncIdempotencyKey: {
+    type: String
+  },
+  // Set by reconciliation when the Tripleseat booking was cancelled or deleted
+  tripleseatOrphanedAt: {
+    type: Date
+  },
+  // Sync freshness of the last synced change: when it was made in Tripleseat, fetched by the
+  // sync service and first written here, with the lags (ms) at that write. Resyncs of the same
+  // change leave it alone
+  syncMeta: {
+    tripleseatUpdatedAt: Date,
+    fetchedAt: Date,
+    writtenAt: {
+      type: Date,
+      index: true
+    },
+    lag: Number,
+    detectionLag: Number,
+    writeLag: Number
   },
   // Add required single facility reference
   facility: {
@@ -92,6 +114,14 @@ const eventSchema = new mongoose.Schema({
   }
 });
 
+// One Host Hub event per Tripleseat booking (sync upserts rely on this). Partial rather than
+// sparse: manually created events have no Tripleseat ID, and a sparse index would still
+// index empty strings
+eventSchema.index(
+  { tripleseatEventId: 1 },
+  { unique: true, partialFilterExpression: { tripleseatEventId: { $type: 'string', $gt: '' } } }
+);
+
 eventSchema.pre('save', function(next) {
   this.updatedAt = Date.now();
   next();
@@ -1,7 +1,7 @@
 // server/routes/event.routes.js
 const express = require('express');
 const eventController = require('../controllers/event.controller');
-const { authenticateToken, isAdmin } = require('../middlewares/auth.middleware');
+const { authenticateToken, isAdmin, isAdminOrService } = require('../middlewares/auth.middleware');
 
 const router = express.Router();
 
@@ -11,12 +11,33 @@ router.post('/', authenticateToken, isAdmin, eventController.createEvent);
 // Get all events (admin only)
 router.get('/', authenticateToken, isAdmin, eventController.getAllEvents);
 
+// Sync lag percentiles for the admin dashboard (must precede /:eventId)
+router.get('/sync/freshness', authenticateToken, isAdmin, eventController.getSyncFreshness);
+
 // Get event by ID
 router.get('/:eventId', authenticateToken, eventController.getEventById);
 
+// List Tripleseat IDs of live synced events (reconciliation; must precede /tripleseat/:tripleseatId)
+router.get('/tripleseat/ids', authenticateToken, isAdminOrService, eventController.listTripleseatIds);
+
 // NEW ROUTE: Get event by Tripleseat ID
 router.get('/tripleseat/:tripleseatId', authenticateToken, eventController.findByTripleseatId);
 
+// Get many events by Tripleseat ID in one request (sync dry runs)
+router.post('/tripleseat/batch', authenticateToken, isAdminOrService, eventController.findByTripleseatIds);
+
+// Resolve many Tripleseat IDs to Host Hub IDs in one request (sync pre-resolution)
+router.post('/tripleseat/exists', authenticateToken, isAdminOrService, eventController.resolveTripleseatIds);
+
+// Close, flag or restore events cancelled/deleted in Tripleseat (reconciliation)
+router.post('/tripleseat/orphans', authenticateToken, isAdminOrService, eventController.markTripleseatOrphans);
+
+// Create or update event by Tripleseat ID (idempotent, used by the sync service)
+router.put('/tripleseat/:tripleseatId', authenticateToken, isAdminOrService, eventController.upsertByTripleseatId);
+
+// Apply changed synced fields by Tripleseat ID (minimal-diff updates from the sync service)
+router.patch('/tripleseat/:tripleseatId', authenticateToken, isAdminOrService, eventController.patchByTripleseatId);
+
 // Update event
 router.put('/:eventId', authenticateToken, eventController.updateEvent);
 
@@ -0,0 +1,113 @@
+# AIMD concurrency limit for Host Hub writes. The in-flight limit grows by one per window of
+# completed writes while their p95 latency stays under target, and is cut multiplicatively on a
+# latency spike or an overload signal (5xx, timeout, refused connection).
+import os
+import time
+import threading
+from collections import deque
+from contextlib import contextmanager
+
+class AIMDLimiter:
+    """Additive-increase / multiplicative-decrease limit on concurrent requests"""
+
+    def __init__(self, initial=4, min_limit=1, max_limit=32, target_p95=0.25, window=20, backoff=0.5):
+        self.limit = initial
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        # Seconds the window's p95 write latency may reach before the limit is cut
+        self.target_p95 = target_p95
+        # Completed writes per adjustment
+        self.window = window
+        self.backoff = backoff
+        self.in_flight = 0
+        self.stats = {"increases": 0, "decreases": 0, "peak_limit": initial, "last_p95": 0.0}
+        self._latencies = deque(maxlen=window)
+        self._overloaded = False
+        # Bumped on every cut, so writes started under the old, higher limit don't cut it again
+        self._generation = 0
+        self._cond = threading.Condition()
+
+    @classmethod
+    def from_env(cls):
+        """Build the limiter from HOST_HUB_WRITE_* settings"""
+        return cls(
+            initial=int(os.getenv("HOST_HUB_WRITE_CONCURRENCY", "4")),
+            max_limit=int(os.getenv("HOST_HUB_WRITE_MAX_CONCURRENCY", "32")),
+            target_p95=float(os.getenv("HOST_HUB_WRITE_TARGET_P95_MS", "250")) / 1000
+        )
+
+    @contextmanager
+    def slot(self):
+        """Hold one in-flight slot; set `.overloaded = True` on the yielded outcome for 5xx/timeouts"""
+        outcome = _Outcome()
+        with self._cond:
+            while self.in_flight >= self.limit:
+                self._cond.wait()
+            self.in_flight += 1
+            generation = self._generation
+        started = time.perf_counter()
+        try:
+            yield outcome
+        finally:
+            self._complete(time.perf_counter() - started, outcome.overloaded, generation)
+
+    def _complete(self, latency, overloaded, generation):
+        with self._cond:
+            self.in_flight -= 1
+            self._cond.notify_all()
+            if generation != self._generation:
+                return
+            self._latencies.append(latency)
+            self._overloaded = self._overloaded or overloaded
+            if len(self._latencies) >= self.window or overloaded:
+                self._adjust()
+
+    def _adjust(self):
+        """One AIMD step over the samples collected since the last step (caller holds the lock)"""
+        ordered = sorted(self._latencies)
+        p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+        self.stats["last_p95"] = p95
+        if self._overloaded or p95 > self.target_p95:
+            new_limit = max(self.min_limit, int(self.limit * self.backoff))
+            if new_limit < self.limit:
+                self.stats["decreases"] += 1
+                self._generation += 1
+                print(f"Host Hub write limit {self.limit} -> {new_limit} "
+                      f"(p95 {p95 * 1000:.0f}ms{', overloaded' if self._overloaded else ''})")
+            self.limit = new_limit
+        elif self.limit < self.max_limit:
+            self.limit += 1
+            self.stats["increases"] += 1
+            self.stats["peak_limit"] = max(self.stats["peak_limit"], self.limit)
+        self._latencies.clear()
+        self._overloaded = False
+
+    def reconfigure(self, max_limit, target_p95):
+        """Apply new limits in place (live slots are kept); True when anything changed"""
+        with self._cond:
+            if (max_limit, target_p95) == (self.max_limit, self.target_p95):
+                return False
+            self.max_limit = max_limit
+            self.target_p95 = target_p95
+            self.limit = max(self.min_limit, min(self.limit, max_limit))
+            self._cond.notify_all()
+            return True
+
+    def metrics(self):
+        """Live limit, in-flight count and adjustment counters"""
+        with self._cond:
+            return {"limit": self.limit, "in_flight": self.in_flight, **self.stats}
+
+    def report(self):
+        """Print the current and peak write limits"""
+        metrics = self.metrics()
+        print(f"Host Hub write limit: {metrics['limit']} (peak {metrics['peak_limit']}, "
+              f"+{metrics['increases']}/-{metrics['decreases']}, last p95 {metrics['last_p95'] * 1000:.0f}ms)")
+
+class _Outcome:
+    """Per-request flag the caller sets when Host Hub signalled overload"""
+
+    __slots__ = ("overloaded",)
+
+    def __init__(self):
+        self.overloaded = False
@@ -0,0 +1,40 @@
+# Benchmark: Tripleseat -> Host Hub conversion throughput, inline vs. process pool
+# Usage: python server/services/benchmarks/bench_conversion.py [event_count]
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bulk_sync import convert_events_parallel
+from tripleseatv4 import TripleseatHostHubIntegration
+from corpus import make_events
+
+def run_inline(events, converter):
+    """Convert and validate on the current process only (the same map_event the pool workers run)"""
+    return sum(1 for event in events if converter.map_event(event)[0])
+
+def run_pool(events, facility_ids, workers):
+    """Convert on a process pool"""
+    return sum(1 for _, converted, _ in convert_events_parallel(events, facility_ids, workers) if converted)
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    events = list(make_events(count))
+    converter = TripleseatHostHubIntegration(authenticate=False, verbose=False)
+
+    started = time.perf_counter()
+    run_inline(events, converter)
+    baseline = time.perf_counter() - started
+    print(f"inline      : {baseline:6.2f}s  {count / baseline:9.0f} events/s")
+
+    workers = 1
+    while workers <= (os.cpu_count() or 1):
+        started = time.perf_counter()
+        run_pool(events, converter.facility_ids, workers)
+        elapsed = time.perf_counter() - started
+        print(f"{workers:2d} processes: {elapsed:6.2f}s  {count / elapsed:9.0f} events/s  x{baseline / elapsed:.2f}")
+        workers *= 2
+
+if __name__ == "__main__":
+    main()
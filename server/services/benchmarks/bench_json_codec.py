@@ -0,0 +1,35 @@
+# Benchmark: encode/decode throughput of each installed JSON backend on Tripleseat-shaped payloads
+# Usage: python server/services/benchmarks/bench_json_codec.py [event_count]
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import json_codec
+from corpus import make_events
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    # Responses arrive wrapped as {"event": {...}}, like /v1/events/:id.json
+    payloads = [{"event": event} for event in make_events(count)]
+    encoded = [json_codec.available_backends()["json"][0](payload) for payload in payloads]
+    total_bytes = sum(len(body) for body in encoded)
+    print(f"corpus: {count} events, {total_bytes / count:.0f} bytes/event  (active backend: {json_codec.BACKEND})")
+
+    for name, (dumps, _, loads) in json_codec.available_backends().items():
+        started = time.perf_counter()
+        for payload in payloads:
+            dumps(payload)
+        encode_time = time.perf_counter() - started
+
+        started = time.perf_counter()
+        for body in encoded:
+            loads(body)
+        decode_time = time.perf_counter() - started
+
+        print(f"{name:<8} encode: {total_bytes / encode_time / 1e6:7.1f} MB/s   "
+              f"decode: {total_bytes / decode_time / 1e6:7.1f} MB/s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+# Benchmark: webhook-burst handling with the mapped-event cache (fresh hits, same-content re-fetches, cold mapping)
+# Usage: python server/services/benchmarks/bench_mapped_cache.py [event_count] [triggers_per_event]
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tripleseatv4 import TripleseatHostHubIntegration
+from mapped_cache import MappedEventCache
+from corpus import make_events
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    triggers = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    integration = TripleseatHostHubIntegration(authenticate=False, verbose=False)
+    events = list(make_events(count))
+
+    started = time.perf_counter()
+    for event in events:
+        integration.map_event(event)
+    cold_time = time.perf_counter() - started
+
+    # Large enough for the whole corpus, so this measures lookups rather than eviction
+    integration.mapped_cache = MappedEventCache(max_bytes=1024 ** 3, ttl=60)
+    for event in events:
+        integration.map_event(event)
+
+    # Burst within the TTL: no fetch and no mapping at all
+    started = time.perf_counter()
+    for _ in range(triggers):
+        for event in events:
+            integration.mapped_cache.fresh(event["id"])
+    fresh_time = time.perf_counter() - started
+
+    # After the TTL: the event is re-fetched but only hashed, not re-mapped
+    started = time.perf_counter()
+    for event in events:
+        integration.map_event(event)
+    revalidate_time = time.perf_counter() - started
+
+    lookups = count * triggers
+    print(f"events            : {count} x {triggers} triggers")
+    print(f"map (no cache)    : {count / cold_time:10.0f} events/s")
+    print(f"fresh hit         : {lookups / fresh_time:10.0f} lookups/s")
+    print(f"same-content hash : {count / revalidate_time:10.0f} events/s")
+    integration.mapped_cache.report()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+# Benchmark: per-event memory of raw payloads vs. mapped dicts vs. EventRecords
+# Usage: python server/services/benchmarks/bench_record_memory.py [event_count]
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tripleseatv4 import TripleseatHostHubIntegration
+from corpus import make_events
+
+def measure(build):
+    """Bytes allocated (and still held) by the object `build` returns"""
+    tracemalloc.start()
+    held = build()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del held
+    return size
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    converter = TripleseatHostHubIntegration(authenticate=False, verbose=False)
+
+    results = {
+        "raw payload + mapped dict": measure(
+            lambda: [(event, converter.convert_to_host_hub_format(event)) for event in make_events(count)]
+        ),
+        "mapped dict": measure(lambda: [converter.convert_to_host_hub_format(event) for event in make_events(count)]),
+        "EventRecord": measure(lambda: [converter.convert_to_record(event) for event in make_events(count)]),
+    }
+
+    baseline = results["raw payload + mapped dict"]
+    for name, size in results.items():
+        print(f"{name:<26}: {size / count:8.0f} bytes/event  ({size / baseline:.0%} of baseline)")
+
+if __name__ == "__main__":
+    main()
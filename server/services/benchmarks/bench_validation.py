@@ -0,0 +1,51 @@
+# Benchmark: pre-flight schema validation throughput (raw input + mapped payload) on Tripleseat-shaped events
+# Usage: python server/services/benchmarks/bench_validation.py [event_count]
+import os
+import sys
+import time
+import random
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tripleseatv4 import TripleseatHostHubIntegration
+from event_schema import EventValidator
+from corpus import make_events
+
+def corrupt(events, rate=0.01, seed=7):
+    """Break ~rate of the events the ways real payloads break: bad times, missing dates, unknown venues"""
+    rng = random.Random(seed)
+    for event in events:
+        if rng.random() < rate:
+            problem = rng.randrange(3)
+            if problem == 0:
+                event["event_start_time"] = "25:00 PM"
+            elif problem == 1:
+                event.pop("event_date")
+            else:
+                event["location"] = {"id": 9, "name": "Wonderfly Arena Towson"}
+        yield event
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    converter = TripleseatHostHubIntegration(authenticate=False, verbose=False)
+    validator = EventValidator.create(converter.facility_ids)
+    if validator is None:
+        sys.exit(1)
+
+    events = list(corrupt(make_events(count)))
+    started = time.perf_counter()
+    mapped = [converter.convert_to_record(event) for event in events]
+    convert_time = time.perf_counter() - started
+    payloads = [record.to_host_hub() if record else None for record in mapped]
+
+    started = time.perf_counter()
+    invalid = sum(1 for event, payload in zip(events, payloads) if validator.validate(event, payload))
+    validate_time = time.perf_counter() - started
+
+    print(f"events      : {count} ({invalid} invalid, {invalid / count:.1%})")
+    print(f"conversion  : {convert_time:6.2f}s  {count / convert_time:9.0f} events/s")
+    print(f"validation  : {validate_time:6.2f}s  {count / validate_time:9.0f} events/s  "
+          f"(+{validate_time / convert_time:.0%} on top of conversion)")
+
+if __name__ == "__main__":
+    main()
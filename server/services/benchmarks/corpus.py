@@ -0,0 +1,46 @@
+# Synthetic Tripleseat event payloads shaped like real /v1/events/:id.json responses
+import random
+
+LOCATIONS = ["Wonderfly Arena Timonium", "Wonderfly Arena Arbutus"]
+STATUSES = ["DEFINITE", "TENTATIVE", "PROSPECT", "CLOSED", "LOST"]
+TIMES = ["9:00 AM", "10:00 AM", "11:30 AM", "12:00 PM", "1:30 PM", "4:00 PM", "6:00 PM", "8:30 PM"]
+
+def make_event(event_id, rng):
+    """Build one raw Tripleseat event dict"""
+    start = rng.randrange(len(TIMES) - 1)
+    month, day, year = rng.randint(1, 12), rng.randint(1, 28), rng.choice([2024, 2025, 2026])
+    paragraphs = rng.randint(1, 12)
+    return {
+        "id": event_id,
+        "name": f"Birthday Party #{event_id}",
+        "event_date": f"{month}/{day}/{year}",
+        "event_start_time": TIMES[start],
+        "event_end_time": TIMES[rng.randrange(start + 1, len(TIMES))],
+        "status": rng.choice(STATUSES),
+        "description": "\n".join(
+            "Guests arrive at the front desk, waivers signed online; pizza and cake in party room. " * 4
+            for _ in range(paragraphs)
+        ),
+        "guest_count": rng.randint(8, 120),
+        "location": {"id": rng.randint(1, 5), "name": rng.choice(LOCATIONS)},
+        "rooms": [{"id": rng.randint(100, 999), "name": f"Party Room {n}"} for n in range(rng.randint(1, 3))],
+        "account": {"id": rng.randint(10000, 99999), "name": f"Account {event_id}"},
+        "contact": {
+            "id": rng.randint(10000, 99999),
+            "first_name": "Jordan",
+            "last_name": "Smith",
+            "email_addresses": [{"address": f"guest{event_id}@example.com"}],
+            "phone_numbers": [{"number": "410-555-0100"}],
+        },
+        "event_style": "Birthday Party",
+        "created_at": f"{year}-{month:02d}-{day:02d}T12:00:00-05:00",
+        "updated_at": f"{year}-{month:02d}-{day:02d}T15:30:00-05:00",
+        "documents": [{"id": rng.randint(1, 10**6), "name": "BEO", "url": "https://example.com/beo.pdf"}],
+        "custom_fields": [{"name": f"field_{n}", "value": str(rng.random())} for n in range(10)],
+    }
+
+def make_events(count, seed=42, start_id=47000000):
+    """Yield `count` deterministic synthetic events"""
+    rng = random.Random(seed)
+    for offset in range(count):
+        yield make_event(start_id + offset, rng)
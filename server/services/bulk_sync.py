@@ -0,0 +1,408 @@
+# Bulk Tripleseat -> Host Hub sync for large backfills.
+# CPU-bound conversion (the tripleseatv4 mapping) can fan out to a process pool; fetches and
+# writes stay on I/O worker threads. create_event.py's single-file conversion remains serial.
+import os
+import sys
+import time
+import argparse
+import threading
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from itertools import islice
+
+from tripleseatv4 import TripleseatHostHubIntegration
+from event_diff import diff_fields, shorten
+from sync_scheduler import DeadlineScheduler, event_start_timestamp
+from run_lock import run_exclusive, run_every
+from sharded_listing import ShardedListing
+
+# Converter instance owned by each process-pool worker (set by _init_conversion_worker)
+_worker_converter = None
+
+def _init_conversion_worker(facility_ids):
+    """Build an offline converter once per worker process"""
+    global _worker_converter
+    _worker_converter = TripleseatHostHubIntegration(
+        authenticate=False, facility_ids=facility_ids, verbose=False
+    )
+
+def _convert_chunk(events):
+    """Convert one chunk of raw Tripleseat events inside a worker process"""
+    return [(event.get('id'), *_worker_converter.map_event(event)) for event in events]
+
+def chunked(iterable, size):
+    """Yield lists of up to `size` items without materializing the input"""
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+def ordered_map(executor, func, iterable, window):
+    """Like executor.map, but keeps at most `window` tasks in flight and yields results in input order"""
+    pending = deque()
+    for item in iterable:
+        pending.append(executor.submit(func, item))
+        if len(pending) >= window:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+def convert_events_parallel(events, facility_ids, workers=None, chunk_size=200):
+    """Convert and validate raw Tripleseat events on a process pool, yielding (tripleseat_id, EventRecord, problems) in input order"""
+    workers = workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_init_conversion_worker,
+        initargs=(facility_ids,)
+    ) as pool:
+        for results in ordered_map(pool, _convert_chunk, chunked(events, chunk_size), workers * 2):
+            yield from results
+
+class BulkSync:
+    """Streams Tripleseat events through fetch -> convert -> Host Hub upsert stages"""
+
+    def __init__(self, integration, process_workers=0, io_workers=8, chunk_size=200,
+                 shard_concurrency=0, shard_days=30):
+        self.integration = integration
+        self.process_workers = process_workers
+        self.io_workers = io_workers
+        self.chunk_size = chunk_size
+        # Date shards listed concurrently for windowed listings (0 = one sequential walk)
+        self.shard_concurrency = shard_concurrency
+        self.shard_days = shard_days
+        # The sharded listing being synced, told as each of its events is done so it can checkpoint
+        self.sharded_listing = None
+        self.stats = {"fetched": 0, "converted": 0, "invalid": 0, "written": 0, "failed": 0}
+        self._stats_lock = threading.Lock()
+
+    def fetch(self, event_ids, io_pool):
+        """Fetch raw events on I/O workers, in order, skipping failures"""
+        for event in ordered_map(io_pool, self.integration.get_tripleseat_event, event_ids, self.io_workers * 2):
+            if event:
+                self.stats["fetched"] += 1
+                yield event
+            else:
+                self.stats["failed"] += 1
+
+    def convert(self, events):
+        """Convert raw events to EventRecords, on a process pool when process_workers > 0
+        
+        Raw payloads are released as soon as they are mapped; only compact records
+        travel on to the write stage.
+        """
+        if self.process_workers:
+            converted = convert_events_parallel(
+                events, self.integration.facility_ids, self.process_workers, self.chunk_size
+            )
+        else:
+            converted = ((event.get('id'), *self.integration.map_event(event)) for event in events)
+
+        for tripleseat_id, record, errors in converted:
+            if record:
+                self.stats["converted"] += 1
+                yield record
+            else:
+                # Invalid events never reach Host Hub; they go straight to the dead-letter queue
+                self.integration.dead_letter(tripleseat_id, errors)
+                self._count("invalid")
+                self._confirm(tripleseat_id)
+
+    def _confirm(self, tripleseat_id):
+        """Tell the sharded listing (if any) that an event has been dealt with"""
+        if self.sharded_listing:
+            self.sharded_listing.confirm(tripleseat_id)
+
+    def _resolve_batch(self, batch):
+        """Pre-resolve a batch of records against Host Hub in one request"""
+        resolved = self.integration.resolve_host_hub_events([record.tripleseat_id for record in batch])
+        if resolved is None:
+            # Lookup is an optimisation only; the upsert is still correct without it
+            resolved = {}
+        return batch, resolved
+
+    def write(self, records, io_pool, batch_size=500):
+        """Create/update records in Host Hub, as many at once as the adaptive write limit allows
+        
+        Each batch is pre-resolved with one bulk lookup (the next batch's lookup overlaps
+        the current batch's writes), and events Host Hub already holds unchanged are skipped.
+        """
+        self.stats.setdefault("unchanged", 0)
+        limiter = self.integration.write_limiter
+        batches = ordered_map(io_pool, self._resolve_batch, chunked(records, batch_size), 2)
+        with ThreadPoolExecutor(max_workers=limiter.max_limit) as write_pool:
+            self._write_batches(batches, write_pool, limiter)
+
+    def _write_batches(self, batches, write_pool, limiter):
+        """Skip unchanged events and upsert the rest of each resolved batch"""
+        for batch, resolved in batches:
+            pending = []
+            for record in batch:
+                # Serialize to the Host Hub JSON shape only at send time
+                event = record.to_host_hub()
+                if self.integration.is_unchanged_in_host_hub(event, resolved):
+                    self.stats["unchanged"] += 1
+                    self._confirm(record.tripleseat_id)
+                else:
+                    pending.append((event, record.sync_meta()))
+
+            # Host Hub writes get their own pool sized to the limiter's ceiling; the AIMD limiter
+            # inside create_event_in_host_hub decides how many of those threads write at once
+            results = ordered_map(write_pool, self._upsert, pending, limiter.max_limit * 2)
+            for (event, _), success in zip(pending, results):
+                if success:
+                    self.stats["written"] += 1
+                else:
+                    self.stats["failed"] += 1
+                # Only now is the event's listing page safe to checkpoint
+                self._confirm(event["tripleseatEventId"])
+
+    def _upsert(self, pending):
+        """Upsert one (Host Hub event, sync freshness metadata) pair"""
+        event, sync_meta = pending
+        return self.integration.upsert_event(event, changed=False, sync_meta=sync_meta)
+
+    def _with_current(self, batch):
+        """Pair a batch of records with their current Host Hub documents"""
+        current = self.integration.get_host_hub_events_by_tripleseat_ids(
+            [record.tripleseat_id for record in batch]
+        )
+        if current is None:
+            raise RuntimeError("Failed to read current Host Hub events; dry run aborted")
+        return batch, current
+
+    def diff(self, records, io_pool, batch_size=500):
+        """Dry run: print field-level changes against Host Hub without writing anything"""
+        self.stats.update({"new": 0, "changed": 0, "unchanged": 0})
+        field_counts = Counter()
+
+        batches = chunked(records, batch_size)
+        for batch, current in ordered_map(io_pool, self._with_current, batches, self.io_workers):
+            for record in batch:
+                event = record.to_host_hub()
+                tripleseat_id = event["tripleseatEventId"]
+                existing = current.get(tripleseat_id)
+                changes = diff_fields(event, existing)
+
+                if existing is None:
+                    self.stats["new"] += 1
+                    print(f"+ {tripleseat_id} {event.get('name')} (new event)")
+                elif changes:
+                    self.stats["changed"] += 1
+                    print(f"~ {tripleseat_id} {event.get('name')} (Host Hub ID: {existing.get('_id')})")
+                    for field, (old_value, new_value) in changes.items():
+                        field_counts[field] += 1
+                        print(f"    {field}: {shorten(old_value)} -> {shorten(new_value)}")
+                else:
+                    self.stats["unchanged"] += 1
+
+        print("\n=== DRY RUN SUMMARY (nothing was written) ===")
+        print(f"new: {self.stats['new']}  changed: {self.stats['changed']}  unchanged: {self.stats['unchanged']}")
+        for field, count in field_counts.most_common():
+            print(f"  {field}: {count} events would change")
+
+    def _sink(self, records, io_pool, dry_run):
+        """Final stage: write to Host Hub, or only diff in dry-run mode"""
+        if dry_run:
+            self.diff(records, io_pool)
+        else:
+            self.write(records, io_pool)
+
+    def run_events(self, events, dry_run=False):
+        """Convert and write (or diff) already-fetched raw Tripleseat events"""
+        if dry_run:
+            # Nothing is written, so no listing page may be checkpointed
+            self.sharded_listing = None
+        with ThreadPoolExecutor(max_workers=self.io_workers) as io_pool:
+            self._sink(self.convert(events), io_pool, dry_run)
+        return self.stats
+
+    def run(self, event_ids, dry_run=False):
+        """Fetch, convert and write (or diff) the given Tripleseat event IDs"""
+        if not self.integration.refresh_tokens_if_needed():
+            print("Failed to obtain required authentication tokens")
+            return self.stats
+
+        with ThreadPoolExecutor(max_workers=self.io_workers) as io_pool:
+            self._sink(self.convert(self.fetch(event_ids, io_pool)), io_pool, dry_run)
+        return self.stats
+
+    def _count(self, key, amount=1):
+        """Thread-safe stats increment for stages run on worker threads"""
+        with self._stats_lock:
+            self.stats[key] = self.stats.get(key, 0) + amount
+
+    def sync_item(self, item):
+        """Sync one scheduled event, using its queued payload when present instead of re-fetching"""
+        record = item.payload
+        if record is None:
+            return self.integration.sync_event(item.event_id, changed=True)
+        if isinstance(record, dict):
+            record, errors = self.integration.map_event(record)
+            if errors:
+                self.integration.dead_letter(item.event_id, errors)
+                return False
+        return self.integration.upsert_event(record.to_host_hub(), changed=False, sync_meta=record.sync_meta())
+
+    def _scheduled_worker(self, scheduler):
+        """Keep taking the most urgent pending sync until the scheduler is closed and drained"""
+        while True:
+            item = scheduler.pop()
+            if item is None:
+                return
+            try:
+                success = self.sync_item(item)
+            except Exception as e:
+                print(f"Error syncing Tripleseat event {item.event_id}: {str(e)}")
+                success = False
+            scheduler.complete(item)
+            self._count("written" if success else "failed")
+            self._confirm(item.event_id)
+
+    def run_scheduled(self, scheduler, events=None):
+        """Sync through a DeadlineScheduler with io_workers threads, most urgent events first
+        
+        Raw events fed in while workers run are queued by start time, so imminent events
+        preempt whatever long-tail work is still pending.
+        """
+        if not self.integration.refresh_tokens_if_needed():
+            print("Failed to obtain required authentication tokens")
+            return self.stats
+
+        workers = [threading.Thread(target=self._scheduled_worker, args=(scheduler,), daemon=True)
+                   for _ in range(self.io_workers)]
+        for worker in workers:
+            worker.start()
+
+        if events is not None:
+            for event in events:
+                # Queue the compact record; the raw payload is only needed for the start time
+                record, errors = self.integration.map_event(event)
+                if record:
+                    scheduler.submit(record.tripleseat_id, event_start_timestamp(event), record)
+                else:
+                    self.integration.dead_letter(event.get('id'), errors)
+                    self._count("invalid")
+                    self._confirm(event.get('id'))
+            scheduler.close()
+
+        for worker in workers:
+            worker.join()
+        return self.stats
+
+    def listing(self, start_date=None, end_date=None):
+        """Stream raw events from the paginated Tripleseat listing (date-sharded when configured)"""
+        if self.shard_concurrency and start_date and end_date:
+            self.sharded_listing = ShardedListing(self.integration, self.shard_days, self.shard_concurrency)
+            events = self.sharded_listing.iter_events(start_date, end_date)
+        else:
+            events = self.integration.iter_tripleseat_events(start_date, end_date)
+        return self._counted(events)
+
+    def _counted(self, events):
+        """Pass events through, counting them as fetched"""
+        for event in events:
+            self.stats["fetched"] += 1
+            yield event
+
+    def run_listing(self, start_date=None, end_date=None, dry_run=False):
+        """Sync every Tripleseat event in a date window as one streaming pipeline
+        
+        Each stage pulls from the previous one through a bounded window, so a slow
+        Host Hub stalls conversion, which stalls page fetching (backpressure).
+        """
+        if not self.integration.refresh_tokens_if_needed():
+            print("Failed to obtain required authentication tokens")
+            return self.stats
+
+        return self.run_events(self.listing(start_date, end_date), dry_run)
+
+def _read_event_ids(args):
+    """Collect event IDs from the command line and/or an IDs file (one per line)"""
+    event_ids = list(args.event_ids)
+    if args.ids_file:
+        with open(args.ids_file, "r") as f:
+            event_ids.extend(line.strip() for line in f if line.strip())
+    return event_ids
+
+def main():
+    """Command line entry point for bulk syncs"""
+    parser = argparse.ArgumentParser(description="Bulk sync Tripleseat events into Host Hub")
+    parser.add_argument("event_ids", nargs="*", help="Tripleseat event IDs")
+    parser.add_argument("--ids-file", help="File with one Tripleseat event ID per line")
+    parser.add_argument("--start-date", help="Sync every listed event from this date (MM/DD/YYYY)")
+    parser.add_argument("--end-date", help="Sync every listed event up to this date (MM/DD/YYYY)")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="Only print field-level changes against Host Hub; write nothing")
+    parser.add_argument("--prioritize", action="store_true",
+                        help="With a date window: sync events starting soonest first (SLA tiers)")
+    parser.add_argument("--process-workers", type=int, default=0,
+                        help="Convert on a process pool with this many workers (0 = inline)")
+    parser.add_argument("--io-workers", type=int, default=8, help="Concurrent Tripleseat/Host Hub requests")
+    parser.add_argument("--chunk-size", type=int, default=200, help="Events per process-pool task")
+    parser.add_argument("--shard-concurrency", type=int, default=0,
+                        help="With a date window: list this many date shards concurrently (resumable)")
+    parser.add_argument("--shard-days", type=int, default=30, help="Days per listing shard")
+    parser.add_argument("--lock-name", default="tripleseat-sync", help="Run lock shared by overlapping runs")
+    parser.add_argument("--on-busy", choices=["exit", "follow-up"], default="exit",
+                        help="When another run holds the lock: exit, or have it run once more afterwards")
+    parser.add_argument("--no-lock", action="store_true", help="Run without the run lock")
+    parser.add_argument("--every", type=float, default=0,
+                        help="Stay resident and run every this many seconds (replaces cron)")
+    parser.add_argument("--jitter", type=float, default=0, help="Randomize --every by up to this many seconds")
+    args = parser.parse_args()
+
+    event_ids = _read_event_ids(args)
+    use_listing = bool(args.start_date or args.end_date)
+    if not event_ids and not use_listing:
+        parser.error("no event IDs or date window given")
+    if args.prioritize and (args.dry_run or not use_listing):
+        parser.error("--prioritize needs a date window and cannot be combined with --dry-run")
+
+    integration = TripleseatHostHubIntegration(verbose=False)
+
+    def job():
+        sync = BulkSync(integration, args.process_workers, args.io_workers, args.chunk_size,
+                        args.shard_concurrency, args.shard_days)
+        started = time.perf_counter()
+        if use_listing and args.prioritize:
+            scheduler = DeadlineScheduler()
+            stats = sync.run_scheduled(scheduler, sync.listing(args.start_date, args.end_date))
+            scheduler.report()
+        elif use_listing:
+            stats = sync.run_listing(args.start_date, args.end_date, args.dry_run)
+        else:
+            stats = sync.run(event_ids, args.dry_run)
+        elapsed = time.perf_counter() - started
+
+        print(f"\n=== BULK SYNC FINISHED in {elapsed:.1f}s ===")
+        for key, value in stats.items():
+            print(f"{key}: {value}")
+        if integration.response_cache:
+            integration.response_cache.report()
+        integration.single_flight.report()
+        if integration.mapped_cache:
+            integration.mapped_cache.report()
+        if integration.dead_letters:
+            integration.dead_letters.report()
+        integration.health.report()
+        integration.write_limiter.report()
+        integration.retry_policy.report()
+        return stats
+
+    def locked_job():
+        # Dry runs write nothing, so they never take (or wait on) the run lock
+        if args.dry_run or args.no_lock:
+            return job()
+        return run_exclusive(job, args.lock_name, args.on_busy)
+
+    if args.every:
+        run_every(locked_job, args.every, args.jitter)
+        sys.exit(0)
+
+    stats = locked_job()
+    sys.exit(0 if stats is None or stats["failed"] + stats["invalid"] == 0 else 1)
+
+if __name__ == "__main__":
+    main()
@@ -27,8 +27,9 @@ print("[ENV DEBUG] .env in parent directory exists:", os.path.exists("../.env"))
 # Host Hub settings
 host_hub_port = os.getenv("PORT", "5002")
 host_hub_api_url = f"http://localhost:{host_hub_port}/api"
+service_key = os.getenv("HOST_HUB_SERVICE_KEY")
 admin_username = os.getenv("HOST_HUB_ADMIN_USERNAME", "admin")
-admin_password = os.getenv("HOST_HUB_ADMIN_PASSWORD", "admin123")
+admin_password = os.getenv("HOST_HUB_ADMIN_PASSWORD")
 
 # Hardcoded facility IDs based on name
 facility_ids = {
@@ -305,6 +306,156 @@ def extract_event_data(event_id):
         traceback.print_exc()
         return False
 
+def convert_event_data(event_data):
+    """Convert facility name, date and times to Host Hub values (no network calls, safe for process pools)"""
+    # Convert facility name to ObjectId
+    facility_name = event_data.get("facility")
+    if facility_name in facility_ids:
+        event_data["facility"] = facility_ids[facility_name]
+        print(f"[DEBUG] Mapped facility name '{facility_name}' to ID: {event_data['facility']}")
+    else:
+        print(f"WARNING: Unknown facility name: {facility_name}")
+        # Default to first facility
+        event_data["facility"] = next(iter(facility_ids.values()))
+        print(f"[DEBUG] Using default facility ID: {event_data['facility']}")
+    
+    # Store original date and time values for debugging
+    original_date = event_data.get("date", "")
+    original_start_time = event_data.get("startTime", "")
+    original_end_time = event_data.get("endTime", "")
+    
+    print(f"[DEBUG] Before conversion - date: {original_date}")
+    print(f"[DEBUG] Before conversion - startTime: {original_start_time}")
+    print(f"[DEBUG] Before conversion - endTime: {original_end_time}")
+    
+    # Handle date format conversion
+    # Convert MM/DD/YYYY to ISO date format
+    if "/" in event_data["date"]:
+        try:
+            date_parts = event_data["date"].split("/")
+            print(f"[DEBUG] Date parts: {date_parts}")
+            month, day, year = int(date_parts[0]), int(date_parts[1]), int(date_parts[2])
+            print(f"[DEBUG] Parsed month={month}, day={day}, year={year}")
+            
+            # Store the date parts for later use with time conversion
+            date_parts_for_time = (year, month, day)
+            print(f"[DEBUG] Stored date parts: {date_parts_for_time}")
+            
+            # IMPORTANT FIX: For the date field, we need to use noon UTC to ensure
+            # it maps to the correct day in Eastern Time
+            event_data["date"] = f"{year}-{month:02d}-{day:02d}T12:00:00.000Z"
+            print(f"[DEBUG] Fixed date value: {event_data['date']}")
+        except Exception as e:
+            print(f"[DEBUG] Error converting date: {str(e)}")
+            import traceback
+            traceback.print_exc()
+    
+    # Handle time format conversion
+    # Convert "10:00 AM" and "11:30 AM" to full ISO datetime
+    try:
+        # Get date string for time conversion (e.g., "2025-03-13")
+        date_str = event_data["date"].split("T")[0]
+        print(f"[DEBUG] Using date string for time conversion: {date_str}")
+        
+        # Convert start time if present
+        if "startTime" in event_data:
+            start_time = event_data["startTime"]
+            print(f"[DEBUG] Processing start time: {start_time}")
+            
+            # Parse AM/PM time
+            is_pm = "PM" in start_time.upper()
+            print(f"[DEBUG] Is PM? {is_pm}")
+            
+            time_parts = start_time.upper().replace("AM", "").replace("PM", "").strip().split(":")
+            print(f"[DEBUG] Time parts: {time_parts}")
+            
+            hours = int(time_parts[0])
+            minutes = int(time_parts[1]) if len(time_parts) > 1 else 0
+            print(f"[DEBUG] Parsed hours={hours}, minutes={minutes}")
+            
+            # Adjust for PM
+            original_hours = hours
+            if is_pm and hours < 12:
+                hours += 12
+            elif not is_pm and hours == 12:
+                hours = 0
+            print(f"[DEBUG] After AM/PM adjustment: hours={hours} (was {original_hours})")
+            
+            # Create datetime object in Eastern Time
+            eastern = pytz.timezone('US/Eastern')
+            year, month, day = date_parts_for_time
+            print(f"[DEBUG] Using stored date parts: year={year}, month={month}, day={day}")
+            
+            # Create a datetime in Eastern Time
+            naive_dt = datetime(year, month, day, hours, minutes, 0)
+            print(f"[DEBUG] Naive datetime: {naive_dt}")
+            dt_eastern = eastern.localize(naive_dt)
+            print(f"[DEBUG] Eastern time datetime: {dt_eastern}")
+            
+            # Convert to UTC
+            dt_utc = dt_eastern.astimezone(pytz.UTC)
+            print(f"[DEBUG] UTC time datetime: {dt_utc}")
+            
+            # Format as ISO string
+            start_datetime = dt_utc.strftime('%Y-%m-%dT%H:%M:%S.000Z')
+            event_data["startTime"] = start_datetime
+            print(f"[DEBUG] Converted startTime: {event_data['startTime']}")
+            print(f"[DEBUG] Would display in EST as: {dt_eastern.strftime('%m/%d/%Y %I:%M %p')}")
+        
+        # Convert end time
+        if "endTime" in event_data:
+            end_time = event_data["endTime"]
+            print(f"[DEBUG] Processing end time: {end_time}")
+            
+            # Parse AM/PM time
+            is_pm = "PM" in end_time.upper()
+            print(f"[DEBUG] Is PM? {is_pm}")
+            
+            time_parts = end_time.upper().replace("AM", "").replace("PM", "").strip().split(":")
+            print(f"[DEBUG] Time parts: {time_parts}")
+            
+            hours = int(time_parts[0])
+            minutes = int(time_parts[1]) if len(time_parts) > 1 else 0
+            print(f"[DEBUG] Parsed hours={hours}, minutes={minutes}")
+            
+            # Adjust for PM
+            original_hours = hours
+            if is_pm and hours < 12:
+                hours += 12
+            elif not is_pm and hours == 12:
+                hours = 0
+            print(f"[DEBUG] After AM/PM adjustment: hours={hours} (was {original_hours})")
+            
+            # Create datetime object in Eastern Time
+            eastern = pytz.timezone('US/Eastern')
+            year, month, day = date_parts_for_time
+            print(f"[DEBUG] Using stored date parts: year={year}, month={month}, day={day}")
+            
+            # Create a datetime in Eastern Time
+            naive_dt = datetime(year, month, day, hours, minutes, 0)
+            print(f"[DEBUG] Naive datetime: {naive_dt}")
+            dt_eastern = eastern.localize(naive_dt)
+            print(f"[DEBUG] Eastern time datetime: {dt_eastern}")
+            
+            # Convert to UTC
+            dt_utc = dt_eastern.astimezone(pytz.UTC)
+            print(f"[DEBUG] UTC time datetime: {dt_utc}")
+            
+            # Format as ISO string
+            end_datetime = dt_utc.strftime('%Y-%m-%dT%H:%M:%S.000Z')
+            event_data["endTime"] = end_datetime
+            print(f"[DEBUG] Converted endTime: {event_data['endTime']}")
+            print(f"[DEBUG] Would display in EST as: {dt_eastern.strftime('%m/%d/%Y %I:%M %p')}")
+    except Exception as e:
+        print(f"[DEBUG] Error converting times: {str(e)}")
+        import traceback
+        traceback.print_exc()
+    
+    print("[DEBUG] After all conversions, event data:")
+    print(json.dumps(event_data, indent=2))
+    
+    return event_data
+
 def create_event_from_file(json_file):
     """Create event in Host Hub from JSON file"""
     print(f"\n=== CREATING EVENT FROM {json_file} ===\n")
@@ -317,152 +468,14 @@ def create_event_from_file(json_file):
         print("[DEBUG] Original event data from file:")
         print(json.dumps(event_data, indent=2))
         
-        # Prepare data for Host Hub
-        # Convert facility name to ObjectId
-        facility_name = event_data.get("facility")
-        if facility_name in facility_ids:
-            event_data["facility"] = facility_ids[facility_name]
-            print(f"[DEBUG] Mapped facility name '{facility_name}' to ID: {event_data['facility']}")
-        else:
-            print(f"WARNING: Unknown facility name: {facility_name}")
-            # Default to first facility
-            event_data["facility"] = next(iter(facility_ids.values()))
-            print(f"[DEBUG] Using default facility ID: {event_data['facility']}")
-        
-        # Store original date and time values for debugging
+        # Store original date and time values for the summary below
         original_date = event_data.get("date", "")
         original_start_time = event_data.get("startTime", "")
         original_end_time = event_data.get("endTime", "")
         
-        print(f"[DEBUG] Before conversion - date: {original_date}")
-        print(f"[DEBUG] Before conversion - startTime: {original_start_time}")
-        print(f"[DEBUG] Before conversion - endTime: {original_end_time}")
-        
-        # Handle date format conversion
-        # Convert MM/DD/YYYY to ISO date format
-        if "/" in event_data["date"]:
-            try:
-                date_parts = event_data["date"].split("/")
-                print(f"[DEBUG] Date parts: {date_parts}")
-                month, day, year = int(date_parts[0]), int(date_parts[1]), int(date_parts[2])
-                print(f"[DEBUG] Parsed month={month}, day={day}, year={year}")
-                
-                # Store the date parts for later use with time conversion
-                date_parts_for_time = (year, month, day)
-                print(f"[DEBUG] Stored date parts: {date_parts_for_time}")
-                
-                # IMPORTANT FIX: For the date field, we need to use noon UTC to ensure
-                # it maps to the correct day in Eastern Time
-                event_data["date"] = f"{year}-{month:02d}-{day:02d}T12:00:00.000Z"
-                print(f"[DEBUG] Fixed date value: {event_data['date']}")
-            except Exception as e:
-                print(f"[DEBUG] Error converting date: {str(e)}")
-                import traceback
-                traceback.print_exc()
-        
-        # Handle time format conversion
-        # Convert "10:00 AM" and "11:30 AM" to full ISO datetime
-        try:
-            # Get date string for time conversion (e.g., "2025-03-13")
-            date_str = event_data["date"].split("T")[0]
-            print(f"[DEBUG] Using date string for time conversion: {date_str}")
-            
-            # Convert start time if present
-            if "startTime" in event_data:
-                start_time = event_data["startTime"]
-                print(f"[DEBUG] Processing start time: {start_time}")
-                
-                # Parse AM/PM time
-                is_pm = "PM" in start_time.upper()
-                print(f"[DEBUG] Is PM? {is_pm}")
-                
-                time_parts = start_time.upper().replace("AM", "").replace("PM", "").strip().split(":")
-                print(f"[DEBUG] Time parts: {time_parts}")
-                
-                hours = int(time_parts[0])
-                minutes = int(time_parts[1]) if len(time_parts) > 1 else 0
-                print(f"[DEBUG] Parsed hours={hours}, minutes={minutes}")
-                
-                # Adjust for PM
-                original_hours = hours
-                if is_pm and hours < 12:
-                    hours += 12
-                elif not is_pm and hours == 12:
-                    hours = 0
-                print(f"[DEBUG] After AM/PM adjustment: hours={hours} (was {original_hours})")
-                
-                # Create datetime object in Eastern Time
-                eastern = pytz.timezone('US/Eastern')
-                year, month, day = date_parts_for_time
-                print(f"[DEBUG] Using stored date parts: year={year}, month={month}, day={day}")
-                
-                # Create a datetime in Eastern Time
-                naive_dt = datetime(year, month, day, hours, minutes, 0)
-                print(f"[DEBUG] Naive datetime: {naive_dt}")
-                dt_eastern = eastern.localize(naive_dt)
-                print(f"[DEBUG] Eastern time datetime: {dt_eastern}")
-                
-                # Convert to UTC
-                dt_utc = dt_eastern.astimezone(pytz.UTC)
-                print(f"[DEBUG] UTC time datetime: {dt_utc}")
-                
-                # Format as ISO string
-                start_datetime = dt_utc.strftime('%Y-%m-%dT%H:%M:%S.000Z')
-                event_data["startTime"] = start_datetime
-                print(f"[DEBUG] Converted startTime: {event_data['startTime']}")
-                print(f"[DEBUG] Would display in EST as: {dt_eastern.strftime('%m/%d/%Y %I:%M %p')}")
-            
-            # Convert end time
-            if "endTime" in event_data:
-                end_time = event_data["endTime"]
-                print(f"[DEBUG] Processing end time: {end_time}")
-                
-                # Parse AM/PM time
-                is_pm = "PM" in end_time.upper()
-                print(f"[DEBUG] Is PM? {is_pm}")
-                
-                time_parts = end_time.upper().replace("AM", "").replace("PM", "").strip().split(":")
-                print(f"[DEBUG] Time parts: {time_parts}")
-                
-                hours = int(time_parts[0])
-                minutes = int(time_parts[1]) if len(time_parts) > 1 else 0
-                print(f"[DEBUG] Parsed hours={hours}, minutes={minutes}")
-                
-                # Adjust for PM
-                original_hours = hours
-                if is_pm and hours < 12:
-                    hours += 12
-                elif not is_pm and hours == 12:
-                    hours = 0
-                print(f"[DEBUG] After AM/PM adjustment: hours={hours} (was {original_hours})")
-                
-                # Create datetime object in Eastern Time
-                eastern = pytz.timezone('US/Eastern')
-                year, month, day = date_parts_for_time
-                print(f"[DEBUG] Using stored date parts: year={year}, month={month}, day={day}")
-                
-                # Create a datetime in Eastern Time
-                naive_dt = datetime(year, month, day, hours, minutes, 0)
-                print(f"[DEBUG] Naive datetime: {naive_dt}")
-                dt_eastern = eastern.localize(naive_dt)
-                print(f"[DEBUG] Eastern time datetime: {dt_eastern}")
-                
-                # Convert to UTC
-                dt_utc = dt_eastern.astimezone(pytz.UTC)
-                print(f"[DEBUG] UTC time datetime: {dt_utc}")
-                
-                # Format as ISO string
-                end_datetime = dt_utc.strftime('%Y-%m-%dT%H:%M:%S.000Z')
-                event_data["endTime"] = end_datetime
-                print(f"[DEBUG] Converted endTime: {event_data['endTime']}")
-                print(f"[DEBUG] Would display in EST as: {dt_eastern.strftime('%m/%d/%Y %I:%M %p')}")
-        except Exception as e:
-            print(f"[DEBUG] Error converting times: {str(e)}")
-            import traceback
-            traceback.print_exc()
+        # Prepare data for Host Hub
+        event_data = convert_event_data(event_data)
         
-        print("[DEBUG] After all conversions, event data:")
-        print(json.dumps(event_data, indent=2))
         
         # Create a human-readable summary of what's being sent
         try:
@@ -491,42 +504,58 @@ def create_event_from_file(json_file):
             import traceback
             traceback.print_exc()
         
-        # Step 1: Authenticate with Host Hub
-        auth_url = f"{host_hub_api_url}/auth/admin-login"
-        auth_data = {
-            "username": admin_username,
-            "password": admin_password
-        }
-        
-        print(f"Authenticating with: {auth_url}")
-        auth_response = requests.post(auth_url, json=auth_data)
-        print(f"Auth response status: {auth_response.status_code}")
-        
-        if auth_response.status_code != 200:
-            print("Authentication failed")
-            print(auth_response.text)
+        # Step 1: Authenticate with Host Hub (the service key needs no login request)
+        if service_key:
+            auth_headers = {"X-Service-Key": service_key}
+        elif admin_password:
+            auth_url = f"{host_hub_api_url}/auth/admin-login"
+            auth_data = {
+                "username": admin_username,
+                "password": admin_password
+            }
+            
+            print(f"Authenticating with: {auth_url}")
+            auth_response = requests.post(auth_url, json=auth_data)
+            print(f"Auth response status: {auth_response.status_code}")
+            
+            if auth_response.status_code != 200:
+                print("Authentication failed")
+                print(auth_response.text)
+                return False
+            
+            # Get token
+            token = auth_response.json().get("token")
+            if not token:
+                print("No token in authentication response")
+                return False
+            
+            print("Successfully authenticated")
+            auth_headers = {"Authorization": f"Bearer {token}"}
+        else:
+            print("Set HOST_HUB_SERVICE_KEY (or HOST_HUB_ADMIN_PASSWORD) to authenticate with Host Hub")
             return False
         
-        # Get token
-        token = auth_response.json().get("token")
-        if not token:
-            print("No token in authentication response")
+        # Step 2: Create event in Host Hub. The service key only opens the Tripleseat sync routes,
+        # so with it the event is upserted by its Tripleseat ID
+        tripleseat_id = event_data.get("tripleseatEventId")
+        if service_key and not tripleseat_id:
+            print("The service key can only write events that have a tripleseatEventId")
             return False
-        
-        print("Successfully authenticated")
-        
-        # Step 2: Create event in Host Hub
-        create_url = f"{host_hub_api_url}/events"
+        if service_key:
+            method, create_url = "PUT", f"{host_hub_api_url}/events/tripleseat/{tripleseat_id}"
+        else:
+            method, create_url = "POST", f"{host_hub_api_url}/events"
         headers = {
-            "Authorization": f"Bearer {token}",
+            **auth_headers,
             "Content-Type": "application/json"
         }
         
         print(f"Creating event at: {create_url}")
-        print("Headers:", headers)
+        # Credentials are redacted so the service key never reaches the logs
+        print("Headers:", {key: "***" if key in ("Authorization", "X-Service-Key") else value for key, value in headers.items()})
         print("Event data:", json.dumps(event_data, indent=2))
         
-        create_response = requests.post(create_url, json=event_data, headers=headers)
+        create_response = requests.request(method, create_url, json=event_data, headers=headers)
         print(f"Create response status: {create_response.status_code}")
         print(f"Create response: {create_response.text}")
         
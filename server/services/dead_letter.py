@@ -0,0 +1,54 @@
+# Dead-letter queue for events the sync cannot deliver: one JSON line per event with the reason
+# and details, so they can be inspected, fixed at the source and replayed (payload archive).
+import os
+import time
+import threading
+
+import json_codec
+from tripleseat_cache import state_path
+
+class DeadLetterQueue:
+    """Append-only JSON-lines file of undeliverable events"""
+
+    def __init__(self, path):
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self.counts = {}
+
+    @classmethod
+    def from_env(cls, tenant=None):
+        return cls(state_path("SYNC_DEAD_LETTER_FILE", "dead-letter.jsonl", tenant))
+
+    def add(self, tripleseat_id, reason, errors, payload=None):
+        """Record one undeliverable event; `errors` is a list of human-readable problems"""
+        entry = {
+            "tripleseatEventId": str(tripleseat_id),
+            "reason": reason,
+            "errors": errors,
+            "payload": payload,
+            "at": time.time()
+        }
+        line = json_codec.dumps(entry) + b"\n"
+        with self._lock:
+            with open(self.path, "ab") as f:
+                f.write(line)
+            self.counts[reason] = self.counts.get(reason, 0) + 1
+        print(f"Dead-lettered Tripleseat event {tripleseat_id} ({reason}):")
+        for error in errors:
+            print(f"    {error}")
+
+    def entries(self):
+        """Yield every recorded entry, oldest first"""
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, "rb") as f:
+            for line in f:
+                if line.strip():
+                    yield json_codec.loads(line)
+
+    def report(self):
+        """Print dead-lettered counts by reason"""
+        if self.counts:
+            summary = ", ".join(f"{reason}: {count}" for reason, count in sorted(self.counts.items()))
+            print(f"Dead-lettered this run: {summary} (see {self.path})")
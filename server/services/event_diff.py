@@ -0,0 +1,36 @@
+# Field-level comparison between a mapped Tripleseat event and its Host Hub document
+from datetime import datetime, timezone
+
+# Fields the Host Hub event model stores for synced events
+SYNCED_FIELDS = ("name", "description", "date", "endTime", "status", "facility")
+
+def normalize_value(value):
+    """Canonical form for comparison: ISO datetimes in UTC millis, everything else as a string"""
+    if value is None:
+        return None
+    if isinstance(value, str) and len(value) >= 19 and value[4] == "-" and value[10] == "T":
+        try:
+            parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+            if parsed.tzinfo is None:
+                parsed = parsed.replace(tzinfo=timezone.utc)
+            return parsed.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.") + f"{parsed.microsecond // 1000:03d}Z"
+        except ValueError:
+            return value
+    return str(value)
+
+def diff_fields(desired, current, fields=SYNCED_FIELDS):
+    """Return {field: (current, desired)} for every synced field that would change"""
+    changes = {}
+    for field in fields:
+        if field not in desired:
+            continue
+        new_value = normalize_value(desired.get(field))
+        old_value = normalize_value((current or {}).get(field))
+        if new_value != old_value:
+            changes[field] = (old_value, new_value)
+    return changes
+
+def shorten(value, limit=60):
+    """Trim long values (descriptions) for one-line diff output"""
+    text = repr(value)
+    return text if len(text) <= limit else text[:limit - 3] + "..."
@@ -0,0 +1,64 @@
+# Compact record for a mapped Tripleseat event.
+# Holds only the fields we sync, with times as integer Unix timestamps; the Host Hub JSON
+# shape is produced by to_host_hub() at send time.
+import sys
+import time
+
+ISO_FORMAT = "%Y-%m-%dT%H:%M:%S.000Z"
+
+def format_timestamp(timestamp):
+    """Integer Unix timestamp -> Host Hub ISO string (UTC)"""
+    return time.strftime(ISO_FORMAT, time.gmtime(timestamp))
+
+class EventRecord:
+    """A Tripleseat event mapped for Host Hub, without the raw payload"""
+
+    # Fields synced to Host Hub (and compared by ==)
+    FIELDS = ("tripleseat_id", "name", "description", "facility", "status", "date_ts", "start_ts", "end_ts")
+    # Plus freshness metadata: when the booking last changed in Tripleseat and when the sync fetched it
+    __slots__ = FIELDS + ("source_updated_ts", "fetched_ts")
+
+    def __init__(self, tripleseat_id, name, description, facility, status, date_ts, start_ts=None, end_ts=None,
+                 source_updated_ts=None, fetched_ts=None):
+        self.tripleseat_id = int(tripleseat_id)
+        self.name = name
+        self.description = description
+        # Few distinct values across all events; interning shares one string object
+        self.facility = sys.intern(facility)
+        self.status = sys.intern(status)
+        self.date_ts = date_ts
+        self.start_ts = start_ts
+        self.end_ts = end_ts
+        self.source_updated_ts = source_updated_ts
+        self.fetched_ts = fetched_ts
+
+    def __eq__(self, other):
+        if not isinstance(other, EventRecord):
+            return NotImplemented
+        return all(getattr(self, field) == getattr(other, field) for field in self.FIELDS)
+
+    def __repr__(self):
+        return f"EventRecord({self.tripleseat_id}, {self.name!r})"
+
+    def to_host_hub(self):
+        """Serialize to the Host Hub event JSON shape (None fields omitted)"""
+        host_hub_event = {
+            "name": self.name,
+            "description": self.description,
+            "date": format_timestamp(self.date_ts) if self.date_ts is not None else None,
+            "startTime": format_timestamp(self.start_ts) if self.start_ts is not None else None,
+            "endTime": format_timestamp(self.end_ts) if self.end_ts is not None else None,
+            "status": self.status,
+            "facility": self.facility,
+            "tripleseatEventId": str(self.tripleseat_id)
+        }
+        return {k: v for k, v in host_hub_event.items() if v is not None}
+
+    def sync_meta(self):
+        """Freshness timestamps (epoch milliseconds) sent alongside the write, or None when unknown"""
+        if self.source_updated_ts is None:
+            return None
+        return {
+            "tripleseatUpdatedAt": int(self.source_updated_ts * 1000),
+            "fetchedAt": int(self.fetched_ts * 1000) if self.fetched_ts is not None else None
+        }
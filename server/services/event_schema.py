@@ -0,0 +1,132 @@
+# Pre-flight validation of Tripleseat events and their Host Hub mapping. Schemas are compiled
+# once by pydantic v2 and checked locally, so a bad date, time or facility is caught with a
+# precise error before any Host Hub request, and the event goes to the dead-letter queue.
+import re
+from datetime import datetime
+from typing import Literal, Optional
+
+try:
+    from pydantic import BaseModel, ConfigDict, Field, ValidationError, field_validator, model_validator
+except ImportError:  # validation is optional; the sync runs unvalidated without pydantic
+    BaseModel = None
+
+DATE_PATTERN = r"^(\d{1,2}/\d{1,2}/\d{4}|\d{4}-\d{2}-\d{2}(T.*)?)$"
+TIME_PATTERN = r"^\s*\d{1,2}(:[0-5]\d)?\s*[AaPp][Mm]\s*$"
+ISO_PATTERN = r"^\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}\.\d{3}Z$"
+
+if BaseModel is not None:
+    class TripleseatEventInput(BaseModel):
+        """The raw Tripleseat fields the mapping reads"""
+
+        model_config = ConfigDict(extra="ignore")
+
+        id: int
+        event_date: str = Field(pattern=DATE_PATTERN)
+        event_start_time: Optional[str] = Field(default=None, pattern=TIME_PATTERN)
+        event_end_time: Optional[str] = Field(default=None, pattern=TIME_PATTERN)
+        location: Optional[dict] = None
+
+        @field_validator("location")
+        @classmethod
+        def known_location(cls, value, info):
+            # The mapping picks a facility by keyword; any other venue would silently default
+            keywords = (info.context or {}).get("facility_keywords")
+            name = ((value or {}).get("name") or "").lower()
+            if name and keywords and not any(keyword in name for keyword in keywords):
+                raise ValueError(f"location {name!r} matches no known facility")
+            return value
+
+        @field_validator("event_date")
+        @classmethod
+        def real_date(cls, value):
+            # The pattern only checks the shape; 2/30/2025 must not roll over into March
+            try:
+                if "/" in value:
+                    datetime.strptime(value, "%m/%d/%Y")
+                else:
+                    datetime.strptime(value.split("T")[0], "%Y-%m-%d")
+            except ValueError:
+                raise ValueError(f"{value} is not a calendar date")
+            return value
+
+        @field_validator("event_start_time", "event_end_time")
+        @classmethod
+        def hour_in_range(cls, value):
+            if value is not None and not 1 <= int(re.match(r"\s*(\d+)", value).group(1)) <= 12:
+                raise ValueError("hour must be 1-12 in a 12-hour time")
+            return value
+
+    class HostHubEventPayload(BaseModel):
+        """A mapped event as Host Hub's event model will store it"""
+
+        model_config = ConfigDict(extra="forbid")
+
+        name: str = Field(min_length=1)
+        description: str = Field(min_length=1)
+        date: str = Field(pattern=ISO_PATTERN)
+        startTime: Optional[str] = Field(default=None, pattern=ISO_PATTERN)
+        endTime: Optional[str] = Field(default=None, pattern=ISO_PATTERN)
+        status: Literal["Definite", "Closed"]
+        facility: str
+        tripleseatEventId: str = Field(pattern=r"^\d+$")
+
+        @field_validator("facility")
+        @classmethod
+        def known_facility(cls, value, info):
+            facility_ids = (info.context or {}).get("facility_ids")
+            if facility_ids is not None and value not in facility_ids:
+                raise ValueError(f"unknown facility ID {value}")
+            return value
+
+        @model_validator(mode="after")
+        def ends_after_start(self):
+            # ISO strings in one format compare chronologically
+            if self.startTime and self.endTime and self.endTime <= self.startTime:
+                raise ValueError(f"endTime {self.endTime} is not after startTime {self.startTime}")
+            return self
+
+def format_errors(error, prefix=""):
+    """One 'field: message (got value)' line per pydantic error"""
+    lines = []
+    for detail in error.errors(include_url=False):
+        if detail["loc"]:
+            location = ".".join(str(part) for part in detail["loc"])
+            lines.append(f"{prefix}{location}: {detail['msg']} (got {detail.get('input')!r})")
+        else:
+            # Whole-event checks (e.g. end before start) name their fields in the message
+            lines.append(f"{prefix}event: {detail['msg']}")
+    return lines
+
+class EventValidator:
+    """Validates raw Tripleseat events and their Host Hub payloads"""
+
+    def __init__(self, facility_ids):
+        self.context = {
+            "facility_ids": set(facility_ids.values()),
+            # "Wonderfly Arena Arbutus" -> "arbutus", the keyword the mapping looks for
+            "facility_keywords": {name.split()[-1].lower() for name in facility_ids}
+        }
+
+    @classmethod
+    def create(cls, facility_ids):
+        """Build a validator, or return None when pydantic is unavailable"""
+        if BaseModel is None:
+            print("pydantic not installed; pre-flight event validation disabled")
+            return None
+        return cls(facility_ids)
+
+    def validate(self, event_data, host_hub_event):
+        """Return a list of problems with the raw event and its mapping (empty when valid)"""
+        errors = []
+        try:
+            TripleseatEventInput.model_validate(event_data, context=self.context)
+        except ValidationError as e:
+            errors.extend(format_errors(e, "tripleseat."))
+        if host_hub_event is None:
+            errors.append("mapping: conversion failed")
+            return errors
+        try:
+            HostHubEventPayload.model_validate(host_hub_event, context=self.context)
+        except ValidationError as e:
+            errors.extend(format_errors(e, "hosthub."))
+        return errors
@@ -0,0 +1,232 @@
+# Guest-traffic load generator for synced events. Every simulated guest logs in with the event's
+# access code, loads the menu, then polls, votes and orders with randomized think times, the way
+# phones at an arena night do. Reports latency percentiles and error rates per route, and can
+# step through increasing guest counts to find where Host Hub falls over.
+#
+# Usage:
+#   python guest_load.py 47545207 47545208 --guests 50,100,200,400 --duration 60
+#   python guest_load.py --from 2025-06-01 --to 2025-06-30 --guests 100
+import sys
+import time
+import random
+import asyncio
+import argparse
+
+import aiohttp
+
+import json_codec
+from tripleseatv4 import TripleseatHostHubIntegration
+
+# Relative weights of what a logged-in guest does next
+ACTIONS = (("read_polls", 6), ("vote", 2), ("order", 2))
+
+def percentile(ordered, fraction):
+    """Nearest-rank percentile of an already sorted list"""
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+class RouteStats:
+    """Latencies and outcomes for one route"""
+
+    def __init__(self):
+        self.latencies = []
+        self.client_errors = 0  # 4xx: usually expected (already voted, poll closed)
+        self.errors = 0         # 5xx, timeouts, refused connections
+
+    @property
+    def count(self):
+        return len(self.latencies)
+
+class LoadReport:
+    """Per-route results of one load level"""
+
+    def __init__(self):
+        self.routes = {}
+        # Guests whose simulation died on an unexpected response (e.g. a malformed body)
+        self.guest_errors = 0
+        self.started = time.perf_counter()
+        self.finished = None
+
+    def record(self, route, latency, status):
+        stats = self.routes.setdefault(route, RouteStats())
+        stats.latencies.append(latency)
+        if status is None or status >= 500:
+            stats.errors += 1
+        elif status >= 400:
+            stats.client_errors += 1
+
+    def error_rate(self):
+        total = sum(stats.count for stats in self.routes.values()) + self.guest_errors
+        errors = sum(stats.errors for stats in self.routes.values()) + self.guest_errors
+        return errors / total if total else 0.0
+
+    def p95(self):
+        return percentile(sorted(l for stats in self.routes.values() for l in stats.latencies), 0.95)
+
+    def print(self, guests):
+        elapsed = (self.finished or time.perf_counter()) - self.started
+        total = sum(stats.count for stats in self.routes.values())
+        print(f"\n=== {guests} GUESTS: {total} requests in {elapsed:.1f}s ({total / elapsed:.0f} req/s) ===")
+        print(f"{'route':<32}{'count':>8}{'err%':>7}{'4xx%':>7}{'p50':>8}{'p90':>8}{'p95':>8}{'p99':>8}{'max':>8}")
+        for route, stats in sorted(self.routes.items()):
+            ordered = sorted(stats.latencies)
+            row = [percentile(ordered, p) * 1000 for p in (0.5, 0.9, 0.95, 0.99)] + [ordered[-1] * 1000]
+            print(f"{route:<32}{stats.count:>8}{stats.errors / stats.count:>7.1%}"
+                  f"{stats.client_errors / stats.count:>7.1%}" + "".join(f"{ms:>6.0f}ms" for ms in row))
+        if self.guest_errors:
+            print(f"{self.guest_errors} guests stopped early on unexpected responses")
+
+class GuestSimulator:
+    """Runs simulated guests against the events of one load level"""
+
+    def __init__(self, api_url, events, think_time=5.0, timeout=10.0):
+        self.api_url = api_url
+        # Host Hub events (with _id and accessCode) to spread guests across
+        self.events = events
+        # Mean seconds between a guest's actions (exponentially distributed)
+        self.think_time = think_time
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+
+    async def _call(self, session, report, method, route, path, token=None, body=None):
+        """One timed request; returns (status, parsed body) or (None, None) on a transport error"""
+        headers = {"Content-Type": "application/json"}
+        if token:
+            headers["Authorization"] = f"Bearer {token}"
+        data = json_codec.dumps(body) if body is not None else None
+        started = time.perf_counter()
+        try:
+            async with session.request(method, f"{self.api_url}{path}", data=data, headers=headers) as response:
+                content = await response.read()
+                status = response.status
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            report.record(route, time.perf_counter() - started, None)
+            return None, None
+        report.record(route, time.perf_counter() - started, status)
+        try:
+            return status, json_codec.loads(content) if content else {}
+        except ValueError:
+            return status, {}
+
+    async def _think(self):
+        await asyncio.sleep(random.expovariate(1 / self.think_time))
+
+    async def guest(self, session, report, number, event, deadline, ramp):
+        """One guest's night; an unexpected error ends only this guest, and is counted"""
+        try:
+            await self._guest_night(session, report, number, event, deadline, ramp)
+        except Exception as e:
+            report.guest_errors += 1
+            print(f"Guest {number} stopped: {type(e).__name__}: {e}")
+
+    async def _guest_night(self, session, report, number, event, deadline, ramp):
+        """Log in, load the menu, then poll/vote/order until the deadline"""
+        await asyncio.sleep(random.uniform(0, ramp))
+        status, login = await self._call(session, report, "POST", "POST /api/auth/guest-login", "/auth/guest-login",
+                                         body={"eventCode": event["accessCode"], "name": f"load{number}"})
+        if status != 200:
+            return
+        token = login["token"]
+        event_id = event["_id"]
+
+        _, menu = await self._call(session, report, "GET", "GET /api/menu/event/:eventId",
+                                   f"/menu/event/{event_id}", token)
+        menu_items = [item for items in ((menu or {}).get("menu") or {}).values() for item in items]
+        voted = set()
+        actions = [name for name, _ in ACTIONS]
+        weights = [weight for _, weight in ACTIONS]
+
+        while time.monotonic() < deadline:
+            await self._think()
+            action = random.choices(actions, weights)[0]
+            if action == "order" and menu_items:
+                item = random.choice(menu_items)
+                await self._call(session, report, "POST", "POST /api/orders", "/orders", token, {
+                    "eventId": event_id,
+                    "items": [{"menuItemId": item["id"], "quantity": random.randint(1, 3)}],
+                    "deliveryLocation": f"Table {random.randint(1, 40)}",
+                    "customerName": f"load{number}"
+                })
+                continue
+
+            _, body = await self._call(session, report, "GET", "GET /api/polls/event/:eventId",
+                                       f"/polls/event/{event_id}", token)
+            if action != "vote":
+                continue
+            open_polls = [poll for poll in (body or {}).get("polls", [])
+                          if poll.get("isActive") and poll["_id"] not in voted and poll.get("options")]
+            if open_polls:
+                poll = random.choice(open_polls)
+                voted.add(poll["_id"])
+                await self._call(session, report, "POST", "POST /api/polls/vote", "/polls/vote", token,
+                                 {"pollId": poll["_id"], "optionIndex": random.randrange(len(poll["options"]))})
+
+    async def run(self, guests, duration, ramp):
+        """Run `guests` simulated guests spread evenly over the events; returns a LoadReport"""
+        report = LoadReport()
+        deadline = time.monotonic() + ramp + duration
+        # One connection per phone, as at a real event
+        connector = aiohttp.TCPConnector(limit=0)
+        async with aiohttp.ClientSession(connector=connector, timeout=self.timeout) as session:
+            await asyncio.gather(*(
+                self.guest(session, report, number, self.events[number % len(self.events)], deadline, ramp)
+                for number in range(guests)
+            ))
+        report.finished = time.perf_counter()
+        return report
+
+def load_events(integration, tripleseat_ids):
+    """Fetch the Host Hub documents (with access codes) of synced Tripleseat events"""
+    headers = integration._host_hub_headers()
+    events = []
+    for tripleseat_id in tripleseat_ids:
+        response = integration.session.get(f"{integration.host_hub_api_url}/events/tripleseat/{tripleseat_id}",
+                                           headers=headers, timeout=10)
+        if response.status_code != 200:
+            print(f"Skipping Tripleseat event {tripleseat_id}: not in Host Hub ({response.status_code})")
+            continue
+        event = json_codec.loads(response.content)["event"]
+        if event.get("accessCode"):
+            events.append(event)
+    return events
+
+def main():
+    """Command line entry point for guest load tests"""
+    parser = argparse.ArgumentParser(description="Simulate guest traffic against synced Host Hub events")
+    parser.add_argument("tripleseat_ids", nargs="*", help="Tripleseat IDs of synced events")
+    parser.add_argument("--from", dest="date_from", help="Use every synced event from this ISO date")
+    parser.add_argument("--to", dest="date_to", help="Use every synced event up to this ISO date")
+    parser.add_argument("--guests", default="100",
+                        help="Total guests, or a comma-separated list of increasing levels (e.g. 50,100,200)")
+    parser.add_argument("--duration", type=float, default=60, help="Seconds each level runs after ramp-up")
+    parser.add_argument("--ramp", type=float, default=10, help="Seconds over which guests arrive")
+    parser.add_argument("--think-time", type=float, default=5, help="Mean seconds between a guest's actions")
+    parser.add_argument("--max-error-rate", type=float, default=0.01, help="Stop stepping above this 5xx/timeout rate")
+    parser.add_argument("--max-p95-ms", type=float, default=1000, help="Stop stepping above this overall p95")
+    args = parser.parse_args()
+
+    integration = TripleseatHostHubIntegration(authenticate=False, verbose=False)
+    integration.host_hub_token = integration._get_host_hub_token()
+    if not integration.host_hub_token:
+        print("Failed to authenticate with Host Hub")
+        sys.exit(1)
+
+    tripleseat_ids = args.tripleseat_ids or integration.get_host_hub_tripleseat_ids(args.date_from, args.date_to) or []
+    events = load_events(integration, tripleseat_ids)
+    if not events:
+        print("No synced events with access codes to load-test")
+        sys.exit(1)
+    print(f"Load-testing {len(events)} events")
+
+    simulator = GuestSimulator(integration.host_hub_api_url, events, args.think_time)
+    for guests in (int(level) for level in args.guests.split(",")):
+        report = asyncio.run(simulator.run(guests, args.duration, args.ramp))
+        report.print(guests)
+        error_rate, p95 = report.error_rate(), report.p95() * 1000
+        if error_rate > args.max_error_rate or p95 > args.max_p95_ms:
+            print(f"\nHost Hub degraded at {guests} guests (error rate {error_rate:.1%}, p95 {p95:.0f}ms)")
+            sys.exit(1)
+    print("\nHost Hub stayed within limits at every level")
+
+if __name__ == "__main__":
+    main()
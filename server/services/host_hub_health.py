@@ -0,0 +1,126 @@
+# Host Hub readiness tracking. Every Host Hub response passively marks the API healthy, so a
+# healthy startup costs no extra round trips; once a request fails to connect, a background
+# thread probes /api/test with a short backoff and wakes everyone waiting the moment it answers.
+# The prober only starts after the first failure; until then Host Hub is never probed.
+import time
+import threading
+
+import requests
+
+class HostHubHealthMonitor:
+    """Cached Host Hub readiness with a background prober and deadline-bounded waits"""
+
+    def __init__(self, session, api_url, ttl=10.0, min_backoff=0.05, max_backoff=0.5):
+        self.session = session
+        self.api_url = api_url
+        self.test_url = f"{api_url}/test"
+        # Seconds a healthy mark is trusted before the prober re-checks an idle Host Hub
+        self.ttl = ttl
+        self.min_backoff = min_backoff
+        self.max_backoff = max_backoff
+        self.stats = {"probes": 0, "passive_marks": 0, "outages": 0}
+        self._healthy = None  # None = unknown, True/False once observed
+        self._checked_at = 0.0
+        self._ready = threading.Event()
+        self._wake = threading.Event()
+        self._closed = threading.Event()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def _start(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._probe_loop, daemon=True)
+                self._thread.start()
+
+    def observe(self, response, *args, **kwargs):
+        """requests response hook: any Host Hub answer below 500 proves it is up"""
+        if response.url.startswith(self.api_url):
+            if response.status_code < 500:
+                self.mark_healthy(passive=True)
+            elif response.status_code in (502, 503, 504):
+                self.mark_unhealthy(f"HTTP {response.status_code}")
+        return response
+
+    def observe_error(self, error):
+        """Mark Host Hub down when a request failed to connect or timed out"""
+        if isinstance(error, (requests.ConnectionError, requests.Timeout)):
+            self.mark_unhealthy(str(error))
+
+    def mark_healthy(self, passive=False):
+        with self._lock:
+            self._healthy = True
+            self._checked_at = time.monotonic()
+            if passive:
+                self.stats["passive_marks"] += 1
+        self._ready.set()
+
+    def mark_unhealthy(self, reason=""):
+        with self._lock:
+            if self._healthy is not False:
+                self.stats["outages"] += 1
+                print(f"Host Hub marked unavailable: {reason}")
+            self._healthy = False
+        self._ready.clear()
+        self._start()
+        self._wake.set()
+
+    def is_ready(self):
+        """True while a healthy mark is younger than the TTL"""
+        with self._lock:
+            return self._healthy is True and time.monotonic() - self._checked_at < self.ttl
+
+    def wait_ready(self, timeout=None):
+        """Block until Host Hub is up or `timeout` seconds pass; returns readiness
+
+        Unknown and recently-healthy states return at once: the caller's own request is the probe.
+        """
+        with self._lock:
+            known_down = self._healthy is False
+        if not known_down:
+            return True
+        return self._ready.wait(timeout)
+
+    def _probe(self):
+        with self._lock:
+            self.stats["probes"] += 1
+        try:
+            response = self.session.get(self.test_url, timeout=2)
+        except requests.RequestException:
+            return False
+        return response.status_code == 200
+
+    def _probe_loop(self):
+        """While down: probe with capped exponential backoff. While up: re-check only once idle past the TTL"""
+        backoff = self.min_backoff
+        while not self._closed.is_set():
+            with self._lock:
+                healthy = self._healthy
+                idle_for = time.monotonic() - self._checked_at
+
+            if healthy is not False and idle_for < self.ttl:
+                self._wake.wait(self.ttl - idle_for)
+                self._wake.clear()
+                continue
+
+            if self._probe():
+                if healthy is False:
+                    print("Host Hub is available again")
+                self.mark_healthy()
+                backoff = self.min_backoff
+            else:
+                if healthy is not False:
+                    self.mark_unhealthy("health probe failed")
+                self._closed.wait(backoff)
+                backoff = min(backoff * 2, self.max_backoff)
+
+    def close(self):
+        """Stop the background prober"""
+        self._closed.set()
+        self._wake.set()
+
+    def report(self):
+        """Print probe and outage counters"""
+        stats = dict(self.stats)
+        print(f"Host Hub health: probes {stats['probes']}, passive marks {stats['passive_marks']}, "
+              f"outages {stats['outages']}")
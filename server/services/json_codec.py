@@ -0,0 +1,45 @@
+# Pluggable JSON codec for the sync scripts: orjson, then msgspec, then the stdlib json module.
+# Works in bytes so request bodies and responses skip intermediate str copies.
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+def _stdlib_dumps(obj):
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+def _stdlib_dumps_canonical(obj):
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"), sort_keys=True).encode("utf-8")
+
+def _stdlib_loads(data):
+    return json.loads(data)
+
+def available_backends():
+    """All installed backends as {name: (dumps, dumps_canonical, loads)}, fastest first"""
+    backends = {}
+    if orjson is not None:
+        backends["orjson"] = (
+            orjson.dumps,
+            lambda obj: orjson.dumps(obj, option=orjson.OPT_SORT_KEYS),
+            orjson.loads,
+        )
+    if msgspec is not None:
+        encoder = msgspec.json.Encoder()
+        sorted_encoder = msgspec.json.Encoder(order="sorted")
+        decoder = msgspec.json.Decoder()
+        backends["msgspec"] = (encoder.encode, sorted_encoder.encode, decoder.decode)
+    backends["json"] = (_stdlib_dumps, _stdlib_dumps_canonical, _stdlib_loads)
+    return backends
+
+BACKEND, (dumps, dumps_canonical, loads) = next(iter(available_backends().items()))
+
+def dumps_pretty(obj):
+    """Indented JSON text for debug output"""
+    return json.dumps(obj, indent=2, ensure_ascii=False, default=str)
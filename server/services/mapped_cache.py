@@ -0,0 +1,119 @@
+# In-memory cache of fetched and mapped Tripleseat events for the long-running sync process.
+# Repeated triggers for one booking (webhook bursts, admin re-sync clicks) within the TTL are
+# served from memory without calling Tripleseat; after the TTL the event is re-fetched, and it
+# is re-mapped only if its content hash changed. Bounded by an estimate of its memory footprint,
+# evicting least-recently-used events first. Records go in and come out as copies, so callers
+# stamping one (e.g. its fetch time) never change what other threads are served.
+import os
+import sys
+import copy
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+
+import json_codec
+
+DEFAULT_MAX_BYTES = 32 * 1024 * 1024
+DEFAULT_TTL = 30.0
+
+# Bytes per entry besides the record itself: OrderedDict slot, key, entry tuple, hash
+ENTRY_OVERHEAD = 200
+
+def content_hash(event_data, ignore=()):
+    """Digest of a raw Tripleseat event, skipping keys the sync adds itself (e.g. fetch time)"""
+    content = event_data
+    if any(key in event_data for key in ignore):
+        content = {key: value for key, value in event_data.items() if key not in ignore}
+    return hashlib.blake2b(json_codec.dumps_canonical(content), digest_size=16).digest()
+
+def record_size(record):
+    """Approximate bytes held by an EventRecord and its field values"""
+    if record is None:
+        return 0
+    return sys.getsizeof(record) + sum(sys.getsizeof(getattr(record, field)) for field in record.__slots__)
+
+class MappedEventCache:
+    """Size-bounded LRU of Tripleseat ID -> (content hash, EventRecord, problems) with a TTL"""
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES, ttl=DEFAULT_TTL, clock=time.monotonic):
+        self.max_bytes = max_bytes
+        # Seconds a mapped event is served without asking Tripleseat again
+        self.ttl = ttl
+        self.clock = clock
+        self.bytes = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "revalidated": 0, "misses": 0, "invalidations": 0, "evictions": 0}
+
+    @classmethod
+    def from_env(cls):
+        """Build the cache from environment settings, or return None when disabled"""
+        if os.getenv("MAPPED_EVENT_CACHE", "1") == "0":
+            return None
+        return cls(int(os.getenv("MAPPED_EVENT_CACHE_BYTES", DEFAULT_MAX_BYTES)),
+                   float(os.getenv("MAPPED_EVENT_CACHE_TTL", DEFAULT_TTL)))
+
+    def fresh(self, tripleseat_id):
+        """The cached valid record when it was confirmed within the TTL (no fetch needed), else None"""
+        with self._lock:
+            entry = self._entries.get(str(tripleseat_id))
+            if entry is None or entry[2] is None or self.clock() - entry[4] >= self.ttl:
+                return None
+            self._entries.move_to_end(str(tripleseat_id))
+            self.stats["hits"] += 1
+            return copy.copy(entry[2])
+
+    def lookup(self, tripleseat_id, digest):
+        """(record, problems) mapped from identical content, or None when the content changed or is unknown"""
+        key = str(tripleseat_id)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[1] != digest:
+                self.stats["misses"] += 1
+                return None
+            # Same content re-fetched: restart the TTL and keep the mapping
+            self._entries[key] = entry[:4] + (self.clock(),)
+            self._entries.move_to_end(key)
+            self.stats["revalidated"] += 1
+            return copy.copy(entry[2]), list(entry[3])
+
+    def put(self, tripleseat_id, digest, record, problems):
+        """Cache a mapping, evicting least-recently-used events beyond the size limit"""
+        key = str(tripleseat_id)
+        record, problems = copy.copy(record), tuple(problems)
+        size = record_size(record) + sum(sys.getsizeof(problem) for problem in problems) + ENTRY_OVERHEAD
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.bytes -= previous[0]
+            self._entries[key] = (size, digest, record, problems, self.clock())
+            self.bytes += size
+            while self.bytes > self.max_bytes and len(self._entries) > 1:
+                _, evicted = self._entries.popitem(last=False)
+                self.bytes -= evicted[0]
+                self.stats["evictions"] += 1
+
+    def invalidate(self, tripleseat_id):
+        """Drop an event known to have changed (e.g. a Tripleseat webhook)"""
+        with self._lock:
+            entry = self._entries.pop(str(tripleseat_id), None)
+            if entry is not None:
+                self.bytes -= entry[0]
+                self.stats["invalidations"] += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+    def report(self):
+        """Print hit ratio and memory footprint"""
+        with self._lock:
+            stats = dict(self.stats)
+            entries, size = len(self._entries), self.bytes
+        lookups = stats["hits"] + stats["revalidated"] + stats["misses"]
+        ratio = (stats["hits"] + stats["revalidated"]) / lookups if lookups else 0.0
+        print(f"Mapped event cache: {ratio:.1%} hit ratio ({stats['hits']} fresh, {stats['revalidated']} same content, "
+              f"{stats['misses']} mapped), {entries} events in {size / 1024:.0f} KiB of {self.max_bytes / 1024:.0f} KiB, "
+              f"{stats['evictions']} evicted, {stats['invalidations']} invalidated")
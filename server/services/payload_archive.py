@@ -0,0 +1,353 @@
+# Append-only archive of raw Tripleseat responses, with a memory-mapped offset index and
+# an offline replay command that re-runs the mapping (and optionally the Host Hub upsert)
+# without calling Tripleseat.
+#
+# Layout under <SYNC_STATE_DIR>/archive/:
+#   segment-000001.bin ...  zlib-compressed response bodies, appended back to back
+#   index.bin               fixed-size entries: event_id, fetched_at, segment, offset, length
+#   archive.lock            flock'd around every append, so several sync processes can share it
+#
+# A payload identical to the event's latest archived one is not stored again. When a segment
+# fills up, payloads older than the retention period are pruned, except each event's latest.
+import os
+import sys
+import mmap
+import time
+import zlib
+import struct
+import hashlib
+import argparse
+import threading
+from contextlib import contextmanager
+
+import json_codec
+from tripleseat_cache import sync_state_dir, state_path
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process lock, so give each process its own archive there
+    fcntl = None
+
+INDEX_ENTRY = struct.Struct("<qdIQI")  # event_id, fetched_at, segment, offset, length
+DEFAULT_SEGMENT_BYTES = 64 * 1024 * 1024
+DEFAULT_RETENTION_DAYS = 90
+
+def _payload_digest(compressed):
+    return hashlib.blake2b(compressed, digest_size=16).digest()
+
+class PayloadArchive:
+    """Writes and reads the raw payload archive"""
+
+    def __init__(self, directory, segment_bytes=DEFAULT_SEGMENT_BYTES, retention_days=DEFAULT_RETENTION_DAYS):
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        # Days payloads are kept once superseded by a newer one for the same event (0 = forever)
+        self.retention_days = retention_days
+        self.index_path = os.path.join(directory, "index.bin")
+        self.lock_path = os.path.join(directory, "archive.lock")
+        self.stats = {"archived": 0, "duplicates": 0}
+        self._lock = threading.Lock()
+        self._lock_file = None
+        self._segment = None
+        self._segment_file = None
+        self._index_file = None
+        # event_id -> newest index entry (and the digest of its payload, read on demand),
+        # kept in step with index.bin as any process appends to it
+        self._latest = {}
+        self._digests = {}
+        self._index_inode = None
+        self._indexed_bytes = 0
+        os.makedirs(directory, exist_ok=True)
+
+    @classmethod
+    def from_env(cls, tenant=None):
+        """Build the archive from environment settings, or return None when disabled"""
+        if os.getenv("TRIPLESEAT_ARCHIVE", "1") == "0":
+            return None
+        return cls(state_path("TRIPLESEAT_ARCHIVE_DIR", "archive", tenant),
+                   retention_days=float(os.getenv("TRIPLESEAT_ARCHIVE_RETENTION_DAYS", DEFAULT_RETENTION_DAYS)))
+
+    def _segment_path(self, segment):
+        return os.path.join(self.directory, f"segment-{segment:06d}.bin")
+
+    def _segments(self):
+        return sorted(int(name[8:14]) for name in os.listdir(self.directory) if name.startswith("segment-"))
+
+    @contextmanager
+    def _exclusive(self):
+        """Hold the archive against other threads and, via flock, other processes"""
+        with self._lock:
+            if fcntl is None:
+                yield
+                return
+            if self._lock_file is None:
+                self._lock_file = open(self.lock_path, "a")
+            fcntl.flock(self._lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(self._lock_file, fcntl.LOCK_UN)
+
+    def _refresh_index(self):
+        """Fold index entries appended since the last call, by any process, into the latest-entry map"""
+        try:
+            stat = os.stat(self.index_path)
+        except FileNotFoundError:
+            return
+        if stat.st_ino != self._index_inode:
+            # First read, or the index was rewritten by a prune: start over
+            self._index_inode = stat.st_ino
+            self._indexed_bytes = 0
+            self._latest.clear()
+            self._digests.clear()
+        if stat.st_size - self._indexed_bytes < INDEX_ENTRY.size:
+            return
+        with open(self.index_path, "rb") as index_file:
+            index_file.seek(self._indexed_bytes)
+            data = index_file.read(stat.st_size - self._indexed_bytes)
+        data = data[:len(data) - len(data) % INDEX_ENTRY.size]  # ignore a torn trailing write
+        for entry in INDEX_ENTRY.iter_unpack(data):
+            current = self._latest.get(entry[0])
+            if current is None or entry[1] >= current[1]:
+                self._latest[entry[0]] = entry
+                self._digests.pop(entry[0], None)
+        self._indexed_bytes += len(data)
+
+    def _latest_digest(self, event_id):
+        """Digest of the event's latest archived payload"""
+        digest = self._digests.get(event_id)
+        if digest is None:
+            _, _, segment, offset, length = self._latest[event_id]
+            with open(self._segment_path(segment), "rb") as segment_file:
+                segment_file.seek(offset)
+                digest = self._digests[event_id] = _payload_digest(segment_file.read(length))
+        return digest
+
+    def _open_segment(self):
+        """Open the newest segment for appending, rotating (and pruning) once it is full"""
+        newest = max(self._segments(), default=1)
+        if self._segment_file is None or newest != self._segment:
+            # Another process may have rotated since our last append
+            if self._segment_file:
+                self._segment_file.close()
+            self._segment = newest
+            self._segment_file = open(self._segment_path(newest), "ab")
+        if self._segment_file.seek(0, os.SEEK_END) >= self.segment_bytes:
+            self._segment_file.close()
+            self._segment += 1
+            self._segment_file = open(self._segment_path(self._segment), "ab")
+            self._prune()
+        return self._segment_file
+
+    def _open_index(self):
+        """Open index.bin for appending (again, if a prune replaced it), cutting off a torn trailing entry"""
+        if self._index_file is not None:
+            try:
+                replaced = os.stat(self.index_path).st_ino != os.fstat(self._index_file.fileno()).st_ino
+            except FileNotFoundError:
+                replaced = True
+            if replaced:
+                self._index_file.close()
+                self._index_file = None
+        if self._index_file is None:
+            self._index_file = open(self.index_path, "ab")
+            self._index_inode = os.fstat(self._index_file.fileno()).st_ino
+        size = self._index_file.seek(0, os.SEEK_END)
+        if size % INDEX_ENTRY.size:
+            self._index_file.truncate(size - size % INDEX_ENTRY.size)
+        return self._index_file
+
+    def append(self, event_id, body, fetched_at=None):
+        """Compress and append one raw response body (bytes) for an event; returns False, writing
+        nothing, when it is identical to the event's latest archived payload"""
+        compressed = zlib.compress(body, 6)
+        digest = _payload_digest(compressed)
+        event_id = int(event_id)
+        fetched_at = fetched_at or time.time()
+        with self._exclusive():
+            self._refresh_index()
+            if event_id in self._latest and self._latest_digest(event_id) == digest:
+                self.stats["duplicates"] += 1
+                return False
+            segment_file = self._open_segment()
+            # Other processes append too, so take the offset at the true end of file, under the lock
+            offset = segment_file.seek(0, os.SEEK_END)
+            segment_file.write(compressed)
+            segment_file.flush()
+            # The index entry is written only after its payload is on disk
+            index_file = self._open_index()
+            entry = (event_id, fetched_at, self._segment, offset, len(compressed))
+            index_file.write(INDEX_ENTRY.pack(*entry))
+            index_file.flush()
+            self._indexed_bytes += INDEX_ENTRY.size
+            self._latest[event_id] = entry
+            self._digests[event_id] = digest
+            self.stats["archived"] += 1
+            return True
+
+    def prune(self, retention_days=None):
+        """Drop payloads fetched more than retention_days ago, keeping each event's latest, and delete
+        segments left with nothing to keep; returns the number of segments deleted"""
+        with self._exclusive():
+            return self._prune(retention_days)
+
+    def _prune(self, retention_days=None):
+        retention_days = self.retention_days if retention_days is None else retention_days
+        if not retention_days:
+            return 0
+        self._refresh_index()
+        cutoff = time.time() - retention_days * 24 * 3600
+        latest = set(self._latest.values())
+        entries = list(self.entries())
+        kept = [entry for entry in entries if entry[1] >= cutoff or entry in latest]
+        segments = self._segments()
+        live = {entry[2] for entry in kept} | {max(segments, default=1)}
+        doomed = [segment for segment in segments if segment not in live]
+        if len(kept) == len(entries) and not doomed:
+            return 0
+
+        # Rewrite the index first, so no entry ever points into a deleted segment
+        temp_path = self.index_path + ".tmp"
+        with open(temp_path, "wb") as temp_file:
+            for entry in kept:
+                temp_file.write(INDEX_ENTRY.pack(*entry))
+            temp_file.flush()
+            os.fsync(temp_file.fileno())
+        os.replace(temp_path, self.index_path)
+        if self._index_file:
+            self._index_file.close()
+            self._index_file = None
+        self._index_inode = os.stat(self.index_path).st_ino
+        self._indexed_bytes = len(kept) * INDEX_ENTRY.size
+        for segment in doomed:
+            os.remove(self._segment_path(segment))
+        print(f"Pruned payload archive: {len(entries) - len(kept)} payloads older than {retention_days:g} days, "
+              f"{len(doomed)} segments deleted")
+        return len(doomed)
+
+    def close(self):
+        """Close the open segment, index and lock files"""
+        with self._lock:
+            for handle in (self._segment_file, self._index_file, self._lock_file):
+                if handle:
+                    handle.close()
+            self._segment_file = None
+            self._index_file = None
+            self._lock_file = None
+
+    def entries(self):
+        """Yield (event_id, fetched_at, segment, offset, length) from the memory-mapped index"""
+        if not os.path.exists(self.index_path) or os.path.getsize(self.index_path) < INDEX_ENTRY.size:
+            return
+        with open(self.index_path, "rb") as index_file:
+            with mmap.mmap(index_file.fileno(), 0, access=mmap.ACCESS_READ) as index:
+                usable = len(index) - len(index) % INDEX_ENTRY.size  # ignore a torn trailing write
+                for position in range(0, usable, INDEX_ENTRY.size):
+                    yield INDEX_ENTRY.unpack_from(index, position)
+
+    def latest(self, since=None, until=None):
+        """Newest index entry per event, optionally limited to a fetch-time window"""
+        newest = {}
+        for entry in self.entries():
+            fetched_at = entry[1]
+            if (since and fetched_at < since) or (until and fetched_at > until):
+                continue
+            current = newest.get(entry[0])
+            if current is None or fetched_at >= current[1]:
+                newest[entry[0]] = entry
+        return newest
+
+    def _read(self, entry):
+        """Decompress and decode the payload for one index entry"""
+        _, _, segment, offset, length = entry
+        with open(self._segment_path(segment), "rb") as segment_file:
+            segment_file.seek(offset)
+            return json_codec.loads(zlib.decompress(segment_file.read(length)))
+
+    def get(self, event_id):
+        """Latest archived raw Tripleseat event for one event ID, or None"""
+        with self._lock:
+            self._refresh_index()
+            newest = self._latest.get(int(event_id))
+        if newest is None:
+            return None
+        payload = self._read(newest)
+        return payload.get('event', payload)
+
+    def iter_events(self, since=None, until=None):
+        """Yield the latest archived raw Tripleseat event for every event ID, in segment order"""
+        entries = sorted(self.latest(since, until).values(), key=lambda entry: (entry[2], entry[3]))
+        handles = {}
+        try:
+            for _, _, segment, offset, length in entries:
+                segment_file = handles.get(segment)
+                if segment_file is None:
+                    segment_file = handles[segment] = open(self._segment_path(segment), "rb")
+                segment_file.seek(offset)
+                payload = json_codec.loads(zlib.decompress(segment_file.read(length)))
+                yield payload.get('event', payload)
+        finally:
+            for segment_file in handles.values():
+                segment_file.close()
+
+def _parse_day(value):
+    """MM/DD/YYYY -> Unix timestamp (local midnight)"""
+    return time.mktime(time.strptime(value, "%m/%d/%Y")) if value else None
+
+def main():
+    """Command line entry point: replay archived payloads through the mapping (and optionally upsert)"""
+    parser = argparse.ArgumentParser(description="Replay archived Tripleseat payloads without calling Tripleseat")
+    parser.add_argument("--since", help="Only payloads fetched on/after this day (MM/DD/YYYY)")
+    parser.add_argument("--until", help="Only payloads fetched before this day (MM/DD/YYYY)")
+    parser.add_argument("--upsert", action="store_true", help="Write the re-mapped events to Host Hub")
+    parser.add_argument("--dry-run", action="store_true", help="Diff the re-mapped events against Host Hub")
+    parser.add_argument("--process-workers", type=int, default=0, help="Map on a process pool")
+    parser.add_argument("--tenant", help="Replay this tenant's archive into its own account (see tenants.py)")
+    parser.add_argument("--prune", action="store_true", help="Only prune payloads past the retention period")
+    args = parser.parse_args()
+
+    # Imported here so the archive itself has no dependency on the sync engine
+    from tripleseatv4 import TripleseatHostHubIntegration
+    from bulk_sync import BulkSync
+
+    tenant = None
+    if args.tenant:
+        from tenants import load_tenants
+        tenant = next((t for t in load_tenants() if t.name == args.tenant), None)
+        if tenant is None:
+            print(f"Unknown tenant: {args.tenant}")
+            sys.exit(1)
+    tenant_name = tenant.name if tenant else None
+
+    archive = PayloadArchive.from_env(tenant_name) or PayloadArchive(os.path.join(sync_state_dir(tenant_name), "archive"))
+    if args.prune:
+        archive.prune()
+        sys.exit(0)
+    events = archive.iter_events(_parse_day(args.since), _parse_day(args.until))
+
+    started = time.perf_counter()
+    if args.upsert or args.dry_run:
+        # Replays only talk to Host Hub, so no Tripleseat credentials are needed
+        integration = TripleseatHostHubIntegration(authenticate=False, tenant=tenant, verbose=False)
+        integration.host_hub_token = integration._get_host_hub_token()
+        if not integration.host_hub_token:
+            print("Failed to authenticate with Host Hub")
+            sys.exit(1)
+        sync = BulkSync(integration, process_workers=args.process_workers)
+        stats = sync.run_events(events, dry_run=args.dry_run)
+    else:
+        # Mapping only: no network at all
+        integration = TripleseatHostHubIntegration(authenticate=False, tenant=tenant, verbose=False)
+        sync = BulkSync(integration, process_workers=args.process_workers)
+        for _ in sync.convert(events):
+            pass
+        stats = sync.stats
+    elapsed = time.perf_counter() - started
+
+    print(f"\n=== REPLAY FINISHED in {elapsed:.1f}s ===")
+    for key, value in stats.items():
+        print(f"{key}: {value}")
+    sys.exit(0 if stats["failed"] + stats.get("invalid", 0) == 0 else 1)
+
+if __name__ == "__main__":
+    main()
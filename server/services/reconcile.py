@@ -0,0 +1,154 @@
+# Reconciliation: find Host Hub events whose Tripleseat booking was cancelled or deleted,
+# then close or flag them. IDs are held as sorted int64 arrays and set-diffed with a merge walk,
+# so years of data cost 8 bytes per ID and one linear pass.
+import sys
+import argparse
+from array import array
+from datetime import datetime
+
+from tripleseatv4 import TripleseatHostHubIntegration
+from bulk_sync import chunked
+
+def sorted_ids(ids):
+    """Build a sorted, de-duplicated int64 array from numeric IDs (non-numeric IDs are skipped)"""
+    values = array('q')
+    for value in ids:
+        try:
+            values.append(int(value))
+        except (TypeError, ValueError):
+            print(f"Skipping non-numeric Tripleseat ID: {value!r}")
+    ordered = array('q', sorted(values))
+
+    unique = array('q')
+    for value in ordered:
+        if not unique or unique[-1] != value:
+            unique.append(value)
+    return unique
+
+def sorted_difference(left, right):
+    """Yield values in sorted array `left` that are not in sorted array `right`"""
+    j = 0
+    right_len = len(right)
+    for value in left:
+        while j < right_len and right[j] < value:
+            j += 1
+        if j >= right_len or right[j] != value:
+            yield value
+
+def sorted_intersection(left, right):
+    """Yield values present in both sorted arrays"""
+    j = 0
+    right_len = len(right)
+    for value in left:
+        while j < right_len and right[j] < value:
+            j += 1
+        if j < right_len and right[j] == value:
+            yield value
+
+def _to_iso(date_str, end_of_day=False):
+    """Convert MM/DD/YYYY to the ISO bound Host Hub stores dates in"""
+    if not date_str:
+        return None
+    parsed = datetime.strptime(date_str, "%m/%d/%Y")
+    suffix = "T23:59:59.999Z" if end_of_day else "T00:00:00.000Z"
+    return parsed.strftime("%Y-%m-%d") + suffix
+
+class Reconciler:
+    """Set-diffs live Tripleseat bookings against live Host Hub events in a date window"""
+
+    def __init__(self, integration, batch_size=500, max_orphan_ratio=0.5):
+        self.integration = integration
+        self.batch_size = batch_size
+        self.max_orphan_ratio = max_orphan_ratio
+
+    def live_tripleseat_ids(self, start_date, end_date):
+        """IDs of bookings Tripleseat still lists as definite in the window"""
+        integration = self.integration
+        return sorted_ids(
+            event.get('id')
+            for event in integration.iter_tripleseat_events(start_date, end_date)
+            if integration._map_status(event.get('status', 'DEFINITE')) == "Definite"
+        )
+
+    def live_host_hub_ids(self, start_date, end_date, orphaned=False):
+        """Tripleseat IDs of Host Hub events that are not Closed in the window (orphaned: only flagged ones)"""
+        ids = self.integration.get_host_hub_tripleseat_ids(
+            _to_iso(start_date), _to_iso(end_date, end_of_day=True), orphaned
+        )
+        if ids is None:
+            raise RuntimeError("Failed to list Host Hub Tripleseat IDs")
+        return sorted_ids(ids)
+
+    def find_orphans(self, start_date, end_date):
+        """Return (orphan_ids, restored_ids, host_hub_count, tripleseat_count); restored events were
+        flagged as orphaned but are listed in Tripleseat again"""
+        tripleseat_ids = self.live_tripleseat_ids(start_date, end_date)
+        host_hub_ids = self.live_host_hub_ids(start_date, end_date)
+        flagged_ids = self.live_host_hub_ids(start_date, end_date, orphaned=True)
+        orphans = array('q', sorted_difference(host_hub_ids, tripleseat_ids))
+        restored = array('q', sorted_intersection(flagged_ids, tripleseat_ids))
+        return orphans, restored, len(host_hub_ids), len(tripleseat_ids)
+
+    def run(self, start_date, end_date, action="flag", apply=False, force=False):
+        """Find orphans and, when apply is set, close/flag them in batched writes"""
+        if not self.integration.refresh_tokens_if_needed():
+            print("Failed to obtain required authentication tokens")
+            return False
+
+        orphans, restored, host_hub_count, tripleseat_count = self.find_orphans(start_date, end_date)
+        print(f"Tripleseat live bookings: {tripleseat_count}")
+        print(f"Host Hub live events:     {host_hub_count}")
+        print(f"Orphaned events:          {len(orphans)}")
+        for orphan in orphans:
+            print(f"  {orphan}")
+        print(f"Flagged but back:         {len(restored)}")
+        for event_id in restored:
+            print(f"  {event_id}")
+
+        if not (orphans or restored) or not apply:
+            if orphans or restored:
+                print("Report only; pass --apply to update Host Hub")
+            return True
+
+        cleared = 0
+        for batch in chunked(restored, self.batch_size):
+            result = self.integration.mark_host_hub_orphans(batch, "restore")
+            if result is None:
+                return False
+            cleared += result
+        if restored:
+            print(f"Cleared the orphan flag of {cleared} events")
+        if not orphans:
+            return True
+
+        # Guard against an empty or truncated Tripleseat listing closing everything
+        if host_hub_count and len(orphans) / host_hub_count > self.max_orphan_ratio and not force:
+            print(f"Refusing to {action} {len(orphans)}/{host_hub_count} events; pass --force if this is expected")
+            return False
+
+        modified = 0
+        for batch in chunked(orphans, self.batch_size):
+            result = self.integration.mark_host_hub_orphans(batch, action)
+            if result is None:
+                return False
+            modified += result
+
+        print(f"Marked {modified} events as orphaned (action: {action})")
+        return True
+
+def main():
+    """Command line entry point for reconciliation"""
+    parser = argparse.ArgumentParser(description="Close or flag Host Hub events cancelled/deleted in Tripleseat")
+    parser.add_argument("start_date", help="Window start (MM/DD/YYYY)")
+    parser.add_argument("end_date", help="Window end (MM/DD/YYYY)")
+    parser.add_argument("--action", choices=["flag", "close"], default="flag")
+    parser.add_argument("--apply", action="store_true", help="Write changes (default is report only)")
+    parser.add_argument("--force", action="store_true", help="Allow orphaning more than half of the window")
+    args = parser.parse_args()
+
+    integration = TripleseatHostHubIntegration(verbose=False)
+    success = Reconciler(integration).run(args.start_date, args.end_date, args.action, args.apply, args.force)
+    sys.exit(0 if success else 1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+# Durable queue of event syncs a worker could not finish (shutdown) or that failed when
+# retried. Entries are re-queued by the worker once due, so a deploy never loses a sync; a
+# sync that keeps failing backs off exponentially until it is given up. Sync writes are
+# idempotent, so replaying one that had in fact completed is harmless.
+import os
+import time
+import sqlite3
+import threading
+
+from tripleseat_cache import state_path
+
+DEFAULT_BASE_DELAY = 30.0
+DEFAULT_MAX_DELAY = 3600.0
+DEFAULT_MAX_ATTEMPTS = 8
+
+class RetryQueue:
+    """Tripleseat IDs awaiting a sync, with attempt counts and backoff, kept in SQLite"""
+
+    def __init__(self, path, base_delay=DEFAULT_BASE_DELAY, max_delay=DEFAULT_MAX_DELAY,
+                 max_attempts=DEFAULT_MAX_ATTEMPTS):
+        self.path = path
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        # Failed retries of one sync before it is given up
+        self.max_attempts = max_attempts
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS pending (tripleseat_id TEXT PRIMARY KEY, reason TEXT NOT NULL, queued_at REAL NOT NULL)"
+        )
+        # Queues created before retries backed off lack these columns
+        columns = {row[1] for row in self._db.execute("PRAGMA table_info(pending)")}
+        if "attempts" not in columns:
+            self._db.execute("ALTER TABLE pending ADD COLUMN attempts INTEGER NOT NULL DEFAULT 0")
+        if "next_attempt_at" not in columns:
+            self._db.execute("ALTER TABLE pending ADD COLUMN next_attempt_at REAL NOT NULL DEFAULT 0")
+
+    @classmethod
+    def from_env(cls, tenant=None):
+        return cls(state_path("SYNC_RETRY_QUEUE_DB", "retry-queue.db", tenant),
+                   float(os.getenv("SYNC_RETRY_BASE_DELAY", DEFAULT_BASE_DELAY)),
+                   float(os.getenv("SYNC_RETRY_MAX_DELAY", DEFAULT_MAX_DELAY)),
+                   int(os.getenv("SYNC_RETRY_MAX_ATTEMPTS", DEFAULT_MAX_ATTEMPTS)))
+
+    def add(self, tripleseat_ids, reason):
+        """Persist syncs to retry now; one transaction, so a crash mid-shutdown keeps all or none
+
+        A sync already queued keeps its attempt count.
+        """
+        now = time.time()
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            self._db.executemany(
+                "INSERT INTO pending (tripleseat_id, reason, queued_at, next_attempt_at) VALUES (?, ?, ?, ?)"
+                " ON CONFLICT(tripleseat_id) DO UPDATE SET reason = excluded.reason, next_attempt_at = excluded.next_attempt_at",
+                [(str(tripleseat_id), reason, now, now) for tripleseat_id in tripleseat_ids]
+            )
+            self._db.execute("COMMIT")
+
+    def due(self, now=None):
+        """Queued Tripleseat IDs whose next attempt is due, oldest first"""
+        now = time.time() if now is None else now
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT tripleseat_id FROM pending WHERE next_attempt_at <= ? ORDER BY queued_at", (now,)
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def next_due(self):
+        """Time of the earliest scheduled attempt, or None when the queue is empty"""
+        with self._lock:
+            return self._db.execute("SELECT MIN(next_attempt_at) FROM pending").fetchone()[0]
+
+    def retry_later(self, tripleseat_id, reason):
+        """Record a failed attempt and back off; returns False once attempts are exhausted
+        (the entry is then removed, for the caller to dead-letter)"""
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            row = self._db.execute(
+                "SELECT attempts FROM pending WHERE tripleseat_id = ?", (str(tripleseat_id),)
+            ).fetchone()
+            attempts = (row[0] if row else 0) + 1
+            if attempts >= self.max_attempts:
+                self._db.execute("DELETE FROM pending WHERE tripleseat_id = ?", (str(tripleseat_id),))
+                self._db.execute("COMMIT")
+                return False
+            delay = min(self.max_delay, self.base_delay * 2 ** (attempts - 1))
+            now = time.time()
+            self._db.execute(
+                "INSERT INTO pending (tripleseat_id, reason, queued_at, attempts, next_attempt_at) VALUES (?, ?, ?, ?, ?)"
+                " ON CONFLICT(tripleseat_id) DO UPDATE SET reason = excluded.reason, attempts = excluded.attempts,"
+                " next_attempt_at = excluded.next_attempt_at",
+                (str(tripleseat_id), reason, now, attempts, now + delay)
+            )
+            self._db.execute("COMMIT")
+            return True
+
+    def remove(self, tripleseat_id):
+        """Drop a sync once it has succeeded"""
+        with self._lock:
+            self._db.execute("DELETE FROM pending WHERE tripleseat_id = ?", (str(tripleseat_id),))
+
+    def __len__(self):
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM pending").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._db.close()
@@ -0,0 +1,163 @@
+# Run-level advisory lock for scheduled syncs: a SQLite lease row with a heartbeat.
+# A second run either exits straight away or asks the holder for one follow-up run;
+# leases of crashed runs expire (or are reclaimed at once if the holder's PID is gone).
+import os
+import time
+import uuid
+import random
+import socket
+import sqlite3
+import threading
+from contextlib import closing
+
+from tripleseat_cache import sync_state_dir
+
+DEFAULT_LEASE_SECONDS = 60
+
+def _pid_alive(pid):
+    """True when a process with this PID exists on this host"""
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+class RunLease:
+    """Exclusive, heartbeated lease on a named job"""
+
+    def __init__(self, name="tripleseat-sync", path=None, lease_seconds=DEFAULT_LEASE_SECONDS):
+        self.name = name
+        self.path = path or os.getenv("SYNC_LOCK_DB", os.path.join(sync_state_dir(), "locks.db"))
+        self.lease_seconds = lease_seconds
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.lost = False
+        self._stop = threading.Event()
+        self._heartbeat = None
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        with closing(self._connect()) as db:
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS leases ("
+                " name TEXT PRIMARY KEY, owner TEXT NOT NULL, host TEXT, pid INTEGER,"
+                " expires_at REAL NOT NULL, follow_up INTEGER NOT NULL DEFAULT 0)"
+            )
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=10, isolation_level=None)
+
+    def _is_stale(self, row, now):
+        """A lease is stale once expired, or when its holder on this host has died"""
+        _, host, pid, expires_at, _ = row
+        if expires_at < now:
+            return True
+        return host == socket.gethostname() and pid is not None and not _pid_alive(pid)
+
+    def acquire(self):
+        """Take the lease if it is free or stale; returns True on success"""
+        now = time.time()
+        db = self._connect()
+        try:
+            db.execute("BEGIN IMMEDIATE")
+            row = db.execute(
+                "SELECT owner, host, pid, expires_at, follow_up FROM leases WHERE name = ?", (self.name,)
+            ).fetchone()
+            if row and not self._is_stale(row, now):
+                db.execute("ROLLBACK")
+                return False
+            if row:
+                print(f"Reclaiming stale lease '{self.name}' held by {row[0]}")
+            db.execute(
+                "INSERT OR REPLACE INTO leases (name, owner, host, pid, expires_at, follow_up) VALUES (?, ?, ?, ?, ?, 0)",
+                (self.name, self.owner, socket.gethostname(), os.getpid(), now + self.lease_seconds)
+            )
+            db.execute("COMMIT")
+        finally:
+            db.close()
+
+        self._stop.clear()
+        self._heartbeat = threading.Thread(target=self._beat, daemon=True)
+        self._heartbeat.start()
+        return True
+
+    def _beat(self):
+        """Extend the lease every third of its length until released"""
+        while not self._stop.wait(self.lease_seconds / 3):
+            with closing(self._connect()) as db:
+                updated = db.execute(
+                    "UPDATE leases SET expires_at = ? WHERE name = ? AND owner = ?",
+                    (time.time() + self.lease_seconds, self.name, self.owner)
+                ).rowcount
+            if not updated:
+                print(f"Lost lease '{self.name}'; another run reclaimed it")
+                self.lost = True
+                return
+
+    def request_follow_up(self):
+        """Ask the current holder to run once more after it finishes"""
+        with closing(self._connect()) as db:
+            db.execute("UPDATE leases SET follow_up = 1 WHERE name = ?", (self.name,))
+
+    def release(self, unless_follow_up=False):
+        """Drop the lease if we still hold it; returns True once released
+
+        With unless_follow_up, a pending follow-up request is checked in the same transaction:
+        the lease is then kept (and the request cleared) and False returned, so a request made
+        just before release is not lost.
+        """
+        db = self._connect()
+        try:
+            db.execute("BEGIN IMMEDIATE")
+            row = db.execute(
+                "SELECT follow_up FROM leases WHERE name = ? AND owner = ?", (self.name, self.owner)
+            ).fetchone()
+            if unless_follow_up and row and row[0]:
+                db.execute("UPDATE leases SET follow_up = 0 WHERE name = ?", (self.name,))
+                db.execute("COMMIT")
+                return False
+            db.execute("DELETE FROM leases WHERE name = ? AND owner = ?", (self.name, self.owner))
+            db.execute("COMMIT")
+        finally:
+            db.close()
+        self._stop.set()
+        if self._heartbeat:
+            self._heartbeat.join()
+            self._heartbeat = None
+        return True
+
+def run_exclusive(job, name="tripleseat-sync", on_busy="exit", lease_seconds=DEFAULT_LEASE_SECONDS):
+    """Run job() under the named lease; returns its result, or None when another run holds the lease
+
+    on_busy="follow-up" asks the running holder to run the job once more when it finishes.
+    """
+    lease = RunLease(name, lease_seconds=lease_seconds)
+    if not lease.acquire():
+        if on_busy == "follow-up":
+            lease.request_follow_up()
+            print(f"Another '{name}' run is active; queued a follow-up run with it")
+        else:
+            print(f"Another '{name}' run is active; exiting")
+        return None
+
+    try:
+        while True:
+            result = job()
+            if lease.lost or lease.release(unless_follow_up=True):
+                return result
+            print("Follow-up requested during the run; running again")
+    finally:
+        # No-op when already released above; covers job() raising
+        lease.release()
+
+def run_every(job, interval, jitter=0, stop=None):
+    """Call job() every `interval` seconds (+/- up to `jitter`) until `stop` is set"""
+    stop = stop or threading.Event()
+    while not stop.is_set():
+        try:
+            job()
+        except Exception as e:
+            # One failed run must not end the schedule
+            print(f"Scheduled run failed: {str(e)}")
+        delay = max(0, interval + random.uniform(-jitter, jitter))
+        print(f"Next run in {delay:.0f}s")
+        stop.wait(delay)
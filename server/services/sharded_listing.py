@@ -0,0 +1,253 @@
+# Date-sharded concurrent listing of Tripleseat events for large backfills. The requested window
+# is split into disjoint date shards that are paged through concurrently, each with its own page
+# cursor saved to a checkpoint file, so an interrupted backfill resumes where each shard stopped.
+# A page is only checkpointed once the consumer has confirmed every one of its events (i.e. they
+# were written), so events still batched or in flight downstream are listed again on resume.
+# A shard that turns out much denser than the rest is split in half and re-queued, and events
+# listed by two shards (e.g. spanning a boundary) are yielded once.
+import os
+import json
+import queue
+import threading
+from collections import deque
+from datetime import datetime, timedelta
+
+from tripleseat_cache import sync_state_dir
+
+DATE_FORMAT = "%m/%d/%Y"
+
+def split_window(start, end, days):
+    """Disjoint (start, end) day ranges of at most `days` days covering start..end inclusive"""
+    shards = []
+    while start <= end:
+        shard_end = min(end, start + timedelta(days=days - 1))
+        shards.append((start, shard_end))
+        start = shard_end + timedelta(days=1)
+    return shards
+
+def _key(shard):
+    return f"{shard[0]:%Y-%m-%d}..{shard[1]:%Y-%m-%d}"
+
+def _parse_key(key):
+    start, end = key.split("..")
+    return datetime.strptime(start, "%Y-%m-%d").date(), datetime.strptime(end, "%Y-%m-%d").date()
+
+class ShardCheckpoint:
+    """Per-shard next page for one listing window, persisted as JSON"""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self.shards = {}
+        if os.path.exists(path):
+            with open(path, "r") as f:
+                self.shards = json.load(f)
+
+    def save(self):
+        # Written to a temp file and renamed, so a crash never leaves a torn checkpoint
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, "w") as f:
+            json.dump(self.shards, f)
+        os.replace(temp_path, self.path)
+
+    def update(self, key, next_page):
+        """Record a shard's next page (0 = finished)"""
+        with self._lock:
+            self.shards[key] = next_page
+            self.save()
+
+    def split(self, key, halves):
+        """Replace a shard with its halves, both starting from page 1"""
+        with self._lock:
+            self.shards.pop(key, None)
+            for half in halves:
+                self.shards[_key(half)] = 1
+            self.save()
+
+    def clear(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+class _OpenPage:
+    """A listed page whose events are not all confirmed yet"""
+
+    def __init__(self, next_page, event_ids):
+        self.next_page = next_page
+        self.pending = set(event_ids)
+
+class ShardedListing:
+    """Lists a Tripleseat date window as concurrently paged shards"""
+
+    def __init__(self, integration, shard_days=30, concurrency=4, split_pages=20):
+        self.integration = integration
+        self.shard_days = shard_days
+        # Shards listed at once; bounded by the Tripleseat rate limit rather than by CPU
+        self.concurrency = concurrency
+        # A shard with more pages than this is split in half (until it is a single day)
+        self.split_pages = split_pages
+        self.stats = {"shards": 0, "splits": 0, "pages": 0, "duplicates": 0}
+        self._lock = threading.Lock()
+        self._checkpoint = None
+        # Per shard, its listed pages in order, awaiting confirmation of their events
+        self._open_pages = {}
+        self._page_of = {}
+        self._listed = False
+
+    def _checkpoint_path(self, start_date, end_date):
+        name = f"listing-{start_date:%Y%m%d}-{end_date:%Y%m%d}.json"
+        return os.path.join(sync_state_dir(self.integration.tenant_name), "checkpoints", name)
+
+    def iter_events(self, start_date, end_date, resume=True):
+        """Yield every event in start_date..end_date (MM/DD/YYYY) once, resuming from the checkpoint
+
+        A page is checkpointed once the consumer has confirmed all its events (see confirm),
+        and the checkpoint is removed once every page is.
+        """
+        start = datetime.strptime(start_date, DATE_FORMAT).date()
+        end = datetime.strptime(end_date, DATE_FORMAT).date()
+        path = self._checkpoint_path(start, end)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        checkpoint = ShardCheckpoint(path)
+        with self._lock:
+            self._checkpoint = checkpoint
+            self._open_pages = {}
+            self._page_of = {}
+            self._listed = False
+        if not resume or not checkpoint.shards:
+            checkpoint.shards = {_key(shard): 1 for shard in split_window(start, end, self.shard_days)}
+            checkpoint.save()
+        else:
+            print(f"Resuming listing from checkpoint {path}")
+
+        work = queue.Queue()
+        pending = [0]
+        pending_lock = threading.Lock()
+        for key, next_page in checkpoint.shards.items():
+            if next_page:
+                work.put((_parse_key(key), next_page))
+                pending[0] += 1
+        self.stats["shards"] = pending[0]
+        if not pending[0]:
+            checkpoint.clear()
+            return
+
+        # Bounded, so listing pauses while the consumer is busy (backpressure)
+        pages = queue.Queue(maxsize=self.concurrency * 2)
+        stop = threading.Event()
+
+        def finish_shard():
+            with pending_lock:
+                pending[0] -= 1
+                if pending[0] == 0:
+                    work.put(None)
+                    pages.put(None)
+
+        def worker():
+            while not stop.is_set():
+                item = work.get()
+                if item is None:
+                    work.put(None)  # let the other workers see the end too
+                    return
+                shard, page = item
+                key = _key(shard)
+                first, last = (day.strftime(DATE_FORMAT) for day in shard)
+                while not stop.is_set():
+                    events, total_pages = self.integration.get_tripleseat_events_page(page, first, last)
+                    if events is None:
+                        pages.put(RuntimeError(f"Failed to list Tripleseat events for {key} at page {page}"))
+                        return
+                    if page == 1 and total_pages > self.split_pages and shard[0] < shard[1]:
+                        # Rebalance: hand both halves to whichever workers are free
+                        middle = shard[0] + (shard[1] - shard[0]) // 2
+                        halves = ((shard[0], middle), (middle + timedelta(days=1), shard[1]))
+                        print(f"Shard {key} has {total_pages} pages; splitting")
+                        checkpoint.split(key, halves)
+                        with pending_lock:
+                            pending[0] += 2
+                            self.stats["splits"] += 1
+                            self.stats["shards"] += 2
+                        for half in halves:
+                            work.put((half, 1))
+                        break
+                    last_page = not events or page >= total_pages
+                    pages.put((key, page, total_pages, events, last_page))
+                    if last_page:
+                        break
+                    page += 1
+                finish_shard()
+
+        threads = [threading.Thread(target=worker, daemon=True) for _ in range(self.concurrency)]
+        for thread in threads:
+            thread.start()
+
+        seen = set()
+        try:
+            while True:
+                item = pages.get()
+                if item is None:
+                    break
+                if isinstance(item, Exception):
+                    raise item
+                key, page, total_pages, events, last_page = item
+                self.stats["pages"] += 1
+                print(f"Shard {key} page {page}/{total_pages}: {len(events)} events")
+                fresh = []
+                for event in events:
+                    event_id = int(event["id"])
+                    if event_id in seen:
+                        self.stats["duplicates"] += 1
+                        continue
+                    seen.add(event_id)
+                    fresh.append(event)
+                # Opened before any event is yielded, since the consumer may confirm straight away
+                self._open(key, 0 if last_page else page + 1, fresh)
+                yield from fresh
+        finally:
+            stop.set()
+            # Unblock workers waiting on a full page queue so they can exit
+            while any(thread.is_alive() for thread in threads):
+                try:
+                    pages.get(timeout=0.1)
+                except queue.Empty:
+                    pass
+                work.put(None)
+
+        with self._lock:
+            self._listed = True
+            if not self._open_pages:
+                checkpoint.clear()
+        print(f"Sharded listing: {self.stats['shards']} shards ({self.stats['splits']} splits), "
+              f"{self.stats['pages']} pages, {self.stats['duplicates']} duplicates dropped")
+
+    def confirm(self, tripleseat_id):
+        """Mark a yielded event as done downstream (written, unchanged, failed or dead-lettered)"""
+        try:
+            event_id = int(tripleseat_id)
+        except (TypeError, ValueError):
+            return
+        with self._lock:
+            entry = self._page_of.pop(event_id, None)
+            if entry is None:
+                return
+            key, page = entry
+            page.pending.discard(event_id)
+            self._commit(key)
+
+    def _open(self, key, next_page, events):
+        """Track a page handed to the consumer until all its events are confirmed"""
+        page = _OpenPage(next_page, (int(event["id"]) for event in events))
+        with self._lock:
+            self._open_pages.setdefault(key, deque()).append(page)
+            for event_id in page.pending:
+                self._page_of[event_id] = (key, page)
+            self._commit(key)
+
+    def _commit(self, key):
+        """Advance a shard's checkpoint past its leading fully confirmed pages (caller holds the lock)"""
+        pages = self._open_pages[key]
+        while pages and not pages[0].pending:
+            self._checkpoint.update(key, pages.popleft().next_page)
+        if not pages:
+            del self._open_pages[key]
+            if self._listed and not self._open_pages:
+                self._checkpoint.clear()
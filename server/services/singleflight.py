@@ -0,0 +1,90 @@
+# Single-flight coalescing: concurrent calls for the same key share one in-flight execution.
+# A call that arrives while a run is in flight and reports a newer change queues exactly one
+# follow-up run (with the newest arguments), however many such calls arrive.
+import threading
+
+class _Flight:
+    """One run for a key: what to call, and its outcome once done"""
+
+    __slots__ = ("func", "args", "done", "result", "error", "follow_up")
+
+    def __init__(self, func, args):
+        self.func = func
+        self.args = args
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.follow_up = None
+
+class SingleFlight:
+    """Deduplicates concurrent work per key and exposes coalescing counters"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flights = {}
+        self.stats = {"executed": 0, "coalesced": 0, "follow_ups": 0}
+
+    def do(self, key, func, *args, changed=False):
+        """Run func(*args) for `key`, or wait for the run already in flight and share its result
+
+        Pass changed=True when the caller knows of a change the in-flight run may have missed
+        (e.g. a webhook); it then waits for the single queued follow-up run instead.
+        """
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is None:
+                flight = self._flights[key] = _Flight(func, args)
+                leader = True
+            else:
+                self.stats["coalesced"] += 1
+                leader = False
+                if changed:
+                    if flight.follow_up is None:
+                        flight.follow_up = _Flight(func, args)
+                    else:
+                        # Newest change wins; everyone waiting shares that run
+                        flight.follow_up.func, flight.follow_up.args = func, args
+                    flight = flight.follow_up
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+
+        while True:
+            self._run(flight)
+            with self._lock:
+                follow_up = flight.follow_up
+                if follow_up is None:
+                    del self._flights[key]
+                else:
+                    # Promote the queued follow-up to be the in-flight run for this key
+                    self._flights[key] = follow_up
+                    self.stats["follow_ups"] += 1
+            flight.done.set()
+            if follow_up is None:
+                if flight.error is not None:
+                    raise flight.error
+                return flight.result
+            flight = follow_up
+
+    def _run(self, flight):
+        """Execute one flight, capturing its result or exception for all waiters"""
+        with self._lock:
+            self.stats["executed"] += 1
+        try:
+            flight.result = flight.func(*flight.args)
+        except Exception as e:
+            flight.error = e
+
+    def in_flight(self):
+        """Number of keys currently running"""
+        with self._lock:
+            return len(self._flights)
+
+    def report(self):
+        """Print how many calls were coalesced onto in-flight runs"""
+        stats = dict(self.stats)
+        print(f"Single-flight: executed {stats['executed']}, coalesced {stats['coalesced']}, "
+              f"follow-up runs {stats['follow_ups']}")
@@ -0,0 +1,134 @@
+# Typed sync errors and the retry policy they drive. Transient failures (network, 5xx, 429)
+# are retried with backoff, an expired token is refreshed once, and permanent failures
+# (4xx validation, not-found) fail fast so they can be dead-lettered without eating retries.
+import time
+import random
+import threading
+
+import requests
+
+class SyncError(Exception):
+    """A failed Tripleseat or Host Hub call"""
+
+    retryable = False
+    reason = "error"
+
+    def __init__(self, message, status=None, retry_after=None):
+        super().__init__(message)
+        self.status = status
+        self.retry_after = retry_after
+
+class TransientError(SyncError):
+    """Network error, timeout or 5xx: likely to succeed if retried"""
+
+    retryable = True
+    reason = "transient"
+
+class RateLimitError(TransientError):
+    """429: retry after the server's Retry-After delay"""
+
+    reason = "rate_limited"
+
+class AuthExpiredError(SyncError):
+    """401: refresh the token and retry once"""
+
+    reason = "auth_expired"
+
+class PermanentError(SyncError):
+    """4xx the same request will always get (validation, conflict, forbidden)"""
+
+    reason = "rejected"
+
+class NotFoundError(PermanentError):
+    """404/410: the resource does not exist"""
+
+    reason = "not_found"
+
+def _retry_after(response):
+    value = response.headers.get("Retry-After")
+    try:
+        return float(value) if value else None
+    except ValueError:
+        return None
+
+def classify_response(service, response):
+    """Typed error for a non-success HTTP response"""
+    status = response.status_code
+    message = f"{service} returned {status}: {response.text[:200]}"
+    if status == 401:
+        return AuthExpiredError(message, status)
+    if status in (404, 410):
+        return NotFoundError(message, status)
+    if status == 429:
+        return RateLimitError(message, status, _retry_after(response))
+    if status in (408, 425) or status >= 500:
+        return TransientError(message, status, _retry_after(response))
+    return PermanentError(message, status)
+
+def classify_exception(service, error):
+    """Typed error for an exception raised while calling a service"""
+    if isinstance(error, SyncError):
+        return error
+    if isinstance(error, (requests.ConnectionError, requests.Timeout)):
+        return TransientError(f"{service} unreachable: {error}")
+    return SyncError(f"{service} call failed: {error}")
+
+class RetryPolicy:
+    """Runs calls with retries chosen by error type"""
+
+    def __init__(self, max_attempts=4, base_delay=0.5, max_delay=30.0):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.stats = {"retries": 0, "rate_limited": 0, "auth_refreshes": 0, "failed_fast": 0, "exhausted": 0}
+        self._lock = threading.Lock()
+
+    def _count(self, key):
+        with self._lock:
+            self.stats[key] += 1
+
+    def _backoff(self, attempt):
+        """Full-jitter exponential backoff"""
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+    def call(self, func, *args, on_auth_expired=None):
+        """Return func(*args), retrying transient errors and refreshing auth once; raises SyncError
+
+        on_auth_expired() should refresh credentials and return True when it got new ones.
+        """
+        refreshed = False
+        attempt = 0
+        while True:
+            try:
+                return func(*args)
+            except SyncError as e:
+                error = e
+            except Exception as e:
+                error = classify_exception("request", e)
+
+            if isinstance(error, AuthExpiredError) and on_auth_expired and not refreshed:
+                refreshed = True
+                self._count("auth_refreshes")
+                if on_auth_expired():
+                    continue
+            if not error.retryable:
+                if isinstance(error, PermanentError):
+                    self._count("failed_fast")
+                raise error
+
+            attempt += 1
+            if attempt >= self.max_attempts:
+                self._count("exhausted")
+                raise error
+            if isinstance(error, RateLimitError):
+                self._count("rate_limited")
+            self._count("retries")
+            delay = error.retry_after if error.retry_after is not None else self._backoff(attempt)
+            print(f"{error} - retrying in {delay:.1f}s (attempt {attempt + 1}/{self.max_attempts})")
+            time.sleep(min(delay, self.max_delay))
+
+    def report(self):
+        """Print retry decisions by type"""
+        stats = dict(self.stats)
+        print(f"Retries: {stats['retries']} (rate limited {stats['rate_limited']}), auth refreshes "
+              f"{stats['auth_refreshes']}, failed fast {stats['failed_fast']}, gave up {stats['exhausted']}")
@@ -0,0 +1,165 @@
+# Deadline-aware priority scheduler for event syncs.
+# Pending syncs are ordered by SLA tier (how soon the event starts), then by start time,
+# so a party starting in two hours jumps ahead of bookings six months out. Events that have
+# already started go last, most recent first: an old booking edited after the fact must not
+# hold up one that is about to begin.
+import heapq
+import itertools
+import threading
+import time
+from datetime import datetime
+
+class SyncTier:
+    """An SLA tier: events starting within `horizon` seconds must be synced within `freshness` seconds"""
+
+    def __init__(self, name, horizon, freshness):
+        self.name = name
+        self.horizon = horizon
+        self.freshness = freshness
+
+DEFAULT_TIERS = [
+    SyncTier("today", 24 * 3600, 15 * 60),
+    SyncTier("week", 7 * 24 * 3600, 2 * 3600),
+    SyncTier("later", float("inf"), 24 * 3600),
+]
+
+# Events whose start time has passed
+PAST_TIER = SyncTier("past", 0, 7 * 24 * 3600)
+
+def event_start_timestamp(event_data):
+    """Local start time of a raw Tripleseat event as a Unix timestamp, or None if unparseable"""
+    event_date = event_data.get('event_date')  # "3/13/2025"
+    start_time = event_data.get('event_start_time') or "12:00 AM"  # "10:00 AM"
+    if not event_date:
+        return None
+    try:
+        return datetime.strptime(f"{event_date} {start_time.strip().upper()}", "%m/%d/%Y %I:%M %p").timestamp()
+    except ValueError:
+        return None
+
+class ScheduledSync:
+    """One pending sync in the scheduler"""
+
+    __slots__ = ("event_id", "starts_at", "tier", "enqueued_at", "deadline", "payload", "cancelled")
+
+    def __init__(self, event_id, starts_at, tier, enqueued_at, payload=None):
+        self.event_id = event_id
+        self.starts_at = starts_at
+        self.tier = tier
+        self.enqueued_at = enqueued_at
+        self.deadline = enqueued_at + tier.freshness
+        # Raw Tripleseat event or mapped EventRecord, if the caller already has one
+        self.payload = payload
+        self.cancelled = False
+
+class DeadlineScheduler:
+    """Thread-safe priority queue of pending syncs with per-tier freshness metrics"""
+
+    def __init__(self, tiers=None, clock=time.time, past_tier=PAST_TIER):
+        self.tiers = tiers or DEFAULT_TIERS
+        self.past_tier = past_tier
+        self.clock = clock
+        self._heap = []
+        self._queued = {}
+        self._sequence = itertools.count()
+        self._condition = threading.Condition()
+        self._closed = False
+        self.metrics = {tier.name: {"queued": 0, "completed": 0, "missed": 0, "max_lateness": 0.0}
+                        for tier in self.tiers + [past_tier]}
+
+    def tier_for(self, starts_at):
+        """Pick the SLA tier for an event starting at `starts_at` (unknown start -> last tier, started -> past tier)"""
+        if starts_at is None:
+            return self.tiers[-1]
+        until_start = starts_at - self.clock()
+        if until_start < 0:
+            return self.past_tier
+        for tier in self.tiers:
+            if until_start <= tier.horizon:
+                return tier
+        return self.tiers[-1]
+
+    def submit(self, event_id, starts_at=None, payload=None):
+        """Queue a sync; re-submitting a queued event refreshes its data but keeps its original deadline"""
+        event_id = str(event_id)
+        with self._condition:
+            previous = self._queued.get(event_id)
+            if previous:
+                previous.cancelled = True
+
+            tier = self.tier_for(starts_at)
+            enqueued_at = previous.enqueued_at if previous else self.clock()
+            item = ScheduledSync(event_id, starts_at, tier, enqueued_at, payload)
+            if tier is self.past_tier:
+                # After every upcoming event, most recently started first
+                key = (len(self.tiers), -starts_at)
+            else:
+                key = (self.tiers.index(tier), starts_at if starts_at is not None else float("inf"))
+            heapq.heappush(self._heap, key + (next(self._sequence), item))
+            self._queued[event_id] = item
+            if not previous:
+                self.metrics[tier.name]["queued"] += 1
+            self._condition.notify()
+            return item
+
+    def submit_event(self, event):
+        """Queue a raw Tripleseat event, deriving its priority from event_date/event_start_time"""
+        return self.submit(event.get('id'), event_start_timestamp(event), event)
+
+    def pop(self, timeout=None):
+        """Take the most urgent pending sync, waiting up to `timeout`; None when closed/empty"""
+        with self._condition:
+            end = None if timeout is None else self.clock() + timeout
+            while True:
+                while self._heap:
+                    item = heapq.heappop(self._heap)[-1]
+                    if not item.cancelled:
+                        del self._queued[item.event_id]
+                        return item
+                if self._closed:
+                    return None
+                remaining = None if end is None else end - self.clock()
+                if remaining is not None and remaining <= 0:
+                    return None
+                self._condition.wait(remaining)
+
+    def complete(self, item):
+        """Record completion of a popped sync against its freshness deadline"""
+        lateness = self.clock() - item.deadline
+        with self._condition:
+            stats = self.metrics[item.tier.name]
+            stats["completed"] += 1
+            if lateness > 0:
+                stats["missed"] += 1
+                stats["max_lateness"] = max(stats["max_lateness"], lateness)
+
+    def close(self):
+        """Stop accepting waits; pop() returns None once the queue drains"""
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+
+    def drain(self):
+        """Close the scheduler and take every sync not yet started, most urgent first"""
+        with self._condition:
+            self._closed = True
+            pending = []
+            while self._heap:
+                item = heapq.heappop(self._heap)[-1]
+                if not item.cancelled:
+                    pending.append(item)
+            self._queued.clear()
+            self._condition.notify_all()
+            return pending
+
+    def __len__(self):
+        with self._condition:
+            return len(self._queued)
+
+    def report(self):
+        """Print per-tier completion and missed-deadline counts"""
+        print("Sync freshness by tier:")
+        for tier in self.tiers + [self.past_tier]:
+            stats = self.metrics[tier.name]
+            print(f"  {tier.name:<6} queued: {stats['queued']}  completed: {stats['completed']}  "
+                  f"missed deadline: {stats['missed']}  worst lateness: {stats['max_lateness']:.0f}s")
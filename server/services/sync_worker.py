@@ -0,0 +1,250 @@
+# Resident Tripleseat -> Host Hub sync worker. Polls Tripleseat for upcoming events and syncs
+# changed ones on a worker pool, most urgent first, keeping one integration (pooled connections,
+# tokens, caches) for its whole life.
+#
+# SIGTERM/SIGINT: stop intake, persist syncs not yet started to the retry queue, give in-flight
+# syncs until the drain deadline to finish, persist any still running, and exit. The next worker
+# re-queues the retry queue on startup, so a deploy loses no syncs. A retried sync that fails
+# again stays queued with exponential backoff, and is dead-lettered once attempts run out.
+# SIGHUP: reload settings from the environment/.env (credentials, facility mapping, write limits,
+# worker count, poll interval) in place, without dropping connections or still-valid tokens.
+#
+# Usage:
+#   python sync_worker.py --workers 8 --interval 300 --window-days 14
+import os
+import sys
+import time
+import signal
+import argparse
+import threading
+from datetime import date, timedelta
+
+from tripleseatv4 import TripleseatHostHubIntegration
+from bulk_sync import BulkSync
+from sync_scheduler import DeadlineScheduler, event_start_timestamp
+from retry_queue import RetryQueue
+
+class SyncWorker:
+    """Long-running sync loop with graceful drain (SIGTERM) and hot reload (SIGHUP)"""
+
+    def __init__(self, integration, workers=8, interval=300, window_days=14, drain_timeout=25):
+        self.integration = integration
+        self.sync = BulkSync(integration, io_workers=workers)
+        self.scheduler = DeadlineScheduler()
+        self.retry_queue = RetryQueue.from_env(integration.tenant_name)
+        # Target pool size; workers above it exit after their current sync
+        self.workers = workers
+        # Seconds between Tripleseat polls, and how many days ahead each poll covers
+        self.interval = interval
+        self.window_days = window_days
+        # Seconds in-flight syncs get to finish after SIGTERM
+        self.drain_timeout = drain_timeout
+        self.stats = {"written": 0, "failed": 0}
+        self._threads = {}
+        # id(item) -> Tripleseat ID of each sync being run (one event can be in two syncs)
+        self._in_flight = {}
+        self._retrying = set()
+        self._lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._reload = threading.Event()
+        self._wake = threading.Event()
+
+    def _on_stop(self, signum, frame):
+        print(f"Received {signal.Signals(signum).name}; draining")
+        self._stopping.set()
+        self._wake.set()
+
+    def _on_reload(self, signum, frame):
+        self._reload.set()
+        self._wake.set()
+
+    def install_signal_handlers(self):
+        """Handlers only set flags; the main loop does the work outside signal context"""
+        signal.signal(signal.SIGTERM, self._on_stop)
+        signal.signal(signal.SIGINT, self._on_stop)
+        if hasattr(signal, "SIGHUP"):
+            signal.signal(signal.SIGHUP, self._on_reload)
+
+    def submit(self, event_id, event=None):
+        """Queue a sync (e.g. from a webhook); False once the worker is draining
+
+        Without the event's payload the booking is re-fetched, so its cached mapping is dropped
+        rather than served for the rest of its TTL.
+        """
+        if self._stopping.is_set():
+            return False
+        if event is not None:
+            self.scheduler.submit_event(event)
+        else:
+            self.integration.invalidate_event(event_id)
+            self.scheduler.submit(event_id)
+        return True
+
+    def _start_workers(self):
+        """Bring the pool up to the target size"""
+        with self._lock:
+            for index in range(self.workers):
+                thread = self._threads.get(index)
+                if thread is None or not thread.is_alive():
+                    thread = threading.Thread(target=self._work, args=(index,), daemon=True)
+                    self._threads[index] = thread
+                    thread.start()
+
+    def _work(self, index):
+        while index < self.workers:
+            item = self.scheduler.pop(timeout=1.0)
+            if item is None:
+                if self._stopping.is_set():
+                    return
+                continue
+            with self._lock:
+                self._in_flight[id(item)] = item.event_id
+            try:
+                success = self.sync.sync_item(item)
+            except Exception as e:
+                print(f"Error syncing Tripleseat event {item.event_id}: {str(e)}")
+                success = False
+            with self._lock:
+                del self._in_flight[id(item)]
+                retried = item.event_id in self._retrying
+                self._retrying.discard(item.event_id)
+                self.stats["written" if success else "failed"] += 1
+            if retried:
+                self._retried(item.event_id, success)
+            self.scheduler.complete(item)
+
+    def _retried(self, event_id, success):
+        """Settle a retry-queue sync: drop it on success, otherwise back off (or give up)"""
+        if success:
+            self.retry_queue.remove(event_id)
+        elif not self.retry_queue.retry_later(event_id, "retry failed"):
+            print(f"Giving up on Tripleseat event {event_id} after {self.retry_queue.max_attempts} attempts")
+            self.integration.dead_letter(event_id, ["sync still failing after retries"], reason="retries_exhausted")
+
+    def requeue_retries(self):
+        """Queue the retry-queue syncs that are due (on startup: those a previous worker left unfinished)"""
+        with self._lock:
+            due = [event_id for event_id in self.retry_queue.due() if event_id not in self._retrying]
+            self._retrying.update(due)
+        if due:
+            print(f"Re-queueing {len(due)} syncs from the retry queue")
+        for event_id in due:
+            self.scheduler.submit(event_id)
+
+    def poll(self):
+        """List upcoming events and queue those that differ from what Host Hub was last sent"""
+        start = date.today()
+        end = start + timedelta(days=self.window_days)
+        synced_state = self.integration.synced_state
+        queued = unchanged = 0
+        try:
+            for event in self.integration.iter_tripleseat_events(f"{start:%m/%d/%Y}", f"{end:%m/%d/%Y}"):
+                if self._stopping.is_set():
+                    return
+                record, errors = self.integration.map_event(event)
+                if errors:
+                    self.integration.dead_letter(event.get('id'), errors)
+                    continue
+                if synced_state and synced_state.get(record.tripleseat_id) == record.to_host_hub():
+                    unchanged += 1
+                    continue
+                self.scheduler.submit(record.tripleseat_id, event_start_timestamp(event), record)
+                queued += 1
+        except Exception as e:
+            print(f"Tripleseat poll failed: {str(e)}")
+            return
+        print(f"Polled {start}..{end}: {queued} queued, {unchanged} unchanged, {len(self.scheduler)} pending")
+
+    def reload(self):
+        """Apply changed settings without restarting"""
+        changed = self.integration.reload_config()
+        workers = int(os.getenv("SYNC_WORKERS", self.workers))
+        if workers != self.workers:
+            self.workers = workers
+            self._start_workers()
+            changed.append(f"{workers} workers")
+        interval = float(os.getenv("SYNC_POLL_INTERVAL", self.interval))
+        if interval != self.interval:
+            self.interval = interval
+            changed.append(f"{interval:.0f}s poll interval")
+        print(f"Configuration reloaded: {', '.join(changed) or 'no changes'}")
+
+    def drain(self):
+        """Persist queued syncs, wait for in-flight ones until the deadline, persist the rest; True if none were cut off"""
+        not_started = [item.event_id for item in self.scheduler.drain()]
+        if not_started:
+            self.retry_queue.add(not_started, "shutdown: not started")
+            print(f"Saved {len(not_started)} queued syncs to the retry queue")
+
+        deadline = time.monotonic() + self.drain_timeout
+        for thread in list(self._threads.values()):
+            thread.join(max(0, deadline - time.monotonic()))
+
+        with self._lock:
+            unfinished = sorted(set(self._in_flight.values()))
+        if unfinished:
+            # Writes are idempotent, so replaying a sync that did complete is harmless
+            self.retry_queue.add(unfinished, "shutdown: in flight at drain deadline")
+            print(f"Saved {len(unfinished)} in-flight syncs to the retry queue after {self.drain_timeout:.0f}s")
+        return not unfinished
+
+    def run(self):
+        """Sync until SIGTERM, then drain; returns False only when the worker could not start"""
+        if not self.integration.refresh_tokens_if_needed():
+            print("Failed to obtain required authentication tokens")
+            return False
+        self.requeue_retries()
+        self._start_workers()
+
+        next_poll = time.monotonic()
+        while not self._stopping.is_set():
+            if self._reload.is_set():
+                self._reload.clear()
+                self.reload()
+            if time.monotonic() >= next_poll:
+                self.poll()
+                next_poll = time.monotonic() + self.interval
+            self.requeue_retries()
+            # Wake for the next poll, or earlier when a backed-off retry falls due
+            wait = next_poll - time.monotonic()
+            next_retry = self.retry_queue.next_due()
+            if next_retry is not None:
+                wait = min(wait, next_retry - time.time())
+            self._wake.wait(max(1.0, wait))
+            self._wake.clear()
+
+        # Whatever the drain could not finish is in the retry queue, so stopping is still clean
+        self.drain()
+        self.report()
+        return True
+
+    def report(self):
+        print("\n=== SYNC WORKER STOPPED ===")
+        for key, value in self.stats.items():
+            print(f"{key}: {value}")
+        print(f"retry queue: {len(self.retry_queue)}")
+        self.scheduler.report()
+        if self.integration.mapped_cache:
+            self.integration.mapped_cache.report()
+        self.integration.write_limiter.report()
+        self.integration.retry_policy.report()
+
+def main():
+    """Command line entry point for the resident sync worker"""
+    parser = argparse.ArgumentParser(description="Run a resident Tripleseat -> Host Hub sync worker")
+    parser.add_argument("--workers", type=int, default=int(os.getenv("SYNC_WORKERS", "8")),
+                        help="Concurrent event syncs (SYNC_WORKERS; reloadable)")
+    parser.add_argument("--interval", type=float, default=float(os.getenv("SYNC_POLL_INTERVAL", "300")),
+                        help="Seconds between Tripleseat polls (SYNC_POLL_INTERVAL; reloadable)")
+    parser.add_argument("--window-days", type=int, default=14, help="Days ahead each poll covers")
+    parser.add_argument("--drain-timeout", type=float, default=float(os.getenv("SYNC_DRAIN_TIMEOUT", "25")),
+                        help="Seconds in-flight syncs get to finish on SIGTERM")
+    args = parser.parse_args()
+
+    worker = SyncWorker(TripleseatHostHubIntegration(verbose=False), args.workers, args.interval,
+                        args.window_days, args.drain_timeout)
+    worker.install_signal_handlers()
+    sys.exit(0 if worker.run() else 1)
+
+if __name__ == "__main__":
+    main()
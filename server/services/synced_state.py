@@ -0,0 +1,54 @@
+# Last state successfully synced to Host Hub per Tripleseat event, kept in SQLite, so updates
+# can PATCH just the fields that changed in Tripleseat instead of PUTting the whole document.
+import os
+import time
+import sqlite3
+import threading
+
+import json_codec
+from tripleseat_cache import state_path
+
+class SyncedStateStore:
+    """Tripleseat ID -> last synced Host Hub payload"""
+
+    def __init__(self, path):
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS synced (tripleseat_id TEXT PRIMARY KEY, payload BLOB NOT NULL, synced_at REAL NOT NULL)"
+        )
+
+    @classmethod
+    def from_env(cls, tenant=None):
+        """Build the store from environment settings, or return None when PATCH updates are disabled"""
+        if os.getenv("HOST_HUB_PATCH_UPDATES", "1") == "0":
+            return None
+        return cls(state_path("SYNCED_STATE_DB", "synced.db", tenant))
+
+    def get(self, tripleseat_id):
+        """Last synced payload for an event, or None"""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT payload FROM synced WHERE tripleseat_id = ?", (str(tripleseat_id),)
+            ).fetchone()
+        return json_codec.loads(row[0]) if row else None
+
+    def put(self, tripleseat_id, payload):
+        """Record the payload Host Hub now holds for an event"""
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO synced (tripleseat_id, payload, synced_at) VALUES (?, ?, ?)",
+                (str(tripleseat_id), json_codec.dumps(payload), time.time())
+            )
+
+    def forget(self, tripleseat_id):
+        """Drop an event's state (e.g. it no longer exists in Host Hub)"""
+        with self._lock:
+            self._db.execute("DELETE FROM synced WHERE tripleseat_id = ?", (str(tripleseat_id),))
+
+    def close(self):
+        with self._lock:
+            self._db.close()
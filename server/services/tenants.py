@@ -0,0 +1,324 @@
+# Multi-tenant Tripleseat -> Host Hub sync. Each tenant is a separate Tripleseat account with its
+# own credentials, tokens, rate limit, facility mapping and state directory (HTTP cache, archive,
+# checkpoints, dead letters). One process syncs every tenant on a shared worker pool: work is
+# dispatched round-robin and each tenant is capped at its own concurrency, so one big account
+# cannot starve the others, and adding a tenant adds workers instead of needing a new process.
+#
+# Tenants are read from a JSON file (SYNC_TENANTS_FILE, default tenants.json):
+#   [{"name": "baltimore",
+#     "client_id_env": "TRIPLESEAT_CLIENT_ID_BALTIMORE", "client_secret_env": "TRIPLESEAT_CLIENT_SECRET_BALTIMORE",
+#     "facilities": {"Wonderfly Arena Timonium": "67db7fe6faf97218df1f9d96"},
+#     "requests_per_second": 2, "burst": 10, "concurrency": 4}]
+#
+# Each tenant runs under its own run lock; a tenant on the single account in the environment
+# shares bulk_sync's "tripleseat-sync" lock, so the two entry points never sync one account at once.
+#
+# Usage:
+#   python tenants.py --start-date 06/01/2025 --end-date 06/30/2025
+import os
+import sys
+import time
+import argparse
+import threading
+from collections import Counter, deque
+from datetime import datetime
+
+from dotenv import load_dotenv
+
+import json_codec
+from tripleseatv4 import TripleseatHostHubIntegration
+from adaptive_limit import AIMDLimiter
+from sharded_listing import ShardedListing
+from run_lock import RunLease
+
+class TokenBucket:
+    """Requests-per-second limit with bursts; acquire() blocks until a request may be sent"""
+
+    def __init__(self, rate, burst=None):
+        self.rate = rate
+        self.capacity = burst or max(1, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.waited = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            # Reserve a token now and sleep off any debt outside the lock, so waiters queue in order
+            self.tokens -= 1
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0
+            self.waited += wait
+        if wait:
+            time.sleep(wait)
+
+class Tenant:
+    """One Tripleseat account and the Host Hub facilities its venues map to"""
+
+    def __init__(self, name, client_id, client_secret, facility_ids, requests_per_second=None, burst=None,
+                 concurrency=4):
+        self.name = name
+        self.client_id = client_id
+        self.client_secret = client_secret
+        self.facility_ids = facility_ids
+        self.bucket = TokenBucket(requests_per_second, burst) if requests_per_second else None
+        # Events of this tenant synced at once; also its share of the worker pool
+        self.concurrency = concurrency
+
+    @property
+    def lock_name(self):
+        """Run lock for this Tripleseat account, the same one bulk_sync takes for the environment's account"""
+        if self.client_id == os.getenv("TRIPLESEAT_CLIENT_ID"):
+            return "tripleseat-sync"
+        return f"tripleseat-sync:{self.name}"
+
+    @classmethod
+    def from_config(cls, config):
+        """Build a tenant from one config entry; credentials may be given inline or as env var names"""
+        name = config["name"]
+        client_id = config.get("client_id") or os.getenv(config.get("client_id_env", ""))
+        client_secret = config.get("client_secret") or os.getenv(config.get("client_secret_env", ""))
+        if not client_id or not client_secret:
+            raise ValueError(f"Tenant {name} has no Tripleseat client credentials")
+        if not config.get("facilities"):
+            raise ValueError(f"Tenant {name} has no facilities")
+        return cls(name, client_id, client_secret, config["facilities"], config.get("requests_per_second"),
+                   config.get("burst"), int(config.get("concurrency", 4)))
+
+def load_tenants(path=None):
+    """Tenants from the JSON config file"""
+    load_dotenv()
+    path = path or os.getenv("SYNC_TENANTS_FILE", "tenants.json")
+    with open(path, "rb") as f:
+        configs = json_codec.loads(f.read())
+    tenants = [Tenant.from_config(config) for config in configs]
+    names = [tenant.name for tenant in tenants]
+    if len(set(names)) != len(names):
+        raise ValueError("Tenant names must be unique (they name each tenant's state directory)")
+    return tenants
+
+class FairScheduler:
+    """Round-robin dispatch of per-tenant work, each tenant capped at its own concurrency
+
+    Every tenant's work is pulled from its iterator by a producer thread into a small buffer,
+    so a slow listing only delays that tenant.
+    """
+
+    def __init__(self, prefetch=64):
+        self.prefetch = prefetch
+        self._condition = threading.Condition()
+        self._ring = deque()
+        self._buffers = {}
+        self._in_flight = {}
+        self._limits = {}
+        self._producing = set()
+        # Tenants whose listing raised, with the error; their remaining work is never produced
+        self.failed = {}
+
+    def add(self, name, items, concurrency):
+        """Start feeding a tenant's work items into the scheduler"""
+        with self._condition:
+            self._ring.append(name)
+            self._buffers[name] = deque()
+            self._in_flight[name] = 0
+            self._limits[name] = concurrency
+            self._producing.add(name)
+        threading.Thread(target=self._produce, args=(name, items), daemon=True).start()
+
+    def _produce(self, name, items):
+        buffer = self._buffers[name]
+        try:
+            for item in items:
+                with self._condition:
+                    # Bounded, so a tenant's listing pauses while its work is queued (backpressure)
+                    while len(buffer) >= self.prefetch:
+                        self._condition.wait()
+                    buffer.append(item)
+                    self._condition.notify_all()
+        except Exception as e:
+            print(f"Tenant {name}: listing failed: {e}")
+            with self._condition:
+                self.failed[name] = e
+        finally:
+            with self._condition:
+                self._producing.discard(name)
+                self._condition.notify_all()
+
+    def next(self):
+        """Block until some tenant under its cap has work; returns (tenant name, item), or None when all is done"""
+        with self._condition:
+            while True:
+                for _ in range(len(self._ring)):
+                    name = self._ring[0]
+                    self._ring.rotate(-1)
+                    if self._buffers[name] and self._in_flight[name] < self._limits[name]:
+                        self._in_flight[name] += 1
+                        self._condition.notify_all()
+                        return name, self._buffers[name].popleft()
+                if not self._producing and not any(self._buffers.values()):
+                    return None
+                self._condition.wait()
+
+    def done(self, name):
+        """Mark one of a tenant's items finished, freeing its slot"""
+        with self._condition:
+            self._in_flight[name] -= 1
+            self._condition.notify_all()
+
+class MultiTenantSync:
+    """Syncs the events of several Tripleseat accounts on one fair worker pool"""
+
+    def __init__(self, tenants, shard_days=30, shard_concurrency=2):
+        self.tenants = tenants
+        self.shard_days = shard_days
+        self.shard_concurrency = shard_concurrency
+        # Host Hub is shared, so its adaptive write limit is too; per-tenant caps keep access to it fair
+        self.write_limiter = AIMDLimiter.from_env()
+        self.integrations = {}
+        # Each tenant's sharded listing, told as its events are synced so it can checkpoint
+        self.listings = {}
+        self.stats = {tenant.name: Counter() for tenant in tenants}
+        self._stats_lock = threading.Lock()
+
+    def _count(self, name, key):
+        """Thread-safe stats increment (workers of several tenants update them at once)"""
+        with self._stats_lock:
+            self.stats[name][key] += 1
+
+    def _integration(self, tenant):
+        integration = TripleseatHostHubIntegration(tenant=tenant, verbose=False)
+        integration.write_limiter = self.write_limiter
+        return integration
+
+    def _listing(self, integration, start_date=None, end_date=None):
+        if start_date and end_date:
+            listing = ShardedListing(integration, self.shard_days, self.shard_concurrency)
+            self.listings[integration.tenant_name] = listing
+            return listing.iter_events(start_date, end_date)
+        return integration.iter_tripleseat_events(start_date, end_date)
+
+    def _sync_one(self, name, event_data):
+        integration = self.integrations[name]
+        self._count(name, "events")
+        record, errors = integration.map_event(event_data)
+        if errors:
+            integration.dead_letter(event_data.get('id'), errors)
+            self._count(name, "invalid")
+        elif integration.upsert_event(record.to_host_hub(), changed=False, sync_meta=record.sync_meta()):
+            self._count(name, "synced")
+        else:
+            self._count(name, "failed")
+
+    def _worker(self, scheduler):
+        while True:
+            work = scheduler.next()
+            if work is None:
+                return
+            name, event_data = work
+            try:
+                self._sync_one(name, event_data)
+            except Exception as e:
+                print(f"Tenant {name}: error syncing event {event_data.get('id')}: {e}")
+                self._count(name, "failed")
+            finally:
+                if name in self.listings:
+                    self.listings[name].confirm(event_data.get('id'))
+                scheduler.done(name)
+
+    def run(self, start_date=None, end_date=None):
+        """Sync every tenant's events in the window (MM/DD/YYYY); returns per-tenant stats
+
+        A tenant whose account is already being synced (its run lock is held) is left out.
+        """
+        scheduler = FairScheduler()
+        leases = []
+        try:
+            for tenant in self.tenants:
+                lease = RunLease(tenant.lock_name)
+                if not lease.acquire():
+                    print(f"Tenant {tenant.name}: another '{tenant.lock_name}' run is active, skipping")
+                    self.stats[tenant.name]["busy"] = 1
+                    continue
+                leases.append(lease)
+                integration = self._integration(tenant)
+                if not integration.tripleseat_token or not integration.host_hub_token:
+                    print(f"Tenant {tenant.name}: authentication failed, skipping")
+                    self.stats[tenant.name]["skipped"] = 1
+                    continue
+                self.integrations[tenant.name] = integration
+                scheduler.add(tenant.name, self._listing(integration, start_date, end_date), tenant.concurrency)
+
+            # One worker per tenant slot: throughput grows with the number of tenants
+            workers = [
+                threading.Thread(target=self._worker, args=(scheduler,), daemon=True)
+                for _ in range(sum(tenant.concurrency for tenant in self.tenants if tenant.name in self.integrations))
+            ]
+            for worker in workers:
+                worker.start()
+            for worker in workers:
+                worker.join()
+            for name in scheduler.failed:
+                # The listing stopped early, so some of the tenant's events were never synced
+                self.stats[name]["listing_failed"] = 1
+        finally:
+            for lease in leases:
+                lease.release()
+        return self.stats
+
+    def report(self):
+        """Print per-tenant results"""
+        for tenant in self.tenants:
+            stats = self.stats[tenant.name]
+            if stats["busy"]:
+                print(f"Tenant {tenant.name}: skipped, its account was already being synced")
+                continue
+            waited = f", waited {tenant.bucket.waited:.1f}s for rate limit" if tenant.bucket else ""
+            listing = " (listing failed; incomplete)" if stats["listing_failed"] else ""
+            print(f"Tenant {tenant.name}: {stats['events']} events, {stats['synced']} synced, "
+                  f"{stats['invalid']} invalid, {stats['failed']} failed{waited}{listing}")
+        self.write_limiter.report()
+
+def _tripleseat_date(value):
+    """MM/DD/YYYY (as bulk_sync takes it) or YYYY-MM-DD -> the MM/DD/YYYY Tripleseat expects"""
+    if not value:
+        return None
+    for date_format in ("%m/%d/%Y", "%Y-%m-%d"):
+        try:
+            return datetime.strptime(value, date_format).strftime("%m/%d/%Y")
+        except ValueError:
+            pass
+    raise argparse.ArgumentTypeError(f"Invalid date {value!r}; use MM/DD/YYYY")
+
+def main():
+    """Command line entry point for multi-tenant syncs"""
+    parser = argparse.ArgumentParser(description="Sync the events of every configured Tripleseat account")
+    parser.add_argument("--tenants", help="Tenant config file (default: SYNC_TENANTS_FILE or tenants.json)")
+    parser.add_argument("--only", help="Comma-separated tenant names to sync")
+    parser.add_argument("--start-date", "--from", dest="date_from", type=_tripleseat_date,
+                        help="First event date (MM/DD/YYYY; YYYY-MM-DD also accepted)")
+    parser.add_argument("--end-date", "--to", dest="date_to", type=_tripleseat_date,
+                        help="Last event date (MM/DD/YYYY; YYYY-MM-DD also accepted)")
+    parser.add_argument("--shard-days", type=int, default=30, help="Days per listing shard")
+    parser.add_argument("--shard-concurrency", type=int, default=2, help="Shards listed at once per tenant")
+    args = parser.parse_args()
+
+    tenants = load_tenants(args.tenants)
+    if args.only:
+        wanted = set(args.only.split(","))
+        tenants = [tenant for tenant in tenants if tenant.name in wanted]
+    if not tenants:
+        print("No tenants to sync")
+        sys.exit(1)
+
+    sync = MultiTenantSync(tenants, args.shard_days, args.shard_concurrency)
+    started = time.perf_counter()
+    stats = sync.run(args.date_from, args.date_to)
+    print(f"\n=== MULTI-TENANT SYNC: {len(tenants)} tenants in {time.perf_counter() - started:.1f}s ===")
+    sync.report()
+    failed = any(s["failed"] or s["invalid"] or s["skipped"] or s["listing_failed"] for s in stats.values())
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+# Run from server/services: python -m unittest discover tests
+import unittest
+
+from sync_scheduler import DeadlineScheduler
+
+NOW = 1_750_000_000.0
+HOUR = 3600
+DAY = 24 * HOUR
+
+class DeadlineSchedulerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.scheduler = DeadlineScheduler(clock=lambda: NOW)
+
+    def test_past_events_go_after_upcoming_ones(self):
+        self.scheduler.submit("old", NOW - 200 * DAY)
+        self.scheduler.submit("later", NOW + 90 * DAY)
+        self.scheduler.submit("soon", NOW + 2 * HOUR)
+
+        self.assertEqual(self.scheduler.tier_for(NOW - 200 * DAY).name, "past")
+        self.assertEqual([self.scheduler.pop(0).event_id for _ in range(3)], ["soon", "later", "old"])
+
+    def test_past_events_most_recent_first(self):
+        self.scheduler.submit("last-year", NOW - 365 * DAY)
+        self.scheduler.submit("this-morning", NOW - 3 * HOUR)
+
+        self.assertEqual([self.scheduler.pop(0).event_id for _ in range(2)], ["this-morning", "last-year"])
+
+    def test_upcoming_events_by_tier_then_start(self):
+        self.scheduler.submit("next-week", NOW + 5 * DAY)
+        self.scheduler.submit("tonight", NOW + 8 * HOUR)
+        self.scheduler.submit("in-an-hour", NOW + HOUR)
+        self.scheduler.submit("unknown")
+
+        self.assertEqual([self.scheduler.pop(0).event_id for _ in range(4)],
+                         ["in-an-hour", "tonight", "next-week", "unknown"])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,115 @@
+# Disk-backed conditional-request cache for Tripleseat GETs.
+# Stores the body with its ETag/Last-Modified, revalidates with If-None-Match/If-Modified-Since,
+# serves 304s from disk and evicts least-recently-used entries past a size limit.
+import os
+import time
+import threading
+
+import json_codec
+
+try:
+    import diskcache
+except ImportError:  # cache is optional; get_tripleseat_event works without it
+    diskcache = None
+
+DEFAULT_SIZE_LIMIT = 256 * 1024 * 1024  # bytes
+
+def sync_state_dir(tenant=None):
+    """Directory for local sync state (HTTP cache, archives, locks), or a tenant's own subdirectory"""
+    base = os.getenv("SYNC_STATE_DIR", ".sync")
+    return os.path.join(base, "tenants", tenant) if tenant else base
+
+def state_path(env_var, name, tenant=None):
+    """Path of one piece of sync state: the env override, else `name` in the (tenant's) state directory
+
+    Overrides apply to the single-account sync only, so tenants never share a file.
+    """
+    if tenant is None and os.getenv(env_var):
+        return os.getenv(env_var)
+    return os.path.join(sync_state_dir(tenant), name)
+
+class TripleseatResponseCache:
+    """Size-bounded LRU response cache keyed by request URL"""
+
+    def __init__(self, directory, size_limit=DEFAULT_SIZE_LIMIT, max_age=0):
+        self.cache = diskcache.Cache(directory, size_limit=size_limit, eviction_policy="least-recently-used")
+        # Seconds a cached entry is trusted without revalidation (0 = always revalidate)
+        self.max_age = max_age
+        self.stats = {"hits": 0, "not_modified": 0, "misses": 0, "bytes_saved": 0, "bytes_downloaded": 0}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls, tenant=None):
+        """Build the cache from environment settings, or return None when disabled/unavailable"""
+        if os.getenv("TRIPLESEAT_HTTP_CACHE", "1") == "0":
+            return None
+        if diskcache is None:
+            print("diskcache not installed; Tripleseat response cache disabled")
+            return None
+        directory = state_path("TRIPLESEAT_HTTP_CACHE_DIR", "http-cache", tenant)
+        size_limit = int(os.getenv("TRIPLESEAT_HTTP_CACHE_BYTES", DEFAULT_SIZE_LIMIT))
+        max_age = float(os.getenv("TRIPLESEAT_HTTP_CACHE_MAX_AGE", "0"))
+        return cls(directory, size_limit, max_age)
+
+    def _count(self, key, amount=1):
+        with self._lock:
+            self.stats[key] += amount
+
+    def lookup(self, url):
+        """Return the cached entry for a URL, or None"""
+        return self.cache.get(url)
+
+    def is_fresh(self, entry):
+        """True when the entry can be served without asking Tripleseat"""
+        return self.max_age > 0 and time.time() - entry["stored_at"] < self.max_age
+
+    def validators(self, entry):
+        """Conditional request headers for a cached entry"""
+        headers = {}
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def hit(self, entry):
+        """Serve a fresh entry without a request"""
+        self._count("hits")
+        self._count("bytes_saved", len(entry["body"]))
+        return json_codec.loads(entry["body"])
+
+    def not_modified(self, url, entry):
+        """Serve a 304 from cache and refresh the entry's age"""
+        self._count("not_modified")
+        self._count("bytes_saved", len(entry["body"]))
+        entry["stored_at"] = time.time()
+        self.cache.set(url, entry)
+        return json_codec.loads(entry["body"])
+
+    def store(self, url, response):
+        """Record a full 200 response; only responses with validators are cached"""
+        self._count("misses")
+        self._count("bytes_downloaded", len(response.content))
+        etag = response.headers.get("ETag")
+        last_modified = response.headers.get("Last-Modified")
+        if not etag and not last_modified:
+            return
+        self.cache.set(url, {
+            "etag": etag,
+            "last_modified": last_modified,
+            "body": response.content,
+            "stored_at": time.time()
+        })
+
+    def report(self):
+        """Print hit/304/miss ratios and bandwidth saved"""
+        stats = dict(self.stats)
+        total = stats["hits"] + stats["not_modified"] + stats["misses"]
+        if not total:
+            return
+        print("Tripleseat HTTP cache:")
+        print(f"  hits: {stats['hits']} ({stats['hits'] / total:.0%})  "
+              f"304s: {stats['not_modified']} ({stats['not_modified'] / total:.0%})  "
+              f"misses: {stats['misses']} ({stats['misses'] / total:.0%})")
+        print(f"  bytes saved: {stats['bytes_saved']}  bytes downloaded: {stats['bytes_downloaded']}")
+        print(f"  Tripleseat quota saved (no request at all): {stats['hits']}")
@@ -21,7 +21,7 @@ class TripleseatHostHubIntegration:
         self.host_hub_port = os.getenv("PORT", "5002")
         self.host_hub_api_url = f"http://localhost:{self.host_hub_port}/api"
         self.admin_username = os.getenv("HOST_HUB_ADMIN_USERNAME", "admin")
-        self.admin_password = os.getenv("HOST_HUB_ADMIN_PASSWORD", "admin123")
+        self.admin_password = os.getenv("HOST_HUB_ADMIN_PASSWORD")
         
         # Facility mapping
         self.facility_ids = {
@@ -1,78 +1,221 @@
 # this script works and checks for duplicates and updates if it exists... but... times and dates are wrong
 import requests
-import json
+from requests.adapters import HTTPAdapter
+import hashlib
 import os
 import time
 import sys
-from datetime import datetime
-from dotenv import load_dotenv
+from datetime import datetime, timezone
+from concurrent.futures import ThreadPoolExecutor
+from dotenv import load_dotenv, dotenv_values
+import json_codec
+from tripleseat_cache import TripleseatResponseCache
+from event_record import EventRecord
+from payload_archive import PayloadArchive
+from singleflight import SingleFlight
+from run_lock import run_exclusive
+from host_hub_health import HostHubHealthMonitor
+from adaptive_limit import AIMDLimiter
+from synced_state import SyncedStateStore
+from event_diff import diff_fields
+from event_schema import EventValidator
+from dead_letter import DeadLetterQueue
+from mapped_cache import MappedEventCache, content_hash
+from sync_errors import (
+    SyncError, AuthExpiredError, PermanentError, RetryPolicy, classify_response, classify_exception
+)
+
+# Host Hub facility per venue name, unless SYNC_FACILITY_IDS (JSON) overrides it; the first is the default
+DEFAULT_FACILITY_IDS = {
+    "Wonderfly Arena Timonium": "67db7fe6faf97218df1f9d96",
+    "Wonderfly Arena Arbutus": "67db7fe6faf97218df1f9d97"
+}
+
+# Key stamped on raw Tripleseat events with the Unix time they were fetched (sync freshness)
+FETCHED_AT_KEY = "_fetched_at"
 
 class TripleseatHostHubIntegration:
-    def __init__(self):
+    def __init__(self, authenticate=True, facility_ids=None, verbose=True, tenant=None):
         # Load environment variables
         load_dotenv()
+        # Variables this process took from .env (not set by the real environment), for reload_config
+        self._dotenv_keys = {key for key, value in dotenv_values().items() if os.environ.get(key) == value}
         
-        # Tripleseat credentials
-        self.tripleseat_client_id = os.getenv("TRIPLESEAT_CLIENT_ID")
-        self.tripleseat_client_secret = os.getenv("TRIPLESEAT_CLIENT_SECRET")
+        # Per-event conversion logging; bulk runs turn this off
+        self.verbose = verbose
+        
+        # Tripleseat account: a tenant from the multi-tenant config, or the single account in the environment
+        self.tenant_name = tenant.name if tenant else None
+        if tenant:
+            self.tripleseat_client_id = tenant.client_id
+            self.tripleseat_client_secret = tenant.client_secret
+            facility_ids = facility_ids or tenant.facility_ids
+        else:
+            self.tripleseat_client_id = os.getenv("TRIPLESEAT_CLIENT_ID")
+            self.tripleseat_client_secret = os.getenv("TRIPLESEAT_CLIENT_SECRET")
         self.tripleseat_base_url = os.getenv("TRIPLESEAT_BASE_URL", "https://api.tripleseat.com/v1/")
         
+        # Per-account Tripleseat rate limit shared by every request of this integration (None = unlimited)
+        self.tripleseat_bucket = tenant.bucket if tenant else None
+        
         # Host Hub settings
         self.host_hub_port = os.getenv("PORT", "5002")
         self.host_hub_api_url = f"http://localhost:{self.host_hub_port}/api"
+        # Service API key (preferred: no login round trip); admin credentials are the fallback
+        self.service_key = os.getenv("HOST_HUB_SERVICE_KEY")
         self.admin_username = os.getenv("HOST_HUB_ADMIN_USERNAME", "admin")
-        self.admin_password = os.getenv("HOST_HUB_ADMIN_PASSWORD", "admin123")
+        self.admin_password = os.getenv("HOST_HUB_ADMIN_PASSWORD")
         
-        # Facility mapping
-        self.facility_ids = {
-            "Wonderfly Arena Timonium": "67db7fe6faf97218df1f9d96",
-            "Wonderfly Arena Arbutus": "67db7fe6faf97218df1f9d97"
-        }
+        # Facility mapping (and the pre-flight validator that checks against it)
+        self._set_facility_ids(facility_ids or self._facility_ids_from_env())
+        
+        # Pooled HTTP session shared by all requests (and bulk I/O workers)
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=32)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        
+        # Conditional-request cache for Tripleseat GETs (None when disabled)
+        self.response_cache = TripleseatResponseCache.from_env(self.tenant_name) if authenticate else None
+        
+        # Append-only archive of raw Tripleseat responses for offline replay (None when disabled)
+        self.archive = PayloadArchive.from_env(self.tenant_name) if authenticate else None
+        
+        # Coalesces concurrent syncs of the same Tripleseat event (webhooks, manual and scheduled runs)
+        self.single_flight = SingleFlight()
+        
+        # Host Hub readiness: marked by every Host Hub response, probed in the background only when down
+        self.health = HostHubHealthMonitor(self.session, self.host_hub_api_url)
+        self.session.hooks["response"].append(self.health.observe)
+        self.host_hub_ready_timeout = float(os.getenv("HOST_HUB_READY_TIMEOUT", "30"))
+        
+        # Adaptive (AIMD) limit on concurrent Host Hub writes, driven by their latency and 5xx rate
+        self.write_limiter = AIMDLimiter.from_env()
+        
+        # Events that cannot be delivered (e.g. invalid mappings) are recorded here instead of sent
+        self.dead_letters = DeadLetterQueue.from_env(self.tenant_name) if authenticate else None
+        
+        # Last synced payload per event, so updates PATCH only changed fields (None when disabled)
+        self.synced_state = SyncedStateStore.from_env(self.tenant_name) if authenticate else None
+        
+        # Fetched and mapped events kept in memory, so repeated triggers skip Tripleseat and the mapping
+        self.mapped_cache = MappedEventCache.from_env() if authenticate else None
+        
+        # Retries by error type: transient errors back off, permanent ones fail fast
+        self.retry_policy = RetryPolicy()
         
         # Auth tokens
         self.tripleseat_token = None
         self.host_hub_token = None
         
-        # Initialize with retries
-        self._initialize_tokens()
+        # Initialize with retries (skipped for offline conversion workers)
+        if authenticate:
+            self._initialize_tokens()
+    
+    def _facility_ids_from_env(self):
+        """Venue name -> Host Hub facility ID from SYNC_FACILITY_IDS, or the defaults"""
+        configured = os.getenv("SYNC_FACILITY_IDS")
+        return json_codec.loads(configured) if configured else dict(DEFAULT_FACILITY_IDS)
+    
+    def _set_facility_ids(self, facility_ids):
+        self.facility_ids = facility_ids
+        # Location keyword per facility ("Wonderfly Arena Arbutus" -> "arbutus"); the first facility is the default
+        self.facility_keywords = [(name.split()[-1].lower(), name) for name in facility_ids]
+        # Pre-flight schema validation of mapped events (None when disabled or pydantic is missing)
+        self.validator = EventValidator.create(facility_ids) if os.getenv("SYNC_VALIDATE", "1") != "0" else None
+    
+    def reload_config(self):
+        """Re-read settings from the environment and .env in place; returns the names of what changed
+        
+        The HTTP session (pooled connections), response caches and any token whose credentials
+        did not change are kept, so a long-running worker can reload without a cold start.
+        Tenant integrations keep the account settings of their tenant.
+        """
+        # .env now wins over its earlier values, and a variable removed from it is unset
+        # rather than left at its old value
+        values = dotenv_values()
+        for key in self._dotenv_keys - values.keys():
+            os.environ.pop(key, None)
+        self._dotenv_keys = set(values)
+        load_dotenv(override=True)
+        changed = []
+        
+        if self.tenant_name is None:
+            credentials = (os.getenv("TRIPLESEAT_CLIENT_ID"), os.getenv("TRIPLESEAT_CLIENT_SECRET"))
+            if credentials != (self.tripleseat_client_id, self.tripleseat_client_secret):
+                self.tripleseat_client_id, self.tripleseat_client_secret = credentials
+                # The old token belongs to the old client
+                self.tripleseat_token = self._get_tripleseat_token()
+                changed.append("Tripleseat credentials")
+            
+            facility_ids = self._facility_ids_from_env()
+            if facility_ids != self.facility_ids:
+                self._set_facility_ids(facility_ids)
+                if self.mapped_cache:
+                    self.mapped_cache.clear()
+                changed.append("facility mapping")
+        
+        host_hub_auth = (os.getenv("HOST_HUB_SERVICE_KEY"), os.getenv("HOST_HUB_ADMIN_USERNAME", "admin"),
+                         os.getenv("HOST_HUB_ADMIN_PASSWORD"))
+        if host_hub_auth != (self.service_key, self.admin_username, self.admin_password):
+            self.service_key, self.admin_username, self.admin_password = host_hub_auth
+            self.host_hub_token = self._get_host_hub_token()
+            changed.append("Host Hub credentials")
+        
+        limits = AIMDLimiter.from_env()
+        if self.write_limiter.reconfigure(limits.max_limit, limits.target_p95):
+            changed.append("Host Hub write limits")
+        
+        return changed
     
     def _initialize_tokens(self):
         """Initialize both authentication tokens with retries"""
         max_retries = 3
-        retry_delay = 2  # seconds
         
-        # Get Tripleseat token
-        for attempt in range(max_retries):
-            try:
-                self.tripleseat_token = self._get_tripleseat_token()
-                if self.tripleseat_token:
-                    break
-            except Exception as e:
-                print(f"Tripleseat auth attempt {attempt+1}/{max_retries} failed: {str(e)}")
-                if attempt < max_retries - 1:
-                    print(f"Retrying in {retry_delay} seconds...")
-                    time.sleep(retry_delay)
-        
-        if not self.tripleseat_token:
-            print("Failed to authenticate with Tripleseat after multiple attempts")
+        # Get Tripleseat token: network errors and 5xx are retried, rejected credentials are not
+        try:
+            self.tripleseat_token = self.retry_policy.call(self._request_tripleseat_token)
+        except SyncError as e:
+            print(f"Failed to authenticate with Tripleseat: {e}")
             
-        # Get Host Hub token
+        # Get Host Hub token: try straight away, and if Host Hub is down wait for the health
+        # monitor to see it come back (up to the deadline) instead of sleeping a fixed interval
+        deadline = time.monotonic() + self.host_hub_ready_timeout
         for attempt in range(max_retries):
-            try:
-                self.host_hub_token = self._get_host_hub_token()
-                if self.host_hub_token:
-                    break
-            except Exception as e:
-                print(f"Host Hub auth attempt {attempt+1}/{max_retries} failed: {str(e)}")
-                if attempt < max_retries - 1:
-                    print(f"Retrying in {retry_delay} seconds...")
-                    time.sleep(retry_delay)
+            if not self.health.wait_ready(max(0, deadline - time.monotonic())):
+                print(f"Host Hub not ready after {self.host_hub_ready_timeout:.0f} seconds")
+                break
+            self.host_hub_token = self._get_host_hub_token()
+            if self.host_hub_token or self.health.is_ready():
+                # Either authenticated, or Host Hub answered and refused: retrying won't help
+                break
+            print(f"Host Hub auth attempt {attempt+1}/{max_retries} failed")
         
         if not self.host_hub_token:
             print("Failed to authenticate with Host Hub after multiple attempts")
     
+    def _tripleseat_request(self, method, url, **kwargs):
+        """Send one Tripleseat request, first waiting for this account's rate limit"""
+        if self.tripleseat_bucket:
+            self.tripleseat_bucket.acquire()
+        return self.session.request(method, url, **kwargs)
+    
     def _get_tripleseat_token(self):
-        """Get Tripleseat API access token"""
+        """Get Tripleseat API access token, or None on failure"""
+        try:
+            return self._request_tripleseat_token()
+        except SyncError as e:
+            print(f"Error getting Tripleseat token: {e}")
+            return None
+    
+    def _refresh_tripleseat_token(self):
+        """Replace an expired Tripleseat token; True when a new one was obtained"""
+        print("Tripleseat token rejected, refreshing...")
+        self.tripleseat_token = self._get_tripleseat_token()
+        return bool(self.tripleseat_token)
+    
+    def _request_tripleseat_token(self):
+        """Get Tripleseat API access token; raises a SyncError describing the failure"""
         token_url = "https://api.tripleseat.com/oauth/token"
         
         payload = {
@@ -82,31 +225,28 @@ class TripleseatHostHubIntegration:
         }
         
         print("Getting Tripleseat auth token...")
-        response = requests.post(token_url, json=payload, timeout=10)
+        try:
+            response = self._tripleseat_request("POST", token_url, data=json_codec.dumps(payload), headers={"Content-Type": "application/json"}, timeout=10)
+        except Exception as e:
+            raise classify_exception("Tripleseat", e)
         
+        if response.status_code in (400, 401, 403):
+            # Bad client credentials: refreshing or retrying cannot fix this
+            raise PermanentError(f"Tripleseat rejected the client credentials: {response.text[:200]}", response.status_code)
         if response.status_code != 200:
-            print(f"Error getting Tripleseat token: {response.status_code}")
-            print(response.text)
-            return None
+            raise classify_response("Tripleseat", response)
             
-        token = response.json().get("access_token")
+        token = json_codec.loads(response.content).get("access_token")
         if token:
             print("Successfully obtained Tripleseat token")
         return token
     
     def _get_host_hub_token(self):
-        """Get Host Hub authentication token"""
-        # First check if the API is responsive
-        try:
-            test_url = f"{self.host_hub_api_url}/test"
-            test_response = requests.get(test_url, timeout=10)
-            if test_response.status_code != 200:
-                print(f"Host Hub API test failed: {test_response.status_code}")
-                return None
-            
-            print("Host Hub API is responsive")
-        except Exception as e:
-            print(f"Error testing Host Hub API: {str(e)}")
+        """Get Host Hub authentication token (the service key itself when one is configured)"""
+        if self.service_key:
+            return self.service_key
+        if not self.admin_password:
+            print("Set HOST_HUB_SERVICE_KEY (or HOST_HUB_ADMIN_PASSWORD) to authenticate with Host Hub")
             return None
         
         # Authenticate with Host Hub
@@ -118,14 +258,14 @@ class TripleseatHostHubIntegration:
             }
             
             print(f"Authenticating with Host Hub...")
-            auth_response = requests.post(auth_url, json=auth_data, timeout=10)
+            auth_response = self.session.post(auth_url, data=json_codec.dumps(auth_data), headers={"Content-Type": "application/json"}, timeout=10)
             
             if auth_response.status_code != 200:
                 print(f"Host Hub authentication failed: {auth_response.status_code}")
                 print(auth_response.text)
                 return None
             
-            token = auth_response.json().get("token")
+            token = json_codec.loads(auth_response.content).get("token")
             if token:
                 print("Successfully authenticated with Host Hub")
                 return token
@@ -135,8 +275,18 @@ class TripleseatHostHubIntegration:
                 
         except Exception as e:
             print(f"Error during Host Hub authentication: {str(e)}")
+            self.health.observe_error(e)
             return None
     
+    def _refresh_host_hub_token(self):
+        """Replace an expired Host Hub token; True when a new one was obtained"""
+        if self.service_key:
+            # A rejected service key will not get better by resending it
+            return False
+        print("Host Hub token rejected, refreshing...")
+        self.host_hub_token = self._get_host_hub_token()
+        return bool(self.host_hub_token)
+    
     def refresh_tokens_if_needed(self):
         """Refresh authentication tokens if they're missing"""
         if not self.tripleseat_token:
@@ -149,75 +299,201 @@ class TripleseatHostHubIntegration:
         
         return self.tripleseat_token and self.host_hub_token
     
+    def _host_hub_headers(self):
+        """Request headers for authenticated Host Hub API calls"""
+        if self.service_key:
+            auth = {"X-Service-Key": self.service_key}
+        else:
+            auth = {"Authorization": f"Bearer {self.host_hub_token}"}
+        return {**auth, "Content-Type": "application/json"}
+    
+    def _tripleseat_headers(self):
+        """Request headers for authenticated Tripleseat API calls"""
+        return {
+            "Authorization": f"Bearer {self.tripleseat_token}",
+            "Content-Type": "application/json"
+        }
+    
     def get_tripleseat_event(self, event_id):
-        """Get event data from Tripleseat"""
-        if not self.tripleseat_token:
-            print("No Tripleseat authentication token available")
+        """Get event data from Tripleseat, or None on failure"""
+        try:
+            return self.fetch_tripleseat_event(event_id)
+        except SyncError as e:
+            print(f"Error fetching event from Tripleseat: {e}")
             return None
+    
+    def fetch_tripleseat_event(self, event_id):
+        """Get event data from Tripleseat with retries by error type; raises SyncError"""
+        return self.retry_policy.call(
+            self._fetch_tripleseat_event_once, event_id, on_auth_expired=self._refresh_tripleseat_token
+        )
+    
+    def _fetch_tripleseat_event_once(self, event_id):
+        """One attempt at fetching an event from Tripleseat; raises a typed SyncError"""
+        if not self.tripleseat_token:
+            raise AuthExpiredError("No Tripleseat authentication token available")
             
         url = f"{self.tripleseat_base_url}events/{event_id}.json"
+        headers = self._tripleseat_headers()
         
-        headers = {
-            "Authorization": f"Bearer {self.tripleseat_token}",
-            "Content-Type": "application/json"
-        }
+        # Serve from the conditional-request cache when possible
+        cached = self.response_cache.lookup(url) if self.response_cache else None
+        if cached and self.response_cache.is_fresh(cached):
+            # Content is as of when it was last confirmed with Tripleseat
+            return self._event_from_response(self.response_cache.hit(cached), cached["stored_at"])
+        if cached:
+            headers.update(self.response_cache.validators(cached))
         
+        print(f"Fetching event from Tripleseat API: {url}")
         try:
-            print(f"Fetching event from Tripleseat API: {url}")
-            response = requests.get(url, headers=headers, timeout=15)
-            
-            if response.status_code != 200:
-                print(f"Error fetching event from Tripleseat: {response.status_code}")
-                print(response.text)
-                return None
-            
+            response = self._tripleseat_request("GET", url, headers=headers, timeout=15)
+        except Exception as e:
+            raise classify_exception("Tripleseat", e)
+        
+        if response.status_code == 304 and cached:
+            # Unchanged since the last sync; reuse the stored body
+            response_data = self.response_cache.not_modified(url, cached)
+        elif response.status_code != 200:
+            raise classify_response("Tripleseat", response)
+        else:
             # Parse the response
-            response_data = response.json()
+            response_data = json_codec.loads(response.content)
+            if self.response_cache:
+                self.response_cache.store(url, response)
+            if self.archive:
+                self.archive.append(event_id, response.content)
+        
+        event_data = self._event_from_response(response_data, time.time())
+        print(f"Successfully retrieved event from Tripleseat: {event_data.get('name')}")
+        return event_data
+    
+    def _event_from_response(self, response_data, fetched_at):
+        """Unwrap the event from a Tripleseat response body and stamp when it was fetched"""
+        # The event data is nested inside the 'event' property
+        if 'event' not in response_data:
+            raise PermanentError("Tripleseat response doesn't contain event data in the expected format")
+        event_data = response_data['event']
+        event_data[FETCHED_AT_KEY] = fetched_at
+        return event_data
+    
+    def get_tripleseat_events_page(self, page, start_date=None, end_date=None):
+        """Get one page of the Tripleseat event listing as (events, total_pages), or (None, 0) on failure
+        
+        With a date window (MM/DD/YYYY) the search endpoint is used, otherwise the plain listing.
+        Failures are retried by type, like event fetches.
+        """
+        try:
+            return self.retry_policy.call(
+                self._fetch_events_page_once, page, start_date, end_date,
+                on_auth_expired=self._refresh_tripleseat_token
+            )
+        except SyncError as e:
+            print(f"Error listing events from Tripleseat (page {page}): {e}")
+            return None, 0
+    
+    def _fetch_events_page_once(self, page, start_date=None, end_date=None):
+        """One attempt at fetching a listing page; raises a typed SyncError"""
+        if not self.tripleseat_token:
+            raise AuthExpiredError("No Tripleseat authentication token available")
+        
+        params = {"page": page}
+        if start_date or end_date:
+            url = f"{self.tripleseat_base_url}events/search.json"
+            if start_date:
+                params["event_start_date"] = start_date
+            if end_date:
+                params["event_end_date"] = end_date
+        else:
+            url = f"{self.tripleseat_base_url}events.json"
+        
+        try:
+            response = self._tripleseat_request("GET", url, headers=self._tripleseat_headers(), params=params, timeout=30)
+        except Exception as e:
+            raise classify_exception("Tripleseat", e)
+        
+        if response.status_code != 200:
+            raise classify_response("Tripleseat", response)
+        
+        response_data = json_codec.loads(response.content)
+        
+        # Listing results may be bare events or wrapped as {"event": {...}}
+        results = response_data.get('results', response_data.get('events', []))
+        events = [item.get('event', item) for item in results]
+        if self.archive:
+            for event in events:
+                self.archive.append(event['id'], json_codec.dumps({"event": event}))
+        fetched_at = time.time()
+        for event in events:
+            event[FETCHED_AT_KEY] = fetched_at
+        total_pages = int(response_data.get('total_pages') or page)
+        return events, total_pages
+    
+    def iter_tripleseat_events(self, start_date=None, end_date=None, first_page=1):
+        """Yield Tripleseat events page by page, prefetching the next page in the background
+        
+        At most two pages are held in memory, so memory stays flat regardless of result size.
+        Consumers that stop pulling also stop the fetching (backpressure).
+        """
+        with ThreadPoolExecutor(max_workers=1) as prefetcher:
+            next_page = prefetcher.submit(self.get_tripleseat_events_page, first_page, start_date, end_date)
+            page = first_page
             
-            # The event data is nested inside the 'event' property
-            if 'event' in response_data:
-                event_data = response_data['event']
-                print(f"Successfully retrieved event from Tripleseat: {event_data.get('name')}")
-                return event_data
-            else:
-                print("Response doesn't contain event data in the expected format")
-                return None
+            while next_page is not None:
+                events, total_pages = next_page.result()
+                if events is None:
+                    raise RuntimeError(f"Failed to list Tripleseat events at page {page}")
                 
-        except Exception as e:
-            print(f"Error fetching event from Tripleseat: {str(e)}")
-            return None
+                # Start fetching page N+1 while the caller works through page N
+                next_page = None
+                if events and page < total_pages:
+                    next_page = prefetcher.submit(self.get_tripleseat_events_page, page + 1, start_date, end_date)
+                
+                print(f"Tripleseat listing page {page}/{total_pages}: {len(events)} events")
+                yield from events
+                page += 1
     
-    def _convert_date_format(self, date_str):
-        """Convert MM/DD/YYYY to ISO date format"""
-        if not date_str or "/" not in date_str:
-            return date_str
+    def _parse_date(self, date_str):
+        """Convert MM/DD/YYYY (or an ISO date) to a Unix timestamp at midnight UTC"""
+        if not date_str:
+            return None
             
         try:
-            date_parts = date_str.split("/")
-            month, day, year = int(date_parts[0]), int(date_parts[1]), int(date_parts[2])
-            date_obj = datetime(year, month, day)
-            iso_date = date_obj.strftime("%Y-%m-%dT00:00:00.000Z")
-            print(f"Converted date: {date_str} → {iso_date}")
-            return iso_date
+            if "/" in date_str:
+                date_parts = date_str.split("/")
+                month, day, year = int(date_parts[0]), int(date_parts[1]), int(date_parts[2])
+            else:
+                year, month, day = (int(part) for part in date_str.split("T")[0].split("-"))
+            # datetime rejects out-of-range days/months (2/30, 1/45) rather than rolling them over
+            timestamp = int(datetime(year, month, day, tzinfo=timezone.utc).timestamp())
+            if self.verbose:
+                print(f"Converted date: {date_str} → {timestamp}")
+            return timestamp
         except Exception as e:
             print(f"Error converting date {date_str}: {e}")
-            return date_str
+            return None
     
-    def _convert_time_format(self, date_str, time_str):
-        """Convert time (like "10:00 AM") to ISO format"""
-        if not time_str or not date_str:
-            return time_str
+    def _parse_updated_at(self, value):
+        """Tripleseat's ISO 8601 updated_at (e.g. "2025-03-10T15:30:00-05:00") as a Unix timestamp, or None"""
+        if not value:
+            return None
+        try:
+            return datetime.fromisoformat(value).timestamp()
+        except (TypeError, ValueError):
+            return None
+    
+    def _parse_time(self, date_ts, time_str):
+        """Convert a time (like "10:00 AM") on the given date to a Unix timestamp"""
+        if not time_str or date_ts is None:
+            return None
             
         try:
-            # Extract just the date part if it's a full ISO string
-            if "T" in date_str:
-                date_str = date_str.split("T")[0]
-                
             # Parse AM/PM time
             is_pm = "PM" in time_str.upper()
             time_parts = time_str.upper().replace("AM", "").replace("PM", "").strip().split(":")
             hours = int(time_parts[0])
             minutes = int(time_parts[1]) if len(time_parts) > 1 else 0
+            if not 0 <= minutes <= 59:
+                raise ValueError(f"minutes out of range: {minutes}")
             
             # Adjust for PM
             if is_pm and hours < 12:
@@ -225,16 +501,25 @@ class TripleseatHostHubIntegration:
             elif not is_pm and hours == 12:
                 hours = 0
                 
-            # Create ISO datetime string
-            iso_time = f"{date_str}T{hours:02d}:{minutes:02d}:00.000Z"
-            print(f"Converted time: {time_str} → {iso_time}")
-            return iso_time
+            timestamp = date_ts + hours * 3600 + minutes * 60
+            if self.verbose:
+                print(f"Converted time: {time_str} → {timestamp}")
+            return timestamp
         except Exception as e:
             print(f"Error converting time {time_str}: {e}")
-            return time_str
+            return None
     
-    def convert_to_host_hub_format(self, event_data):
-        """Convert Tripleseat event data to Host Hub format with proper data conversions"""
+    def _map_status(self, status):
+        """Map a Tripleseat status to Host Hub's Definite/Closed"""
+        mapped_status = "Definite"  # Default
+        if status:
+            status_norm = status.lower().strip()
+            if not ('definite' in status_norm or 'confirmed' in status_norm):
+                mapped_status = "Closed"
+        return mapped_status
+    
+    def convert_to_record(self, event_data):
+        """Convert Tripleseat event data to a compact EventRecord (the raw payload can then be dropped)"""
         if not event_data:
             return None
         
@@ -246,10 +531,11 @@ class TripleseatHostHubIntegration:
             event_start_time = event_data.get('event_start_time')  # "10:00 AM"
             event_end_time = event_data.get('event_end_time')  # "11:30 AM"
             
-            print(f"Processing event: {event_name}")
-            print(f"Event date: {event_date}")
-            print(f"Event start time: {event_start_time}")
-            print(f"Event end time: {event_end_time}")
+            if self.verbose:
+                print(f"Processing event: {event_name}")
+                print(f"Event date: {event_date}")
+                print(f"Event start time: {event_start_time}")
+                print(f"Event end time: {event_end_time}")
             
             # Get location
             location = None
@@ -257,164 +543,301 @@ class TripleseatHostHubIntegration:
                 location = event_data['location'].get('name', '')
             
             # Map facility name based on location
-            facility_name = "Wonderfly Arena Timonium"  # Default
+            facility_name = self.facility_keywords[0][1]  # Default
             if location:
                 norm_location = location.lower().strip()
-                if "arbutus" in norm_location:
-                    facility_name = "Wonderfly Arena Arbutus"
+                for keyword, name in self.facility_keywords:
+                    if keyword in norm_location:
+                        facility_name = name
+                        break
             
             # Map to facility ID
-            facility_id = self.facility_ids.get(facility_name)
-            if not facility_id:
-                print(f"WARNING: Unknown facility name: {facility_name}")
-                facility_id = next(iter(self.facility_ids.values()))
+            facility_id = self.facility_ids[facility_name]
             
             # Get description
             description = event_data.get('description', '')
             if not description:
                 description = f"Auto-created from Tripleseat Event ID: {event_id}"
             
-            # Convert date and time formats
-            iso_date = self._convert_date_format(event_date)
-            iso_start_time = self._convert_time_format(iso_date, event_start_time)
-            iso_end_time = self._convert_time_format(iso_date, event_end_time)
+            # Convert date and times to integer timestamps
+            date_ts = self._parse_date(event_date)
+            start_ts = self._parse_time(date_ts, event_start_time)
+            end_ts = self._parse_time(date_ts, event_end_time)
             
             # Map status
-            status = event_data.get('status', 'DEFINITE')
-            mapped_status = "Definite"  # Default
-            if status:
-                status_norm = status.lower().strip()
-                if not ('definite' in status_norm or 'confirmed' in status_norm):
-                    mapped_status = "Closed"
-            
-            # Create Host Hub event data
-            host_hub_event = {
-                "name": event_name,
-                "description": description,
-                "date": iso_date,
-                "startTime": iso_start_time,
-                "endTime": iso_end_time,
-                "status": mapped_status,
-                "facility": facility_id,
-                "tripleseatEventId": str(event_id)
-            }
-            
-            # Remove any None values
-            host_hub_event = {k: v for k, v in host_hub_event.items() if v is not None}
+            mapped_status = self._map_status(event_data.get('status', 'DEFINITE'))
             
-            print(f"Data formatted for Host Hub: {json.dumps(host_hub_event, indent=2)}")
-            return host_hub_event
+            return EventRecord(
+                event_id, event_name, description, facility_id, mapped_status, date_ts, start_ts, end_ts,
+                self._parse_updated_at(event_data.get('updated_at')), event_data.get(FETCHED_AT_KEY)
+            )
             
         except Exception as e:
             print(f"Error converting event data to Host Hub format: {str(e)}")
             return None
     
-    def check_if_event_exists(self, tripleseat_id):
-        """Check if an event with the given Tripleseat ID already exists in Host Hub"""
+    def convert_to_host_hub_format(self, event_data):
+        """Convert Tripleseat event data to Host Hub format with proper data conversions"""
+        record = self.convert_to_record(event_data)
+        if not record:
+            return None
+        
+        host_hub_event = record.to_host_hub()
+        if self.verbose:
+            print(f"Data formatted for Host Hub: {json_codec.dumps_pretty(host_hub_event)}")
+        return host_hub_event
+    
+    def map_event(self, event_data):
+        """Convert and validate an event before any write; returns (EventRecord or None, problems)
+        
+        Content already mapped (same hash) is served from the mapped-event cache.
+        """
+        if self.mapped_cache is None:
+            return self._map_event(event_data)
+        digest = content_hash(event_data, ignore=(FETCHED_AT_KEY,))
+        cached = self.mapped_cache.lookup(event_data.get('id'), digest)
+        if cached is not None:
+            record, errors = cached
+            if record is not None and event_data.get(FETCHED_AT_KEY):
+                record.fetched_ts = event_data[FETCHED_AT_KEY]
+            return record, errors
+        record, errors = self._map_event(event_data)
+        self.mapped_cache.put(event_data.get('id'), digest, record, errors)
+        return record, errors
+    
+    def _map_event(self, event_data):
+        record = self.convert_to_record(event_data)
+        if self.validator is None:
+            return record, [] if record else ["mapping: conversion failed"]
+        errors = self.validator.validate(event_data, record.to_host_hub() if record else None)
+        return (None if errors else record), errors
+    
+    def dead_letter(self, tripleseat_id, errors, reason="validation", payload=None):
+        """Route an undeliverable event to the dead-letter queue without calling Host Hub"""
+        if self.dead_letters:
+            self.dead_letters.add(tripleseat_id, reason, errors, payload)
+        else:
+            print(f"Rejected Tripleseat event {tripleseat_id} ({reason}): {'; '.join(errors)}")
+    
+    def get_host_hub_events_by_tripleseat_ids(self, tripleseat_ids):
+        """Get current Host Hub events for up to 500 Tripleseat IDs as {tripleseat_id: event}"""
         if not self.host_hub_token:
             print("No Host Hub authentication token available")
             return None
+        
+        batch_url = f"{self.host_hub_api_url}/events/tripleseat/batch"
+        headers = self._host_hub_headers()
+        
+        try:
+            response = self.session.post(batch_url, data=json_codec.dumps({"ids": [str(i) for i in tripleseat_ids]}), headers=headers, timeout=30)
             
-        find_url = f"{self.host_hub_api_url}/events/tripleseat/{tripleseat_id}"
-        headers = {
-            "Authorization": f"Bearer {self.host_hub_token}",
-            "Content-Type": "application/json"
-        }
+            if response.status_code != 200:
+                print(f"Error fetching Host Hub events in batch: {response.status_code}")
+                print(response.text)
+                return None
+            
+            events = json_codec.loads(response.content).get('events', [])
+            return {event['tripleseatEventId']: event for event in events}
+            
+        except Exception as e:
+            print(f"Error fetching Host Hub events in batch: {str(e)}")
+            return None
+    
+    def resolve_host_hub_events(self, tripleseat_ids):
+        """Resolve up to 500 Tripleseat IDs to {tripleseat_id: {_id, updatedAt, syncKey}} in one request"""
+        if not self.host_hub_token:
+            print("No Host Hub authentication token available")
+            return None
+        
+        exists_url = f"{self.host_hub_api_url}/events/tripleseat/exists"
+        headers = self._host_hub_headers()
         
         try:
-            print(f"Checking if event with Tripleseat ID {tripleseat_id} exists...")
-            find_response = requests.get(find_url, headers=headers, timeout=10)
-            
-            if find_response.status_code == 200:
-                # Event exists
-                response_data = find_response.json()
-                if 'event' in response_data and response_data['event']:
-                    existing_event = response_data['event']
-                    existing_id = existing_event.get('_id')
-                    print(f"Found existing event with Host Hub ID: {existing_id}")
-                    return existing_id
-                else:
-                    print("Response indicated event exists but no event data found")
-                    return None
-            elif find_response.status_code == 404:
-                # Event doesn't exist
-                print(f"No existing event found with Tripleseat ID {tripleseat_id}")
+            response = self.session.post(exists_url, data=json_codec.dumps({"ids": [str(i) for i in tripleseat_ids]}), headers=headers, timeout=30)
+            
+            if response.status_code != 200:
+                print(f"Error resolving Tripleseat IDs in Host Hub: {response.status_code}")
+                print(response.text)
                 return None
-            else:
-                print(f"Unexpected response when checking for event: {find_response.status_code}")
-                print(find_response.text)
+            
+            return json_codec.loads(response.content).get('events', {})
+            
+        except Exception as e:
+            print(f"Error resolving Tripleseat IDs in Host Hub: {str(e)}")
+            return None
+    
+    def is_unchanged_in_host_hub(self, event_data, resolved):
+        """True when Host Hub already holds exactly this payload (its last sync key matches)"""
+        existing = resolved.get(event_data.get('tripleseatEventId'))
+        return bool(existing) and existing.get('syncKey') == self._idempotency_key(event_data)
+    
+    def get_host_hub_tripleseat_ids(self, date_from=None, date_to=None, orphaned=False):
+        """Get the Tripleseat IDs of all live (not Closed) Host Hub events, optionally within a date window
+        (orphaned: only those flagged as orphaned)"""
+        if not self.host_hub_token:
+            print("No Host Hub authentication token available")
+            return None
+        
+        ids_url = f"{self.host_hub_api_url}/events/tripleseat/ids"
+        headers = self._host_hub_headers()
+        params = {key: value for key, value in (("from", date_from), ("to", date_to)) if value}
+        if orphaned:
+            params["orphaned"] = "1"
+        
+        try:
+            response = self.session.get(ids_url, headers=headers, params=params, timeout=60)
+            
+            if response.status_code != 200:
+                print(f"Error listing Host Hub Tripleseat IDs: {response.status_code}")
+                print(response.text)
                 return None
-                
+            
+            return json_codec.loads(response.content).get('ids', [])
+            
         except Exception as e:
-            print(f"Error checking if event exists: {str(e)}")
+            print(f"Error listing Host Hub Tripleseat IDs: {str(e)}")
             return None
     
-    def create_event_in_host_hub(self, event_data):
-        """Create or update event in Host Hub"""
+    def mark_host_hub_orphans(self, tripleseat_ids, action="flag"):
+        """Close or flag up to 500 Host Hub events whose Tripleseat booking is gone, or clear the flag of
+        those that reappeared (action "restore"); returns modified count"""
         if not self.host_hub_token:
             print("No Host Hub authentication token available")
-            return False
+            return None
         
+        orphans_url = f"{self.host_hub_api_url}/events/tripleseat/orphans"
+        headers = self._host_hub_headers()
+        payload = {"ids": [str(i) for i in tripleseat_ids], "action": action}
+        
+        try:
+            response = self.session.post(orphans_url, data=json_codec.dumps(payload), headers=headers, timeout=30)
+            
+            if response.status_code != 200:
+                print(f"Error marking orphaned events: {response.status_code}")
+                print(response.text)
+                return None
+            
+            # Orphaned bookings are gone from Tripleseat; restored ones changed there
+            for tripleseat_id in tripleseat_ids:
+                self.invalidate_event(tripleseat_id)
+            return json_codec.loads(response.content).get('modified', 0)
+            
+        except Exception as e:
+            print(f"Error marking orphaned events: {str(e)}")
+            return None
+    
+    def _idempotency_key(self, event_data):
+        """Stable key for an event payload, so Host Hub recognises retried or duplicate writes"""
+        return hashlib.sha256(json_codec.dumps_canonical(event_data)).hexdigest()
+    
+    def _write_to_host_hub(self, method, url, body, headers):
+        """Send one Host Hub write under the adaptive concurrency limit; network failures raise SyncError"""
+        with self.write_limiter.slot() as outcome:
+            try:
+                response = self.session.request(method, url, data=json_codec.dumps(body), headers=headers, timeout=15)
+            except Exception as e:
+                outcome.overloaded = isinstance(e, (requests.ConnectionError, requests.Timeout))
+                self.health.observe_error(e)
+                raise classify_exception("Host Hub", e)
+            outcome.overloaded = response.status_code >= 500
+        return response
+    
+    def _patch_event_in_host_hub(self, patch_url, event_data, previous, headers, freshness_headers):
+        """PATCH only the fields that changed since the last sync; None when the event is gone, SyncError on failure"""
+        changed = {field: event_data[field] for field in diff_fields(event_data, previous)}
+        print(f"Patching event in Host Hub at: {patch_url} (changed: {', '.join(changed) or 'nothing'})")
+        
+        # An empty PATCH still refreshes the sync key and confirms the event exists; it carries
+        # no freshness timestamps, so re-confirming an old booking doesn't count as sync lag
+        if changed:
+            headers = {**headers, **freshness_headers}
+        patch_response = self._write_to_host_hub("PATCH", patch_url, changed, headers)
+        if patch_response.status_code == 404:
+            self.synced_state.forget(event_data['tripleseatEventId'])
+            return None
+        if patch_response.status_code != 200:
+            raise classify_response("Host Hub", patch_response)
+        
+        host_hub_id = json_codec.loads(patch_response.content).get('event', {}).get('id')
+        print(f"Successfully patched existing event in Host Hub (ID: {host_hub_id})")
+        self.synced_state.put(event_data['tripleseatEventId'], event_data)
+        return True
+    
+    def create_event_in_host_hub(self, event_data, sync_meta=None):
+        """Create or update event in Host Hub: a PATCH of the changed fields after the first sync, else one atomic upsert
+        
+        Transient failures are retried and an expired token is refreshed; a request Host Hub
+        rejects outright (4xx) is dead-lettered at once instead of being retried. sync_meta
+        (EventRecord.sync_meta()) lets Host Hub record how stale the event was when written.
+        """
         tripleseat_id = event_data.get('tripleseatEventId')
         if not tripleseat_id:
             print("No Tripleseat ID in event data, cannot check for duplicates")
             return False
-            
-        # Check if the event already exists
-        existing_event_id = self.check_if_event_exists(tripleseat_id)
-        
-        headers = {
-            "Authorization": f"Bearer {self.host_hub_token}",
-            "Content-Type": "application/json"
-        }
         
         try:
-            if existing_event_id:
-                # Update existing event
-                update_url = f"{self.host_hub_api_url}/events/{existing_event_id}"
-                print(f"Updating existing event at: {update_url}")
-                
-                update_response = requests.put(update_url, json=event_data, headers=headers, timeout=15)
-                
-                print(f"Update response status: {update_response.status_code}")
-                
-                if update_response.status_code in [200, 201]:
-                    print(f"Successfully updated existing event in Host Hub (ID: {existing_event_id})")
-                    return True
-                else:
-                    print(f"Failed to update event: {update_response.status_code}")
-                    print(f"Response: {update_response.text}")
-                    
-                    # If update fails, try creating new as fallback
-                    print("Attempting to create new event as fallback...")
-            
-            # Create new event
-            create_url = f"{self.host_hub_api_url}/events"
-            print(f"Creating new event in Host Hub...")
-            
-            create_response = requests.post(create_url, json=event_data, headers=headers, timeout=15)
-            
-            print(f"Create response status: {create_response.status_code}")
-            
-            if create_response.status_code in [200, 201]:
-                print("Successfully created new event in Host Hub!")
-                try:
-                    response_data = create_response.json()
-                    if 'event' in response_data:
-                        new_event_id = response_data['event'].get('_id')
-                        print(f"New Host Hub Event ID: {new_event_id}")
-                except:
-                    pass
-                return True
-            else:
-                print(f"Failed to create event: {create_response.status_code}")
-                print(f"Response: {create_response.text}")
-                return False
-                
-        except Exception as e:
-            print(f"Error creating/updating event in Host Hub: {str(e)}")
+            return self.retry_policy.call(
+                self._write_event_once, event_data, sync_meta, on_auth_expired=self._refresh_host_hub_token
+            )
+        except PermanentError as e:
+            print(f"Host Hub rejected event {tripleseat_id}: {e}")
+            self.dead_letter(tripleseat_id, [str(e)], reason=e.reason, payload=event_data)
+            return False
+        except SyncError as e:
+            print(f"Error creating/updating event in Host Hub: {e}")
             return False
     
+    def _freshness_headers(self, sync_meta):
+        """Freshness timestamps (epoch ms) for Host Hub's syncMeta"""
+        if not sync_meta:
+            return {}
+        headers = {"X-Tripleseat-Updated-At": str(sync_meta["tripleseatUpdatedAt"])}
+        if sync_meta.get("fetchedAt"):
+            headers["X-Sync-Fetched-At"] = str(sync_meta["fetchedAt"])
+        return headers
+    
+    def _write_event_once(self, event_data, sync_meta=None):
+        """One attempt at writing an event to Host Hub; raises a typed SyncError"""
+        if not self.host_hub_token:
+            raise AuthExpiredError("No Host Hub authentication token available")
+        
+        # The server upserts on the unique tripleseatEventId index, so concurrent workers
+        # and webhook retries converge on a single event instead of creating duplicates
+        tripleseat_id = event_data['tripleseatEventId']
+        upsert_url = f"{self.host_hub_api_url}/events/tripleseat/{tripleseat_id}"
+        headers = {**self._host_hub_headers(), "Idempotency-Key": self._idempotency_key(event_data)}
+        
+        previous = self.synced_state.get(tripleseat_id) if self.synced_state else None
+        if previous is not None:
+            patched = self._patch_event_in_host_hub(
+                upsert_url, event_data, previous, headers, self._freshness_headers(sync_meta)
+            )
+            if patched is not None:
+                return patched
+            print("Event no longer in Host Hub, falling back to a full upsert")
+        
+        print(f"Upserting event in Host Hub at: {upsert_url}")
+        upsert_response = self._write_to_host_hub(
+            "PUT", upsert_url, event_data, {**headers, **self._freshness_headers(sync_meta)}
+        )
+        
+        print(f"Upsert response status: {upsert_response.status_code}")
+        
+        if upsert_response.status_code not in [200, 201]:
+            raise classify_response("Host Hub", upsert_response)
+        
+        response_data = json_codec.loads(upsert_response.content)
+        host_hub_id = response_data.get('event', {}).get('id')
+        if response_data.get('replayed'):
+            print(f"Event already up to date in Host Hub (ID: {host_hub_id})")
+        elif upsert_response.status_code == 201:
+            print(f"Successfully created new event in Host Hub (ID: {host_hub_id})")
+        else:
+            print(f"Successfully updated existing event in Host Hub (ID: {host_hub_id})")
+        if self.synced_state:
+            self.synced_state.put(tripleseat_id, event_data)
+        return True
+    
     def process_event(self, event_id):
         """Process an event end-to-end from Tripleseat to Host Hub"""
         print(f"\n=== PROCESSING TRIPLESEAT EVENT {event_id} ===\n")
@@ -424,20 +847,41 @@ class TripleseatHostHubIntegration:
             print("Failed to obtain required authentication tokens")
             return False
         
+        # Steps 1-2: a valid mapping confirmed within the cache TTL needs no Tripleseat call
+        record = self.mapped_cache.fresh(event_id) if self.mapped_cache else None
+        if record is not None:
+            print(f"Using cached mapping of event {event_id}")
+            return self._write_processed_event(event_id, record)
+        
         # Step 1: Get event from Tripleseat
-        tripleseat_event = self.get_tripleseat_event(event_id)
-        if not tripleseat_event:
-            print(f"Failed to get event {event_id} from Tripleseat")
+        try:
+            tripleseat_event = self.fetch_tripleseat_event(event_id)
+        except PermanentError as e:
+            # Deleted or unreadable in Tripleseat: retrying later won't change that
+            print(f"Failed to get event {event_id} from Tripleseat: {e}")
+            self.invalidate_event(event_id)
+            self.dead_letter(event_id, [str(e)], reason=e.reason)
+            return False
+        except SyncError as e:
+            print(f"Failed to get event {event_id} from Tripleseat: {e}")
             return False
         
-        # Step 2: Convert to Host Hub format
-        host_hub_data = self.convert_to_host_hub_format(tripleseat_event)
-        if not host_hub_data:
-            print("Failed to convert event data to Host Hub format")
+        # Step 2: Convert to Host Hub format and validate it locally before any write
+        record, errors = self.map_event(tripleseat_event)
+        if errors:
+            print("Event failed pre-flight validation; not sending it to Host Hub")
+            self.dead_letter(event_id, errors)
             return False
+        return self._write_processed_event(event_id, record)
+    
+    def _write_processed_event(self, event_id, record):
+        """Step 3 of process_event: write a mapped, validated event"""
+        host_hub_data = record.to_host_hub()
+        if self.verbose:
+            print(f"Data formatted for Host Hub: {json_codec.dumps_pretty(host_hub_data)}")
         
         # Step 3: Create/update in Host Hub
-        success = self.create_event_in_host_hub(host_hub_data)
+        success = self.create_event_in_host_hub(host_hub_data, record.sync_meta())
         
         if success:
             print(f"\n=== EVENT {event_id} SUCCESSFULLY PROCESSED ===")
@@ -445,20 +889,47 @@ class TripleseatHostHubIntegration:
         else:
             print(f"\n=== FAILED TO PROCESS EVENT {event_id} ===")
             return False
+    
+    def sync_event(self, event_id, changed=True, invalidate=False):
+        """Process an event end-to-end, sharing any end-to-end sync of the same event already in flight
+        
+        With changed=True (a webhook or admin trigger), a run already in progress gets exactly
+        one follow-up run afterwards, so a change it may have missed is still picked up.
+        Pass invalidate=True when the booking is known to have changed (a Tripleseat webhook),
+        so its cached mapping is not reused.
+        """
+        if invalidate:
+            self.invalidate_event(event_id)
+        return self.single_flight.do(f"sync:{event_id}", self.process_event, event_id, changed=changed)
+    
+    def invalidate_event(self, event_id):
+        """Forget the cached mapping of an event that changed in Tripleseat"""
+        if self.mapped_cache:
+            self.mapped_cache.invalidate(event_id)
+    
+    def upsert_event(self, event_data, changed=False, sync_meta=None):
+        """create_event_in_host_hub, coalesced with an in-flight write of the same payload
+        
+        Keyed on the payload, so a caller only ever shares the result of writing its own data;
+        changed=True writes it once more after an in-flight write instead of sharing that result.
+        """
+        key = f"write:{event_data.get('tripleseatEventId')}:{self._idempotency_key(event_data)}"
+        return self.single_flight.do(key, self.create_event_in_host_hub, event_data, sync_meta, changed=changed)
 
 def main():
     """Main entry point with command line argument support"""
     # Get event ID from command line arguments if provided
     event_id = sys.argv[1] if len(sys.argv) > 1 else "47545207"
     
-    # Create integration instance
-    integration = TripleseatHostHubIntegration()
-    
-    # Process the event
-    success = integration.process_event(event_id)
+    # Process the event; an overlapping run for the same event (e.g. a second cron trigger) exits
+    # without logging in and the active run goes once more instead
+    success = run_exclusive(
+        lambda: TripleseatHostHubIntegration().process_event(event_id),
+        f"tripleseat-event-{event_id}", on_busy="follow-up"
+    )
     
-    # Return appropriate exit code
-    sys.exit(0 if success else 1)
+    # Return appropriate exit code (a run handed to the active holder counts as success)
+    sys.exit(0 if success is None or success else 1)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file